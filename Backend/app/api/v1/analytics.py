@@ -0,0 +1,141 @@
+#app/api/v1/analytics.py
+"""
+Analytics API endpoints.
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.db.partitions import add_months
+from app.schemas.analytics import SpendGranularity, SpendBucket, SpendSeries, CounterpartySpend
+from app.middleware.auth import get_current_user_id
+from app.services import spend_rollup as spend_rollup_service
+from app.services import analytics_sink as analytics_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Longest date range a single request may cover
+MAX_RANGE_DAYS = 3660
+
+# Default range per granularity when from_date is omitted: days back from to_date
+DEFAULT_RANGE_DAYS = {"day": 29, "week": 7 * 11}
+
+# Create a router for analytics endpoints
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Bad request"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+def _resolve_range(granularity: str, from_date: Optional[date], to_date: Optional[date]):
+    to_date = to_date or datetime.now(timezone.utc).date()
+    if from_date is None:
+        if granularity == "month":
+            from_date = add_months(to_date.replace(day=1), -11)
+        else:
+            from_date = to_date - timedelta(days=DEFAULT_RANGE_DAYS[granularity])
+
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must not be after to_date"
+        )
+    if (to_date - from_date).days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+    return from_date, to_date
+
+@router.get(
+    "/spend",
+    response_model=SpendSeries,
+    summary="Get spend over time",
+    description="Get the current user's spend per day, week or month, optionally with a single counterparty. "
+                "The range is widened to whole buckets. Long ranges are read from the analytics sink when one is configured."
+)
+async def get_spend_series(
+    granularity: SpendGranularity = Query("day", description="Bucket size"),
+    from_date: Optional[date] = Query(None, description="First day (defaults to 30 days, 12 weeks or 12 months back)"),
+    to_date: Optional[date] = Query(None, description="Last day, inclusive (defaults to today, UTC)"),
+    counterparty_id: Optional[int] = Query(None, gt=0, description="Only count transactions with this user"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's spend series.
+
+    This endpoint requires authentication.
+    """
+    from_date, to_date = _resolve_range(granularity, from_date, to_date)
+    from_day, to_day = spend_rollup_service.bucket_range(granularity, from_date, to_date)
+
+    totals = await analytics_service.get_spend_series(
+        db=db,
+        user_id=current_user_id,
+        granularity=granularity,
+        from_day=from_day,
+        to_day=to_day,
+        counterparty_id=counterparty_id
+    )
+
+    return SpendSeries(
+        granularity=granularity,
+        from_date=from_day,
+        to_date=to_day - timedelta(days=1),
+        counterparty_id=counterparty_id,
+        buckets=[
+            SpendBucket(
+                period_start=row.key,
+                paid_amount=row.paid_amount,
+                paid_count=row.paid_count,
+                borrowed_amount=row.borrowed_amount,
+                borrowed_count=row.borrowed_count
+            )
+            for row in totals
+        ]
+    )
+
+@router.get(
+    "/spend/counterparties",
+    response_model=List[CounterpartySpend],
+    summary="Get spend by counterparty",
+    description="Get the current user's spend with each counterparty over a date range."
+)
+async def get_counterparty_spend(
+    from_date: Optional[date] = Query(None, description="First day (defaults to 30 days back)"),
+    to_date: Optional[date] = Query(None, description="Last day, inclusive (defaults to today, UTC)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's spend per counterparty.
+
+    This endpoint requires authentication.
+    """
+    from_date, to_date = _resolve_range("day", from_date, to_date)
+
+    totals = await analytics_service.get_counterparty_spend(
+        db=db,
+        user_id=current_user_id,
+        from_day=from_date,
+        to_day=to_date + timedelta(days=1)
+    )
+
+    return [
+        CounterpartySpend(
+            counterparty_id=row.key,
+            paid_amount=row.paid_amount,
+            paid_count=row.paid_count,
+            borrowed_amount=row.borrowed_amount,
+            borrowed_count=row.borrowed_count
+        )
+        for row in totals
+    ]
@@ -0,0 +1,111 @@
+#app/api/v1/budget.py
+"""
+Budget-related API endpoints.
+"""
+import logging
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetStatus
+from app.middleware.auth import get_current_user_id
+from app.services import budget as budget_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for budget endpoints
+router = APIRouter(
+    prefix="/budgets",
+    tags=["budgets"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Not found"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+@router.get(
+    "",
+    response_model=List[BudgetStatus],
+    summary="List my budgets",
+    description="Get the current user's budgets with what they have spent against each this month."
+)
+async def list_budgets(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's budgets.
+
+    This endpoint requires authentication.
+    """
+    return await budget_service.get_budgets(db=db, user_id=current_user_id)
+
+@router.post(
+    "",
+    response_model=BudgetStatus,
+    status_code=status.HTTP_201_CREATED,
+    summary="Set a budget",
+    description="Set the current user's monthly budget for a category (or overall, without a category). "
+                "Replaces the limit of an existing budget for the same category."
+)
+async def create_budget(
+    budget_data: BudgetCreate = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Create or replace a budget.
+
+    This endpoint requires authentication.
+    """
+    return await budget_service.create_budget(db=db, user_id=current_user_id, budget_data=budget_data)
+
+@router.patch(
+    "/{budget_id}",
+    response_model=BudgetStatus,
+    summary="Update budget",
+    description="Change the limit of one of the current user's budgets."
+)
+async def update_budget(
+    budget_id: int = Path(..., gt=0, description="ID of the budget to update"),
+    budget_data: BudgetUpdate = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Update a budget.
+
+    This endpoint requires authentication.
+    """
+    return await budget_service.update_budget(
+        db=db,
+        budget_id=budget_id,
+        user_id=current_user_id,
+        budget_data=budget_data
+    )
+
+@router.delete(
+    "/{budget_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete budget",
+    description="Remove one of the current user's budgets."
+)
+async def delete_budget(
+    budget_id: int = Path(..., gt=0, description="ID of the budget to delete"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Delete a budget.
+
+    This endpoint requires authentication.
+    """
+    deleted = await budget_service.delete_budget(db=db, budget_id=budget_id, user_id=current_user_id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,132 @@
+#app/api/v1/connection.py
+"""
+Connection-related API endpoints.
+"""
+import logging
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Body, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.user_connection import UserConnectionAdd, UserConnectionInDB, MutualConnections, ConnectionSuggestion
+from app.middleware.auth import get_current_user_id
+from app.services import connection as connection_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for connection endpoints
+router = APIRouter(
+    prefix="/connections",
+    tags=["connections"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Not found"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+@router.get(
+    "",
+    response_model=List[int],
+    summary="List my connections",
+    description="Get the IDs of every user the current user is connected to, in either direction."
+)
+async def list_connections(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's connections.
+
+    This endpoint requires authentication.
+    """
+    return await connection_service.get_connection_ids(db=db, user_id=current_user_id)
+
+@router.post(
+    "",
+    response_model=UserConnectionInDB,
+    status_code=status.HTTP_201_CREATED,
+    summary="Connect to a user",
+    description="Connect the current user to another active user."
+)
+async def add_connection(
+    connection_data: UserConnectionAdd = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Connect the current user to another user.
+
+    This endpoint requires authentication.
+    """
+    return await connection_service.add_connection(
+        db=db,
+        user_id=current_user_id,
+        connected_user_id=connection_data.connected_user_id
+    )
+
+@router.get(
+    "/suggestions",
+    response_model=List[ConnectionSuggestion],
+    summary="Suggest connections",
+    description="Suggest users connected to the current user's connections, ranked by mutual connections."
+)
+async def suggest_connections(
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of suggestions"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get connection suggestions for the current user.
+
+    This endpoint requires authentication.
+    """
+    suggestions = await connection_service.suggest_connections(db=db, user_id=current_user_id, limit=limit)
+    return [ConnectionSuggestion(user_id=user_id, mutual_count=count) for user_id, count in suggestions]
+
+@router.get(
+    "/mutual/{user_id}",
+    response_model=MutualConnections,
+    summary="Get mutual connections",
+    description="Get the users connected to both the current user and another user."
+)
+async def get_mutual_connections(
+    user_id: int = Path(..., gt=0, description="ID of the other user"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's mutual connections with another user.
+
+    This endpoint requires authentication.
+    """
+    mutual = await connection_service.get_mutual_connection_ids(
+        db=db,
+        user_id=current_user_id,
+        other_user_id=user_id
+    )
+    return MutualConnections(user_id=user_id, mutual_count=len(mutual), user_ids=mutual)
+
+@router.delete(
+    "/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remove connection",
+    description="Disconnect the current user from another user, in both directions."
+)
+async def remove_connection(
+    user_id: int = Path(..., gt=0, description="ID of the other user"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Remove a connection.
+
+    This endpoint requires authentication.
+    """
+    removed = await connection_service.remove_connection(db=db, user_id=current_user_id, other_user_id=user_id)
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Connection not found"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
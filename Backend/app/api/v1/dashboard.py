@@ -0,0 +1,43 @@
+#app/api/v1/dashboard.py
+"""
+Dashboard API endpoints.
+"""
+import logging
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.dashboard import Dashboard
+from app.middleware.auth import get_current_user_id
+from app.services import dashboard as dashboard_service
+from app.core.utils.serialization import FastJSONResponse
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for dashboard endpoints
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+@router.get(
+    "",
+    response_model=Dashboard,
+    summary="Get dashboard",
+    description="Get every dashboard widget's data for the current user in one payload. Cached for a few seconds."
+)
+async def get_dashboard(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's dashboard.
+
+    This endpoint requires authentication.
+    """
+    payload = await dashboard_service.get_dashboard(db=db, user_id=current_user_id)
+    return FastJSONResponse(payload)
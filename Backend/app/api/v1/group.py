@@ -0,0 +1,360 @@
+#app/api/v1/group.py
+"""
+Group-related API endpoints.
+"""
+import logging
+from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Body, Header, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.group import Group as GroupSchema, GroupCreateRequest
+from app.schemas.group_member import GroupMemberAdd, GroupMemberInDB, GroupMemberBatchRequest, GroupMemberBatchResult
+from app.schemas.settlement import SettlementPlan, MemberBalance, SettlementTransfer
+from app.schemas.split import GroupExpenseCreate, GroupExpense
+from app.schemas.transaction import transaction_serializer
+from app.middleware.auth import get_current_user_id
+from app.services import group as group_service
+from app.services import settlement as settlement_service
+from app.services import transaction_export as export_service
+from app.services import split as split_service
+from app.services import idempotency as idempotency_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for group endpoints
+router = APIRouter(
+    prefix="/groups",
+    tags=["groups"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Not found"},
+        status.HTTP_403_FORBIDDEN: {"description": "Forbidden"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+async def _require_group_access(db: AsyncSession, group_id: int, user_id: int):
+    """
+    Ensure the group exists and the user is its admin or an active member.
+
+    Members are checked against the membership index, so the common case
+    costs no database round-trip; the group is only loaded to tell a missing
+    group (404) from a forbidden one (403).
+    """
+    if await group_service.is_group_member(db=db, group_id=group_id, user_id=user_id):
+        return
+
+    group = await group_service.get_active_group_by_id(db=db, group_id=group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found or inactive"
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You are not a member of this group"
+    )
+
+async def _require_group_admin(db: AsyncSession, group_id: int, user_id: int):
+    """Ensure the group exists and the user is its admin, returning the group."""
+    group = await group_service.get_active_group_by_id(db=db, group_id=group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found or inactive"
+        )
+
+    if group.admin_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the group admin can do this"
+        )
+
+    return group
+
+@router.post(
+    "",
+    response_model=GroupSchema,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create group",
+    description="Create a group with the current user as its admin and first member."
+)
+async def create_group(
+    group_data: GroupCreateRequest = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Create a new group.
+
+    This endpoint requires authentication.
+    """
+    return await group_service.create_group(db=db, admin_id=current_user_id, group_name=group_data.group_name)
+
+@router.get(
+    "",
+    response_model=List[GroupSchema],
+    summary="List my groups",
+    description="Get every active group the current user is a member or admin of."
+)
+async def list_groups(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's groups.
+
+    This endpoint requires authentication.
+    """
+    return await group_service.get_user_groups(db=db, user_id=current_user_id)
+
+@router.delete(
+    "/{group_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Deactivate group",
+    description="Deactivate a group. Only the group admin can do this."
+)
+async def deactivate_group(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Deactivate a group.
+
+    This endpoint requires authentication and group admin rights.
+    """
+    await _require_group_admin(db, group_id, current_user_id)
+    await group_service.deactivate_group(db=db, group_id=group_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get(
+    "/{group_id}/members",
+    response_model=List[GroupMemberInDB],
+    summary="List group members",
+    description="Get a group's active members."
+)
+async def list_group_members(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get a group's members.
+
+    This endpoint requires authentication and group membership.
+    """
+    await _require_group_access(db, group_id, current_user_id)
+    return await group_service.get_group_members(db=db, group_id=group_id)
+
+@router.post(
+    "/{group_id}/members",
+    response_model=GroupMemberInDB,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add group member",
+    description="Add a user to a group. Only the group admin can do this."
+)
+async def add_group_member(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    member_data: GroupMemberAdd = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Add a member to a group.
+
+    This endpoint requires authentication and group admin rights.
+    """
+    await _require_group_admin(db, group_id, current_user_id)
+    return await group_service.add_group_member(db=db, group_id=group_id, user_id=member_data.user_id)
+
+@router.post(
+    "/{group_id}/members:batch",
+    response_model=GroupMemberBatchResult,
+    summary="Add and remove group members in bulk",
+    description="Add (or reactivate) and remove many members in one request and get back what changed. Only the group admin can do this."
+)
+async def batch_update_group_members(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    batch_data: GroupMemberBatchRequest = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Apply a batch of membership changes to a group.
+
+    This endpoint requires authentication and group admin rights.
+    """
+    group = await _require_group_admin(db, group_id, current_user_id)
+
+    changes = await group_service.batch_update_members(
+        db=db,
+        group=group,
+        add=batch_data.add,
+        remove=batch_data.remove
+    )
+
+    return GroupMemberBatchResult(group_id=group_id, **changes._asdict())
+
+@router.delete(
+    "/{group_id}/members/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remove group member",
+    description="Remove a user from a group. The admin can remove anyone; members can remove themselves."
+)
+async def remove_group_member(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    user_id: int = Path(..., gt=0, description="ID of the member to remove"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Remove a member from a group.
+
+    This endpoint requires authentication.
+    """
+    group = await group_service.get_active_group_by_id(db=db, group_id=group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found or inactive"
+        )
+
+    if current_user_id not in (group.admin_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the group admin can remove other members"
+        )
+
+    removed = await group_service.remove_group_member(db=db, group=group, user_id=user_id)
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User is not an active member of this group"
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get(
+    "/{group_id}/settlement-plan",
+    response_model=SettlementPlan,
+    summary="Get group settlement plan",
+    description="Compute each member's net balance and a minimal set of transfers that settles the group."
+)
+async def get_settlement_plan(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the settlement plan for a group.
+
+    This endpoint requires authentication and group membership.
+    """
+    await _require_group_access(db, group_id, current_user_id)
+
+    balances, transfers, is_optimal = await settlement_service.get_settlement_plan(db=db, group_id=group_id)
+
+    return SettlementPlan(
+        group_id=group_id,
+        balances=[
+            MemberBalance(user_id=user_id, net_balance=settlement_service.from_cents(cents))
+            for user_id, cents in sorted(balances.items())
+        ],
+        transfers=[
+            SettlementTransfer(
+                from_user_id=transfer.from_user_id,
+                to_user_id=transfer.to_user_id,
+                amount=settlement_service.from_cents(transfer.amount_cents)
+            )
+            for transfer in transfers
+        ],
+        is_optimal=is_optimal
+    )
+
+@router.get(
+    "/{group_id}/export",
+    summary="Export group ledger",
+    description="Stream a group's full transaction ledger as CSV or NDJSON, optionally compressed.",
+    response_class=StreamingResponse
+)
+async def export_group_ledger(
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Export format"),
+    compression: Optional[str] = Query(None, pattern="^(gzip|zstd)$", description="Optional compression"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Export a group's ledger.
+
+    This endpoint requires authentication and group membership.
+    """
+    await _require_group_access(db, group_id, current_user_id)
+
+    media_type, filename = export_service.export_media_type_and_filename(
+        f"group-{group_id}-transactions", format, compression
+    )
+    return StreamingResponse(
+        export_service.export_stream(export_service.group_ledger_query(group_id), format, compression),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post(
+    "/{group_id}/expenses",
+    response_model=GroupExpense,
+    status_code=status.HTTP_201_CREATED,
+    summary="Split a group expense",
+    description="Split an expense between group members (equal, shares, percentage or exact) and record what each participant owes the payer. The payer must be the caller unless the caller is the group admin."
+)
+async def create_group_expense(
+    request: Request,
+    group_id: int = Path(..., gt=0, description="ID of the group"),
+    expense_data: GroupExpenseCreate = Body(...),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Client-generated key; retries with the same key replay the original response"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Split a group expense into per-member transactions.
+
+    This endpoint requires authentication and group membership. Members can
+    only record expenses they paid; the group admin can record them for any member.
+    """
+    await _require_group_access(db, group_id, current_user_id)
+
+    if expense_data.payer_id != current_user_id:
+        group = await group_service.get_active_group_by_id(db=db, group_id=group_id)
+        if group is None or group.admin_id != current_user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the group admin can record expenses paid by another member"
+            )
+
+    async def handler(db: AsyncSession):
+        shares, rows = await split_service.create_group_expense(db=db, group_id=group_id, expense=expense_data)
+        return GroupExpense(
+            group_id=group_id,
+            payer_id=expense_data.payer_id,
+            total_amount=expense_data.total_amount,
+            mode=expense_data.mode,
+            shares=[
+                {"user_id": user_id, "amount": split_service.from_cents(cents)}
+                for user_id, cents in shares
+            ],
+            transactions=[transaction_serializer.construct(row) for row in rows]
+        ).model_dump_json().encode("utf-8")
+
+    return await idempotency_service.run_idempotent(
+        db, request, idempotency_key, current_user_id, status.HTTP_201_CREATED, handler,
+        body=expense_data.model_dump_json().encode("utf-8")
+    )
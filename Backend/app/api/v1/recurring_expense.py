@@ -0,0 +1,115 @@
+#app/api/v1/recurring_expense.py
+"""
+Recurring expense API endpoints.
+"""
+import logging
+from typing import List
+from fastapi import APIRouter, Depends, Path, Body, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.recurring_expense import (
+    RecurringExpense as RecurringExpenseSchema,
+    RecurringExpenseCreate,
+    RecurringExpenseUpdate
+)
+from app.middleware.auth import get_current_user_id
+from app.services import recurring_expense as recurring_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for recurring expense endpoints
+router = APIRouter(
+    prefix="/recurring-expenses",
+    tags=["recurring-expenses"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Not found"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+@router.get(
+    "",
+    response_model=List[RecurringExpenseSchema],
+    summary="List recurring expenses",
+    description="Get the recurring expenses (bills and subscriptions) the current user pays or is paid for, next due first."
+)
+async def list_recurring_expenses(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's recurring expenses.
+
+    This endpoint requires authentication.
+    """
+    return await recurring_service.get_recurring_expenses(db=db, user_id=current_user_id)
+
+@router.post(
+    "",
+    response_model=RecurringExpenseSchema,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create recurring expense",
+    description="Schedule a transaction to be recorded every interval, starting at start_at. "
+                "Occurrences before now are not recorded."
+)
+async def create_recurring_expense(
+    expense_data: RecurringExpenseCreate = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Create a recurring expense.
+
+    This endpoint requires authentication.
+    """
+    return await recurring_service.create_recurring_expense(
+        db=db,
+        user_id=current_user_id,
+        expense_data=expense_data
+    )
+
+@router.patch(
+    "/{expense_id}",
+    response_model=RecurringExpenseSchema,
+    summary="Update recurring expense",
+    description="Change the amount, description, category or end of a recurring expense. "
+                "Transactions already recorded are not changed."
+)
+async def update_recurring_expense(
+    expense_id: int = Path(..., gt=0, description="ID of the recurring expense"),
+    expense_data: RecurringExpenseUpdate = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Update a recurring expense.
+
+    This endpoint requires authentication.
+    """
+    return await recurring_service.update_recurring_expense(
+        db=db,
+        expense_id=expense_id,
+        user_id=current_user_id,
+        expense_data=expense_data
+    )
+
+@router.delete(
+    "/{expense_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete recurring expense",
+    description="Stop a recurring expense. Transactions already recorded are kept."
+)
+async def delete_recurring_expense(
+    expense_id: int = Path(..., gt=0, description="ID of the recurring expense"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Delete a recurring expense.
+
+    This endpoint requires authentication.
+    """
+    await recurring_service.delete_recurring_expense(db=db, expense_id=expense_id, user_id=current_user_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,393 @@
+#app/api/v1/transaction.py
+"""
+Transaction-related API endpoints.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Body, Header, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.schemas.transaction import (
+    Transaction as TransactionSchema,
+    TransactionCreate,
+    TransactionUpdate,
+    TransactionBulkImportResult,
+    TransactionPage,
+    transaction_serializer
+)
+from app.schemas.transaction_summary import TransactionSummary as TransactionSummarySchema
+from app.schemas.pair_balance import CounterpartyBalance
+from app.schemas.ledger import BalanceAtTime
+from app.middleware.auth import get_current_user_id
+from app.services import ledger as ledger_service
+from app.services import pair_balance as pair_balance_service
+from app.services import ledger_events as ledger_events_service
+from app.services import idempotency as idempotency_service
+from app.services import transaction_import as import_service
+from app.services import transaction as transaction_service
+from app.services import transaction_export as export_service
+from app.core.utils.serialization import FastJSONResponse
+from fastapi.responses import StreamingResponse
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Create a router for transaction endpoints
+router = APIRouter(
+    prefix="/transactions",
+    tags=["transactions"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Not found"},
+        status.HTTP_403_FORBIDDEN: {"description": "Forbidden"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"}
+    },
+)
+
+# Longest window the top transactions endpoint may rank
+MAX_TOP_RANGE_DAYS = 366
+
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Client-generated key; retries with the same key replay the original response"
+)
+
+@router.post(
+    "",
+    response_model=TransactionSchema,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create transaction",
+    description="Record a transaction between the current user and another user."
+)
+async def create_transaction(
+    request: Request,
+    transaction_data: TransactionCreate = Body(...),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Create a transaction and update both parties' balances.
+
+    This endpoint requires authentication.
+    """
+    if current_user_id not in (transaction_data.payer_id, transaction_data.payee_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only record transactions you are part of"
+        )
+
+    async def handler(db: AsyncSession):
+        db_transaction = await ledger_service.create_transaction(db=db, transaction_data=transaction_data)
+        return transaction_serializer.dump_one(db_transaction)
+
+    return await idempotency_service.run_idempotent(
+        db, request, idempotency_key, current_user_id, status.HTTP_201_CREATED, handler,
+        body=transaction_data.model_dump_json().encode("utf-8")
+    )
+
+@router.get(
+    "",
+    response_model=TransactionPage,
+    summary="List transactions",
+    description="Get the current user's transactions, newest first, using cursor pagination."
+)
+async def list_transactions(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of transactions to return"),
+    is_settled: Optional[bool] = Query(None, description="Filter by settled state"),
+    is_group_transaction: Optional[bool] = Query(None, description="Filter by group transactions"),
+    counterparty_id: Optional[int] = Query(None, gt=0, description="Only transactions with this user"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get a page of the current user's transaction history.
+
+    This endpoint requires authentication.
+    """
+    rows, next_cursor = await transaction_service.get_transaction_history(
+        db=db,
+        user_id=current_user_id,
+        limit=limit,
+        cursor=cursor,
+        is_settled=is_settled,
+        is_group_transaction=is_group_transaction,
+        counterparty_id=counterparty_id
+    )
+
+    # Rows come straight from the database, so encode them without re-validating
+    return FastJSONResponse({
+        "items": [transaction_serializer.construct(row) for row in rows],
+        "next_cursor": next_cursor
+    })
+
+@router.get(
+    "/top",
+    response_model=List[TransactionSchema],
+    summary="Get largest transactions",
+    description="Get the current user's largest active transactions created within a time window."
+)
+async def get_top_transactions(
+    k: int = Query(5, ge=1, le=100, description="Number of transactions to return"),
+    from_time: Optional[datetime] = Query(None, alias="from", description="Start of the window, inclusive (defaults to the start of this month, UTC)"),
+    to_time: Optional[datetime] = Query(None, alias="to", description="End of the window, exclusive (defaults to now)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's top transactions by amount.
+
+    This endpoint requires authentication.
+    """
+    now = datetime.now(timezone.utc)
+    to_time = to_time or now
+    from_time = from_time or now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    # Naive times are taken as UTC
+    if from_time.tzinfo is None:
+        from_time = from_time.replace(tzinfo=timezone.utc)
+    if to_time.tzinfo is None:
+        to_time = to_time.replace(tzinfo=timezone.utc)
+
+    if from_time >= to_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must be before to"
+        )
+    if to_time - from_time > timedelta(days=MAX_TOP_RANGE_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window cannot exceed {MAX_TOP_RANGE_DAYS} days"
+        )
+
+    rows = await transaction_service.get_top_transactions(
+        db=db,
+        user_id=current_user_id,
+        k=k,
+        from_time=from_time,
+        to_time=to_time
+    )
+
+    # Rows come straight from the database, so encode them without re-validating
+    return FastJSONResponse([transaction_serializer.construct(row) for row in rows])
+
+@router.get(
+    "/export",
+    summary="Export transactions",
+    description="Stream the current user's full transaction history as CSV or NDJSON, optionally compressed.",
+    response_class=StreamingResponse
+)
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Export format"),
+    compression: Optional[str] = Query(None, pattern="^(gzip|zstd)$", description="Optional compression"),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Export the current user's ledger.
+
+    This endpoint requires authentication.
+    """
+    media_type, filename = export_service.export_media_type_and_filename(
+        f"transactions-{current_user_id}", format, compression
+    )
+    return StreamingResponse(
+        export_service.export_stream(export_service.user_ledger_query(current_user_id), format, compression),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post(
+    "/bulk",
+    response_model=TransactionBulkImportResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Bulk import transactions",
+    description="Import many transactions from an NDJSON or CSV request body in a single all-or-nothing batch."
+)
+async def bulk_import_transactions(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Body format; defaults to the Content-Type"),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Bulk import transactions the current user is part of.
+
+    The body is streamed and validated in chunks; if any row is invalid,
+    nothing is imported and the offending lines are returned. With an
+    Idempotency-Key the body is fingerprinted as it streams, and a retry's
+    body is read and compared before the original response is replayed.
+
+    This endpoint requires authentication.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+
+    parser = import_service.parse_csv if format == "csv" else import_service.parse_ndjson
+    body = idempotency_service.StreamFingerprint(
+        request.method, request.url.path, request.stream(), prefix=format.encode("ascii")
+    )
+
+    async def handler(db: AsyncSession):
+        result = await import_service.import_transactions(
+            db=db,
+            rows=parser(body.stream()),
+            user_id=current_user_id
+        )
+
+        if result.errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"message": "No transactions were imported", "errors": result.errors}
+            )
+
+        return TransactionBulkImportResult(
+            inserted=result.inserted,
+            users_updated=result.users_updated
+        ).model_dump_json().encode("utf-8")
+
+    return await idempotency_service.run_idempotent(
+        db, request, idempotency_key, current_user_id, status.HTTP_201_CREATED, handler,
+        streamed_body=body
+    )
+
+@router.get(
+    "/summary",
+    response_model=TransactionSummarySchema,
+    summary="Get balance summary",
+    description="Get the current user's total borrowings, receivables and net balance."
+)
+async def get_transaction_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's maintained balance summary.
+
+    This endpoint requires authentication.
+    """
+    summary = await ledger_service.get_transaction_summary(db=db, user_id=current_user_id)
+
+    if not summary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No transactions recorded for this user"
+        )
+
+    return summary
+
+@router.get(
+    "/summary/at",
+    response_model=BalanceAtTime,
+    summary="Get balance summary at a point in time",
+    description="Replay the ledger event log to get the current user's balances as of a timestamp."
+)
+async def get_transaction_summary_at(
+    at: datetime = Query(..., description="Point in time (ISO 8601; UTC if no offset is given)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's balances at a past point in time.
+
+    This endpoint requires authentication.
+    """
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+
+    borrowings, receivables = await ledger_events_service.get_balance_at(db=db, user_id=current_user_id, at=at)
+
+    return BalanceAtTime(
+        user_id=current_user_id,
+        at=at,
+        total_borrowings=borrowings,
+        total_receivables=receivables,
+        total_amount=receivables - borrowings
+    )
+
+@router.get(
+    "/balances",
+    response_model=List[CounterpartyBalance],
+    summary="Get balances with other users",
+    description="Get the current user's outstanding net balance with each counterparty; positive means they owe you."
+)
+async def get_counterparty_balances(
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the current user's maintained per-counterparty balances.
+
+    This endpoint requires authentication.
+    """
+    balances = await pair_balance_service.get_counterparty_balances(db=db, user_id=current_user_id)
+
+    return [
+        CounterpartyBalance(counterparty_id=counterparty_id, balance=balance)
+        for counterparty_id, balance in balances
+    ]
+
+@router.put(
+    "/{transaction_id}",
+    response_model=TransactionSchema,
+    summary="Update transaction",
+    description="Update a transaction's description, settled or active state."
+)
+async def update_transaction(
+    request: Request,
+    transaction_id: int = Path(..., gt=0, description="ID of the transaction"),
+    transaction_data: TransactionUpdate = Body(...),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Update a transaction the current user is part of.
+
+    This endpoint requires authentication.
+    """
+    async def handler(db: AsyncSession):
+        db_transaction = await ledger_service.update_transaction(
+            db=db,
+            transaction_id=transaction_id,
+            transaction_data=transaction_data,
+            user_id=current_user_id
+        )
+        return transaction_serializer.dump_one(db_transaction)
+
+    return await idempotency_service.run_idempotent(
+        db, request, idempotency_key, current_user_id, status.HTTP_200_OK, handler,
+        body=transaction_data.model_dump_json(exclude_unset=True).encode("utf-8")
+    )
+
+@router.put(
+    "/{transaction_id}/settle",
+    response_model=TransactionSchema,
+    summary="Settle transaction",
+    description="Mark a transaction as settled."
+)
+async def settle_transaction(
+    request: Request,
+    transaction_id: int = Path(..., gt=0, description="ID of the transaction"),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Settle a transaction the current user is part of.
+
+    This endpoint requires authentication.
+    """
+    async def handler(db: AsyncSession):
+        db_transaction = await ledger_service.settle_transaction(
+            db=db,
+            transaction_id=transaction_id,
+            user_id=current_user_id
+        )
+        return transaction_serializer.dump_one(db_transaction)
+
+    return await idempotency_service.run_idempotent(db, request, idempotency_key, current_user_id, status.HTTP_200_OK, handler)
@@ -14,10 +14,13 @@ from app.models.user import User as UserModel
 from app.schemas.user import (
     User as UserSchema,
     UserCreate,
-    UserUpdate
+    UserUpdate,
+    user_serializer
 )
 from app.middleware.auth import get_current_user_id, get_current_user
 from app.services import user as user_service
+from app.services.user_cache import user_profile_cache
+from app.core.utils.serialization import FastJSONResponse
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -84,28 +87,40 @@ async def get_user_details(
             detail="Either username or email must be provided"
         )
     
-    # Get user by username or email
-    user = None
+    # Serve the pre-encoded profile from cache; only the session check hits the database
     if username:
-        user = await user_service.get_active_verified_user_by_username(db=db, username=username)
+        cached = await user_profile_cache.get_by_username(username)
     else:
-        user = await user_service.get_active_verified_user_by_email(db=db, email=email)
+        cached = await user_profile_cache.get_by_email(email)
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found, inactive, or not verified"
-        )
+    if cached:
+        has_active_session = await user_service.has_active_session(db=db, user_id=cached.user_id)
+        payload = cached.payload
+    else:
+        # Get user by username or email, together with their active session flag
+        token = await user_profile_cache.token()
+        user = None
+        if username:
+            user, has_active_session = await user_service.get_active_verified_user_with_session_by_username(db=db, username=username)
+        else:
+            user, has_active_session = await user_service.get_active_verified_user_with_session_by_email(db=db, email=email)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found, inactive, or not verified"
+            )
+        
+        payload = await user_profile_cache.set(user, token)
     
     # Check if user has active session
-    has_active_session = await user_service.has_active_session(db=db, user_id=user.id)
     if not has_active_session:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User does not have an active session"
         )
     
-    return user
+    return FastJSONResponse(payload)
 
 @router.get(
     "/details/{user_id}",
@@ -123,23 +138,32 @@ async def get_user_details_by_id(
     
     This endpoint requires authentication.
     """
-    user = await user_service.get_active_verified_user_by_id(db=db, user_id=user_id)
+    # Serve the pre-encoded profile from cache; only the session check hits the database
+    cached = await user_profile_cache.get_by_id(user_id)
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found, inactive, or not verified"
-        )
+    if cached:
+        has_active_session = await user_service.has_active_session(db=db, user_id=user_id)
+        payload = cached.payload
+    else:
+        token = await user_profile_cache.token(user_id)
+        user, has_active_session = await user_service.get_active_verified_user_with_session_by_id(db=db, user_id=user_id)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found, inactive, or not verified"
+            )
+        
+        payload = await user_profile_cache.set(user, token)
     
     # Check if user has active session
-    has_active_session = await user_service.has_active_session(db=db, user_id=user.id)
     if not has_active_session:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User does not have an active session"
         )
     
-    return user
+    return FastJSONResponse(payload)
 
 @router.put(
     "/update",
@@ -165,12 +189,12 @@ async def update_user_details(
             detail="Either username or email must be provided"
         )
     
-    # Get user by username or email
+    # Get user by username or email, together with their active session flag
     user_to_update = None
     if username:
-        user_to_update = await user_service.get_active_verified_user_by_username(db=db, username=username)
+        user_to_update, has_active_session = await user_service.get_active_verified_user_with_session_by_username(db=db, username=username)
     else:
-        user_to_update = await user_service.get_active_verified_user_by_email(db=db, email=email)
+        user_to_update, has_active_session = await user_service.get_active_verified_user_with_session_by_email(db=db, email=email)
     
     if not user_to_update:
         raise HTTPException(
@@ -179,7 +203,6 @@ async def update_user_details(
         )
     
     # Check if user has active session
-    has_active_session = await user_service.has_active_session(db=db, user_id=user_to_update.id)
     if not has_active_session:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -304,4 +327,5 @@ async def search_users(
         exclude_user_id=current_user_id
     )
     
-    return users
\ No newline at end of file
+    # Rows come straight from the database, so encode them without re-validating
+    return FastJSONResponse(user_serializer.dump_many(users))
\ No newline at end of file
@@ -5,6 +5,9 @@ from .api_config import APIConfig
 from .auth_config import AuthConfig
 from .cors_config import CORSConfig
 from .database_config import DatabaseConfig
+from .cache_config import CacheConfig
+from .analytics_config import AnalyticsConfig
+from .scheduler_config import SchedulerConfig
 from .env_config import EnvironmentConfig
 
 __all__ = [
@@ -14,5 +17,8 @@ __all__ = [
     "AuthConfig",
     "CORSConfig",
     "DatabaseConfig",
+    "CacheConfig",
+    "AnalyticsConfig",
+    "SchedulerConfig",
     "EnvironmentConfig"
 ]
\ No newline at end of file
@@ -0,0 +1,26 @@
+# app/core/config/analytics_config.py
+
+from typing import Literal
+from pydantic_settings import BaseSettings
+
+class AnalyticsConfig(BaseSettings):
+    """Analytics sink configuration settings"""
+    # Columnar copy of transactions for long-range analytics ("none" keeps everything on Postgres)
+    ANALYTICS_SINK: Literal["none", "clickhouse", "local"] = "none"
+    ANALYTICS_FLUSH_INTERVAL_MS: int = 500
+    ANALYTICS_BATCH_SIZE: int = 5000
+    ANALYTICS_MAX_PENDING: int = 200000
+    
+    # Spend queries spanning at least this many days are read from the sink
+    ANALYTICS_OFFLOAD_MIN_DAYS: int = 90
+    
+    # Embedded SQLite sink for tests and single-node installs
+    ANALYTICS_LOCAL_PATH: str = "analytics.sqlite3"
+    
+    # ClickHouse sink (HTTP interface)
+    CLICKHOUSE_HOST: str = "localhost"
+    CLICKHOUSE_PORT: int = 8123
+    CLICKHOUSE_USER: str = "default"
+    CLICKHOUSE_PASSWORD: str = ""
+    CLICKHOUSE_DATABASE: str = "default"
+    CLICKHOUSE_SECURE: bool = False
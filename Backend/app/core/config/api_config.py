@@ -3,6 +3,8 @@
 from typing import Dict, Any
 from pydantic_settings import BaseSettings
 
+from app.core.utils.serialization import FastJSONResponse
+
 class APIConfig(BaseSettings):
     """API configuration settings"""
     PROJECT_NAME: str = "Equipay"
@@ -21,7 +23,8 @@ class APIConfig(BaseSettings):
             "docs_url": "/docs",
             "redoc_url": "/redoc",
             "openapi_url": "/openapi.json",
-            "swagger_ui_parameters": {"defaultModelsExpandDepth": -1}
+            "swagger_ui_parameters": {"defaultModelsExpandDepth": -1},
+            "default_response_class": FastJSONResponse
         }
         if not isinstance(config, dict):
             raise ValueError("API configuration must be a dictionary.")
@@ -0,0 +1,41 @@
+# app/core/config/cache_config.py
+
+from typing import Optional
+from pydantic_settings import BaseSettings
+
+class CacheConfig(BaseSettings):
+    """Cache configuration settings"""
+    # Optional shared Redis tier (in-process cache only when unset)
+    REDIS_URL: Optional[str] = None
+    CACHE_KEY_PREFIX: str = "equipay"
+    
+    # User profile read cache
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_LOCAL_TTL_SECONDS: int = 30
+    USER_CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300
+    
+    # Idempotency-Key response cache for ledger writes
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long a duplicate waits for the original (in another process) before a 409
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_LOCAL_MAX_ENTRIES: int = 10000
+    
+    # Per-process group membership index
+    GROUP_MEMBERSHIP_CACHE_ENABLED: bool = True
+    GROUP_MEMBERSHIP_CACHE_TTL_SECONDS: int = 30
+    GROUP_MEMBERSHIP_CACHE_MAX_ENTRIES: int = 50000
+    
+    # Per-process connection graph (SQL queries when disabled)
+    CONNECTION_GRAPH_ENABLED: bool = True
+    CONNECTION_GRAPH_REFRESH_SECONDS: int = 5
+    CONNECTION_GRAPH_COMPACT_THRESHOLD: int = 100000
+    # Full reload from the database as a backstop to incremental refreshes
+    CONNECTION_GRAPH_REBUILD_SECONDS: int = 3600
+    # Reload instead of refreshing once a long transaction holds the refresh window open this long
+    CONNECTION_GRAPH_MAX_REFRESH_LAG_SECONDS: int = 300
+    
+    # Per-user dashboard payload cache
+    DASHBOARD_CACHE_ENABLED: bool = True
+    DASHBOARD_CACHE_TTL_SECONDS: int = 15
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 10000
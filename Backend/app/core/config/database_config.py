@@ -31,6 +31,10 @@ class DatabaseConfig(BaseSettings):
     EXCLUDED_TABLES: List[str] = ["alembic_version"]
     DB_SKIP_COLUMNS_ON_MODIFY: List[str] = ["created_at", "last_updated_at", "expires_at", "last_login", "last_activity", "id"]
     
+    # Range partitioning (monthly partitions of partitioned tables)
+    DB_PARTITION_MONTHS_AHEAD: int = 3
+    DB_PARTITION_RETENTION_MONTHS: Optional[int] = None
+    
     
     @validator("DATABASE_URL", pre=True, always=True)
     def assemble_db_url(cls, v, values):
@@ -0,0 +1,30 @@
+# app/core/config/scheduler_config.py
+
+from typing import Literal
+from pydantic_settings import BaseSettings
+
+class SchedulerConfig(BaseSettings):
+    """Background job configuration settings"""
+    # Recurring expenses: run the scheduler inside each API process
+    RECURRING_SCHEDULER_ENABLED: bool = True
+    RECURRING_POLL_SECONDS: int = 30
+    # Schedules claimed per database transaction
+    RECURRING_BATCH_SIZE: int = 100
+    # Missed occurrences materialized per schedule per batch (the rest follow in later batches)
+    RECURRING_MAX_CATCH_UP: int = 31
+    # Partition maintenance (see app/db/partitions.py): run inside each API process
+    PARTITION_MAINTENANCE_ENABLED: bool = True
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 21600
+    # Debt reminders: unsettled debts older than REMINDER_MIN_AGE_DAYS are sent to the
+    # debtor as one digest, at most once every REMINDER_INTERVAL_DAYS
+    REMINDER_MIN_AGE_DAYS: int = 3
+    REMINDER_INTERVAL_DAYS: int = 7
+    # Recipients selected per query
+    REMINDER_BATCH_SIZE: int = 500
+    # Digests in flight at once, and delivery attempts per digest (exponential backoff)
+    REMINDER_CONCURRENCY: int = 20
+    REMINDER_MAX_ATTEMPTS: int = 4
+    REMINDER_BACKOFF_SECONDS: float = 0.5
+    # Notifier: log (logger lines) or file (NDJSON appended to REMINDER_FILE_PATH)
+    REMINDER_NOTIFIER: Literal["log", "file"] = "log"
+    REMINDER_FILE_PATH: str = "reminders.ndjson"
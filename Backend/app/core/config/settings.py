@@ -9,6 +9,9 @@ from .api_config import APIConfig
 from .auth_config import AuthConfig
 from .cors_config import CORSConfig
 from .database_config import DatabaseConfig
+from .cache_config import CacheConfig
+from .analytics_config import AnalyticsConfig
+from .scheduler_config import SchedulerConfig
 
 
 class Settings(
@@ -16,7 +19,10 @@ class Settings(
     APIConfig,
     AuthConfig,
     CORSConfig, 
-    DatabaseConfig
+    DatabaseConfig,
+    CacheConfig,
+    AnalyticsConfig,
+    SchedulerConfig
 ):  
     class Config:
         case_sensitive = True
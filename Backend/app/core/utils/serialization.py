@@ -0,0 +1,67 @@
+# app/core/utils/serialization.py
+
+import logging
+from typing import Any, Generic, Iterable, List, Type, TypeVar
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core's Rust encoder.
+    
+    Handles datetime, Decimal, UUID and pydantic models natively, and passes
+    already-encoded ``bytes`` content through untouched so cached or
+    pre-serialized bodies are sent without re-encoding.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return pydantic_core.to_json(content)
+
+class TrustedModelSerializer(Generic[ModelT]):
+    """
+    Encode trusted database rows to JSON bytes through a response schema.
+    
+    Rows (ORM objects, ``Row``s or NamedTuples) are turned into schema
+    instances with ``model_construct``, which skips validation, and dumped
+    with a cached ``TypeAdapter``. Only fields declared on the schema are
+    read from the row, so columns such as ``password`` are never emitted.
+    
+    Only use this for data read back from our own database; request input
+    must still go through normal validation.
+    """
+    
+    def __init__(self, schema: Type[ModelT]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        self._one = TypeAdapter(schema)
+        self._many = TypeAdapter(List[schema])
+    
+    def construct(self, row: Any) -> ModelT:
+        """Build a schema instance from a row without validating it."""
+        if isinstance(row, tuple) and getattr(row, "_fields", None) == self.fields:
+            # Projection rows already hold exactly the schema's fields
+            return self.schema.model_construct(**row._asdict())
+        values = {}
+        for name in self.fields:
+            value = getattr(row, name, _MISSING)
+            if value is not _MISSING:
+                values[name] = value
+        return self.schema.model_construct(**values)
+    
+    def dump_one(self, row: Any) -> bytes:
+        """Encode a single row to JSON bytes."""
+        return self._one.dump_json(self.construct(row))
+    
+    def dump_many(self, rows: Iterable[Any]) -> bytes:
+        """Encode a sequence of rows to a JSON array."""
+        return self._many.dump_json([self.construct(row) for row in rows])
+
+_MISSING = object()
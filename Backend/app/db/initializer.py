@@ -8,6 +8,7 @@ from sqlalchemy import inspect, text, MetaData
 from sqlalchemy.exc import OperationalError
 from app.core.config.settings import get_settings
 from app.db.schema_sync import SchemaSynchronizer
+from app.db.partitions import maintain_partitions, get_partition_names
 
 settings = get_settings()
 
@@ -105,7 +106,9 @@ def validate_models_against_db(engine):
     """Validate that all models match the database schema"""
     try:
         inspector = inspect(engine)
-        tables_in_db = set(inspector.get_table_names())
+        with engine.connect() as conn:
+            partition_tables = get_partition_names(conn)
+        tables_in_db = set(inspector.get_table_names()) - partition_tables
         
         models = get_all_models()
         if not models:
@@ -140,6 +143,9 @@ def create_missing_tables(engine):
         # Create all tables that don't exist yet
         Base.metadata.create_all(bind=engine)
         
+        # Partitioned tables cannot take rows until their partitions exist
+        maintain_partitions(engine, Base.metadata.tables.values(), months_ahead=settings.DB_PARTITION_MONTHS_AHEAD)
+        
         # Verify if tables were created
         inspector = inspect(engine)
         tables_after = set(inspector.get_table_names())
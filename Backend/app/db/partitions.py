@@ -0,0 +1,281 @@
+# app/db/partitions.py
+"""
+Declarative range partitioning helpers.
+
+Models opt in with ``postgresql_partition_by`` in ``__table_args__``; every
+such table is split into one partition per calendar month of its partition
+key, named ``<table>_pYYYY_MM``, plus a ``<table>_default`` partition that
+catches rows outside the created ranges. A maintenance run keeps partitions
+created ahead of time, so the default partition normally stays empty, and
+can detach months older than the retention window for cheap archiving.
+``PartitionMaintainer`` repeats the run inside each API process, so a
+long-running deployment never runs out of months.
+
+Rows that did land in the default partition (maintenance not run for a
+while) are moved into their month when it is created; Postgres refuses to
+create a partition whose range the default partition already holds rows for.
+"""
+import asyncio
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+def get_partition_key(table) -> Optional[str]:
+    """Get a table's ``postgresql_partition_by`` clause, e.g. ``RANGE (created_at)``, if any."""
+    return table.dialect_options["postgresql"].get("partition_by")
+
+def get_partitioned_tables(tables: Iterable) -> Dict[str, str]:
+    """Map table name -> partition clause for every partitioned table."""
+    partitioned = {}
+    for table in tables:
+        partition_by = get_partition_key(table)
+        if partition_by:
+            partitioned[table.name] = partition_by
+    return partitioned
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month ``months`` after ``month``."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month.year:04d}_{month.month:02d}"
+
+def default_partition_name(table_name: str) -> str:
+    return f"{table_name}_default"
+
+def monthly_ranges(start: date, months: int) -> List[Tuple[date, date]]:
+    """``months`` consecutive [first day, first day of next month) ranges from ``start``'s month."""
+    first = date(start.year, start.month, 1)
+    return [(add_months(first, i), add_months(first, i + 1)) for i in range(months)]
+
+def get_partition_names(conn) -> set:
+    """Names of every table in the current schema that is a partition of another."""
+    result = conn.execute(text("""
+        SELECT c.relname FROM pg_class c
+        WHERE c.relispartition AND c.relnamespace = current_schema()::regnamespace
+    """))
+    return {row[0] for row in result}
+
+def is_partitioned(conn, table_name: str) -> bool:
+    """Whether a table exists and is a partitioned (parent) table."""
+    result = conn.execute(text("""
+        SELECT c.relkind = 'p' FROM pg_class c
+        WHERE c.relname = :table_name AND c.relnamespace = current_schema()::regnamespace
+    """), {"table_name": table_name})
+    return bool(result.scalar())
+
+def list_partitions(conn, table_name: str) -> Dict[str, str]:
+    """Map partition name -> bound expression for a partitioned table."""
+    result = conn.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = :table_name AND parent.relnamespace = current_schema()::regnamespace
+    """), {"table_name": table_name})
+    return {row[0]: row[1] for row in result}
+
+def ensure_monthly_partitions(conn, table_name: str, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """
+    Create the default partition and monthly partitions from this month to ``months_ahead`` months ahead.
+
+    Args:
+        conn: Connection inside a transaction
+        table_name: Partitioned table
+        months_ahead: Number of future months to create beyond the current one
+        today: Reference date (defaults to today)
+
+    Returns:
+        Names of the partitions created
+    """
+    existing = list_partitions(conn, table_name)
+    created = []
+
+    default_name = default_partition_name(table_name)
+    if default_name not in existing:
+        conn.execute(text(f"CREATE TABLE {default_name} PARTITION OF {table_name} DEFAULT"))
+        created.append(default_name)
+
+    for start, end in monthly_ranges(today or date.today(), months_ahead + 1):
+        name = month_partition_name(table_name, start)
+        if name in existing:
+            continue
+        # One savepoint per month: a month that fails is retried on the next
+        # run without undoing the others
+        try:
+            with conn.begin_nested():
+                _create_month_partition(conn, table_name, name, start, end)
+        except Exception as e:
+            logger.error(f"Could not create partition {name} of {table_name}; rows for that month go to {default_name}: {e}")
+            continue
+        created.append(name)
+
+    if created:
+        logger.info(f"Created partitions of {table_name}: {created}")
+    return created
+
+def _create_month_partition(conn, table_name: str, name: str, start: date, end: date) -> None:
+    """Create a month's partition, moving any rows for it out of the default partition."""
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    default_name = default_partition_name(table_name)
+    key = conn.execute(text("""
+        SELECT a.attname FROM pg_partitioned_table p
+        JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+        WHERE p.partrelid = CAST(:table_name AS regclass)
+    """), {"table_name": table_name}).scalar_one()
+    in_range = f"{key} >= '{start.isoformat()}' AND {key} < '{end.isoformat()}'"
+
+    stranded = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default_name} WHERE {in_range})")).scalar()
+    if not stranded:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table_name} FOR VALUES {bounds}"))
+        return
+
+    # Build the partition as a plain table, move the month's rows into it,
+    # then attach it (attaching creates its indexes and constraints)
+    columns = ", ".join(conn.execute(text("""
+        SELECT quote_ident(attname) FROM pg_attribute
+        WHERE attrelid = CAST(:table_name AS regclass) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {"table_name": table_name}).scalars())
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(f"""
+        WITH moved AS (DELETE FROM {default_name} WHERE {in_range} RETURNING {columns})
+        INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+    """)).rowcount
+    conn.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.warning(f"Moved {moved} rows of {table_name} from {default_name} into new partition {name}")
+
+def detach_partitions_before(conn, table_name: str, cutoff: date) -> List[str]:
+    """
+    Detach monthly partitions whose whole range is before ``cutoff``.
+
+    Detached partitions stay as plain tables, ready to be archived or dropped.
+
+    Returns:
+        Names of the partitions detached
+    """
+    prefix = f"{table_name}_p"
+    detached = []
+    for name in sorted(list_partitions(conn, table_name)):
+        if not name.startswith(prefix):
+            continue
+        try:
+            year, month = (int(part) for part in name[len(prefix):].split("_"))
+        except ValueError:
+            continue
+        if add_months(date(year, month, 1), 1) <= cutoff:
+            conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+            detached.append(name)
+
+    if detached:
+        logger.info(f"Detached partitions of {table_name}: {detached}")
+    return detached
+
+def maintain_partitions(engine, tables: Iterable, months_ahead: int, retention_months: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    Run partition maintenance for every partitioned table.
+
+    Args:
+        engine: SQLAlchemy engine
+        tables: Candidate tables (e.g. ``Base.metadata.tables.values()``)
+        months_ahead: Future months to keep created
+        retention_months: If set, detach months older than this many months
+
+    Returns:
+        Mapping of table name -> partitions created or detached
+    """
+    changes = {}
+    for table_name in get_partitioned_tables(tables):
+        with engine.begin() as conn:
+            # Serialize maintenance of a table across processes
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:lock_name))"),
+                {"lock_name": f"partition_maintenance:{table_name}"}
+            )
+            if not is_partitioned(conn, table_name):
+                logger.warning(f"Table {table_name} is not partitioned in the database; skipping partition maintenance")
+                continue
+            changed = ensure_monthly_partitions(conn, table_name, months_ahead)
+            if retention_months is not None:
+                cutoff = add_months(date.today().replace(day=1), -retention_months)
+                changed += detach_partitions_before(conn, table_name, cutoff)
+            changes[table_name] = changed
+    return changes
+
+def run_maintenance() -> Dict[str, List[str]]:
+    """Maintenance job entry point, configured from application settings."""
+    from app.db.database import engine
+    from app.models import Base
+
+    settings = get_settings()
+    return maintain_partitions(
+        engine,
+        Base.metadata.tables.values(),
+        months_ahead=settings.DB_PARTITION_MONTHS_AHEAD,
+        retention_months=settings.DB_PARTITION_RETENTION_MONTHS
+    )
+
+class PartitionMaintainer:
+    """
+    Runs partition maintenance on an asyncio task, every ``interval_seconds``.
+
+    Maintenance uses the synchronous engine, so each run happens in a worker
+    thread. The first run waits one interval, since startup already
+    creates the partitions it needs.
+    """
+
+    def __init__(self, enabled: bool = True, interval_seconds: int = 21600):
+        self.enabled = enabled
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "PartitionMaintainer":
+        """Create a maintainer configured from application settings."""
+        return cls(
+            enabled=settings.PARTITION_MAINTENANCE_ENABLED,
+            interval_seconds=settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS
+        )
+
+    async def run_once(self) -> Dict[str, List[str]]:
+        """Run maintenance once in a worker thread."""
+        return await asyncio.to_thread(run_maintenance)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start the maintenance task if enabled and not running."""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Partition maintenance scheduled every {self.interval_seconds}s")
+
+    async def stop(self) -> None:
+        """Stop the maintenance task; a run in flight finishes in its thread."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+# Global maintainer instance
+partition_maintainer = PartitionMaintainer.from_settings(get_settings())
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_maintenance()
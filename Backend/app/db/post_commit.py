@@ -0,0 +1,51 @@
+# app/db/post_commit.py
+"""
+Side effects that must only happen once a write is durably committed.
+
+Writers hand rows to the analytics sink and invalidate caches right after
+``commit()``. That is only safe when the commit is the real one: a session
+joined to an outer transaction with ``join_transaction_mode="create_savepoint"``
+(as ``idempotency`` runs its handlers) commits a savepoint, and the outer
+transaction may still roll back. Such a session is opened with
+``info=deferred_info()``; ``after_commit`` then queues the effects, and the
+owner of the outer transaction runs them with ``run_deferred`` after its
+own commit succeeds (and drops them if it rolls back).
+"""
+import logging
+from typing import Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Session.info key of the callbacks waiting for the outer transaction's commit
+DEFERRED_KEY = "after_commit"
+
+def deferred_info() -> Dict[str, List[Callable[[], None]]]:
+    """``info`` for a session whose commits only release a savepoint."""
+    return {DEFERRED_KEY: []}
+
+def after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run ``callback`` once the session's last commit is durable.
+
+    Call right after ``commit()``: the callback runs immediately, or is queued
+    when the session's commits are nested in an outer transaction.
+    """
+    deferred = db.info.get(DEFERRED_KEY)
+    if deferred is None:
+        callback()
+    else:
+        deferred.append(callback)
+
+def run_deferred(db: AsyncSession) -> None:
+    """Run the callbacks queued on a session, after the outer transaction committed."""
+    callbacks = db.info.get(DEFERRED_KEY) or []
+    while callbacks:
+        callback = callbacks.pop(0)
+        try:
+            callback()
+        except Exception as e:
+            # The write is committed; a failed side effect must not fail the request
+            logger.error(f"Post-commit callback failed: {str(e)}")
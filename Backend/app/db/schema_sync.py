@@ -5,6 +5,8 @@ from sqlalchemy.schema import DropTable, DropConstraint
 from sqlalchemy.dialects.postgresql import BIGINT, VARCHAR, TEXT, BOOLEAN, INTEGER, TIMESTAMP, SMALLINT
 from sqlalchemy.exc import OperationalError, ProgrammingError
 
+from app.db import partitions
+
 logger = logging.getLogger(__name__)
 
 class SchemaSynchronizer:
@@ -38,8 +40,21 @@ class SchemaSynchronizer:
         }
     
     def get_db_tables(self):
-        """Get all tables in the database"""
-        return set(self.inspector.get_table_names())
+        """Get all tables in the database, excluding partitions of partitioned tables"""
+        return set(self.inspector.get_table_names()) - self.get_partition_tables()
+    
+    def get_partition_tables(self):
+        """Get the tables that are partitions of another table (managed by partition maintenance)"""
+        try:
+            with self.engine.connect() as conn:
+                return partitions.get_partition_names(conn)
+        except Exception as e:
+            logger.error(f"Error getting partition tables: {e}")
+            return set()
+    
+    def get_partitioned_models(self):
+        """Get model tables declared with postgresql_partition_by"""
+        return partitions.get_partitioned_tables(model.__table__ for model in self.models)
     
     def get_model_tables(self):
         """Get all table names defined in the models"""
@@ -57,6 +72,22 @@ class SchemaSynchronizer:
             logger.error(f"Error getting columns for table {table_name}: {e}")
             return {}
     
+    def get_table_indexes(self, table_name):
+        """Get the names of all indexes on a database table"""
+        try:
+            if table_name in self.get_partitioned_models():
+                # pg_indexes also lists indexes defined on a partitioned parent
+                with self.engine.connect() as conn:
+                    result = conn.execute(
+                        text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table_name"),
+                        {"table_name": table_name}
+                    )
+                    return {row[0] for row in result}
+            return {i['name'] for i in self.inspector.get_indexes(table_name)}
+        except Exception as e:
+            logger.error(f"Error getting indexes for table {table_name}: {e}")
+            return set()
+    
     def get_model_columns(self, model):
         """Get all columns defined in a model"""
         return {c.name: c for c in model.__table__.columns}
@@ -151,6 +182,8 @@ class SchemaSynchronizer:
                 continue
 
             self._synchronize_table_columns(model)
+            self._synchronize_table_indexes(model)
+            self._synchronize_table_partitions(model)
         
         if extra_tables and self.settings.DB_STRICT_MODE:
             logger.warning(f"Extra tables found in database: {extra_tables}")
@@ -161,6 +194,11 @@ class SchemaSynchronizer:
         """Create tables that exist in models but not in the database"""
         from app.models import Base
         
+        # Partitioned tables need their full definition (partition clause,
+        # composite primary key), so they are created from the model table
+        partitioned_tables = set(missing_tables) & set(self.get_partitioned_models())
+        missing_tables = set(missing_tables) - partitioned_tables
+        
         # First attempt with standard SQLAlchemy approach
         try:
             metadata = MetaData()
@@ -182,6 +220,17 @@ class SchemaSynchronizer:
             # This is especially important for autoincrement columns with asyncpg
             for table_name in missing_tables:
                 self._create_table_with_raw_sql(table_name)
+        
+        for table_name in partitioned_tables:
+            model = next((m for m in self.models if m.__tablename__ == table_name), None)
+            try:
+                with self.engine.begin() as conn:
+                    model.__table__.create(conn)
+                    partitions.ensure_monthly_partitions(conn, table_name, self.settings.DB_PARTITION_MONTHS_AHEAD)
+                logger.info(f"Successfully created partitioned table {table_name}")
+            except Exception as e:
+                logger.error(f"Error creating partitioned table {table_name}: {e}")
+                logger.error(traceback.format_exc())
     
     def _create_table_with_raw_sql(self, table_name):
         """Create a table using raw SQL statements"""
@@ -225,6 +274,9 @@ class SchemaSynchronizer:
             # Create table
             with self.engine.begin() as conn:
                 create_table_sql = f"CREATE TABLE {table_name} ({', '.join(columns)})"
+                partition_by = partitions.get_partition_key(model.__table__)
+                if partition_by:
+                    create_table_sql += f" PARTITION BY {partition_by}"
                 conn.execute(text(create_table_sql))
                 
                 # Set up sequences for autoincrement columns
@@ -325,6 +377,63 @@ class SchemaSynchronizer:
         if modified_columns:
             self._modify_columns(table_name, modified_columns)
     
+    def _synchronize_table_indexes(self, model):
+        """
+        Create indexes declared on the model that are missing from the database
+        
+        Args:
+            model: SQLAlchemy model class
+        """
+        table_name = model.__tablename__
+        db_indexes = self.get_table_indexes(table_name)
+        missing_indexes = [index for index in model.__table__.indexes if index.name not in db_indexes]
+        
+        if not missing_indexes:
+            return
+        
+        if not self.settings.DB_AUTO_MIGRATE:
+            logger.warning(f"Missing indexes in {table_name}: {[index.name for index in missing_indexes]}")
+            return
+        
+        for index in missing_indexes:
+            try:
+                with self.engine.begin() as conn:
+                    index.create(conn)
+                logger.info(f"Created index {index.name} on table {table_name}")
+            except Exception as e:
+                logger.error(f"Error creating index {index.name} on table {table_name}: {e}")
+    
+    def _synchronize_table_partitions(self, model):
+        """
+        Keep monthly partitions created ahead for a partitioned model
+        
+        Partitions themselves are never compared with models; they inherit
+        columns and indexes from the parent table. An existing plain table
+        is not converted automatically, since that requires rewriting it.
+        
+        Args:
+            model: SQLAlchemy model class
+        """
+        table_name = model.__tablename__
+        if table_name not in self.get_partitioned_models():
+            return
+        
+        try:
+            with self.engine.begin() as conn:
+                if not partitions.is_partitioned(conn, table_name):
+                    logger.warning(
+                        f"Table {table_name} is declared partitioned but is a plain table in the database; "
+                        f"it must be migrated manually"
+                    )
+                    return
+                
+                if not self.settings.DB_AUTO_MIGRATE:
+                    return
+                
+                partitions.ensure_monthly_partitions(conn, table_name, self.settings.DB_PARTITION_MONTHS_AHEAD)
+        except Exception as e:
+            logger.error(f"Error synchronizing partitions of table {table_name}: {e}")
+    
     def _add_columns(self, table_name, columns):
         """
         Add columns to an existing table
@@ -597,6 +706,7 @@ class SchemaSynchronizer:
             'DOUBLE_PRECISION': 'DOUBLE PRECISION',
             'REAL': 'REAL',
             'BYTEA': 'BYTEA',
+            'BLOB': 'BYTEA',
             'UUID': 'UUID',
             'JSON': 'JSON',
             'JSONB': 'JSONB',
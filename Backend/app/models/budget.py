@@ -0,0 +1,28 @@
+# app/models/budget.py
+from sqlalchemy import Column, Date, DateTime, ForeignKey, BigInteger, Integer, SmallInteger, Numeric, String, Index
+from app.db.database import Base
+from app.models.base import BaseModel
+
+class Budget(Base, BaseModel):
+    __tablename__ = "budgets"
+    
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    # Transaction category the budget covers; the empty string is the overall budget
+    category = Column(String(50), nullable=False, default="")
+    amount_limit = Column(Numeric(12, 2), nullable=False)
+    
+    # Consumption in the current period (UTC calendar month starting at period_start),
+    # maintained incrementally by the ledger write path
+    period_start = Column(Date, nullable=False)
+    spent = Column(Numeric(14, 2), nullable=False, default=0.00)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    # Highest alert threshold (percent of amount_limit) reached this period, 0 if none
+    alert_level = Column(SmallInteger, nullable=False, default=0)
+    alerted_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('ux_budgets_user_id_category', 'user_id', 'category', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<Budget(id={self.id}, user_id={self.user_id}, category={self.category!r}, spent={self.spent}/{self.amount_limit})>"
@@ -13,6 +13,7 @@ class Group(Base, BaseModel):
     # Relationships
     admin = relationship("User", back_populates="admin_of_groups")
     members = relationship("GroupMember", back_populates="group")
+    transactions = relationship("Transaction", back_populates="group")
     
     def __repr__(self):
         return f"<Group(id={self.id}, name='{self.group_name}')>"
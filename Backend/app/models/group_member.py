@@ -1,5 +1,5 @@
 # app/models/group_member.py
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -17,6 +17,11 @@ class GroupMember(Base,BaseModel):
     group = relationship("Group", back_populates="members")
     user = relationship("User", back_populates="group_memberships")
     
+    # One membership row per (group, user), the conflict target for membership upserts
+    __table_args__ = (
+        Index('ux_group_members_group_id_user_id', 'group_id', 'user_id', unique=True),
+    )
+    
     def __repr__(self):
         return f"<GroupMember(group_id={self.group_id}, user_id={self.user_id})>"
 
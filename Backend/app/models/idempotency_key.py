@@ -0,0 +1,21 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, String, SmallInteger, LargeBinary
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # SHA-256 of the request (method, path and body) the key was first used with
+    request_hash = Column(LargeBinary(32), nullable=False)
+    # Stored in the same transaction as the write, so a committed key always has its response
+    status_code = Column(SmallInteger, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Response TTL; an expired key may be reused
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.key}, status_code={self.status_code})>"
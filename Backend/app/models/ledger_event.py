@@ -0,0 +1,29 @@
+# app/models/ledger_event.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, Numeric, String, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class LedgerEvent(Base):
+    __tablename__ = "ledger_events"
+    
+    # Append-only: rows are never updated or deleted
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # No foreign key: transactions is partitioned, so its primary key is (id, created_at)
+    transaction_id = Column(BigInteger, nullable=False, index=True)
+    event_type = Column(String(32), nullable=False)
+    payer_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    payee_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    # Signed change to the outstanding amount (payer's receivable, payee's borrowing)
+    amount = Column(Numeric(12, 2), nullable=False, default=0.00)
+    # Fields changed by the mutation
+    changes = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    
+    __table_args__ = (
+        Index('ix_ledger_events_payer_id_id', 'payer_id', 'id'),
+        Index('ix_ledger_events_payee_id_id', 'payee_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f"<LedgerEvent(id={self.id}, transaction_id={self.transaction_id}, event_type={self.event_type}, amount={self.amount})>"
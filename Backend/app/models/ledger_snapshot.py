@@ -0,0 +1,19 @@
+# app/models/ledger_snapshot.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, Numeric
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class LedgerSnapshot(Base):
+    __tablename__ = "ledger_snapshots"
+    
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    # Balances include every one of the user's events up to and including this ID
+    last_event_id = Column(BigInteger, primary_key=True)
+    # created_at of the newest event included
+    as_of = Column(DateTime(timezone=True), nullable=False)
+    total_borrowings = Column(Numeric(12, 2), nullable=False, default=0.00)
+    total_receivables = Column(Numeric(12, 2), nullable=False, default=0.00)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<LedgerSnapshot(user_id={self.user_id}, last_event_id={self.last_event_id}, as_of={self.as_of})>"
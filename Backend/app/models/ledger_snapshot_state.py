@@ -0,0 +1,22 @@
+# app/models/ledger_snapshot_state.py
+from sqlalchemy import Column, BigInteger, DateTime, SmallInteger, CheckConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class LedgerSnapshotState(Base):
+    __tablename__ = "ledger_snapshot_state"
+
+    # Single row
+    id = Column(SmallInteger, primary_key=True, default=1)
+    # Last event ID allocated when pending_at was read; once every transaction open
+    # at pending_at has ended, no event up to this ID can still commit
+    pending_event_id = Column(BigInteger, nullable=True)
+    pending_at = Column(DateTime(timezone=True), nullable=True)
+    last_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint('id = 1', name='ck_ledger_snapshot_state_single_row'),
+    )
+
+    def __repr__(self):
+        return f"<LedgerSnapshotState(pending_event_id={self.pending_event_id}, pending_at={self.pending_at})>"
@@ -0,0 +1,22 @@
+# app/models/pair_balance.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, Numeric, CheckConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class PairBalance(Base):
+    __tablename__ = "pair_balances"
+    
+    # Each unordered pair of users is stored once, with the smaller ID first
+    min_user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    max_user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True, index=True)
+    # Net outstanding amount max_user owes min_user (negative when min_user owes max_user)
+    balance = Column(Numeric(12, 2), nullable=False, default=0.00)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        CheckConstraint('min_user_id < max_user_id', name='ck_pair_balances_ordered'),
+    )
+    
+    def __repr__(self):
+        return f"<PairBalance(min_user_id={self.min_user_id}, max_user_id={self.max_user_id}, balance={self.balance})>"
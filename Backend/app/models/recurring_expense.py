@@ -0,0 +1,39 @@
+# app/models/recurring_expense.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, Integer, Numeric, String, Text, Index, CheckConstraint
+from app.db.database import Base
+from app.models.base import BaseModel
+
+class RecurringExpense(Base, BaseModel):
+    __tablename__ = "recurring_expenses"
+    
+    # User who set up the schedule (the payer or the payee)
+    created_by = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    
+    # Template of the transactions the schedule materializes
+    payer_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
+    payee_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
+    group_id = Column(BigInteger, ForeignKey("groups.id"), nullable=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    description = Column(Text, nullable=False)
+    category = Column(String(50), nullable=True)
+    
+    # Occurrence n is due at start_at + n * interval_count intervals (months keep start_at's day,
+    # clamped to the month's length); none is due after end_at
+    interval = Column(String(10), nullable=False)
+    interval_count = Column(Integer, nullable=False, default=1)
+    start_at = Column(DateTime(timezone=True), nullable=False)
+    end_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Occurrences materialized so far, and when the next one is due.
+    # next_due_at is NULL once finished or deleted, keeping those rows out of the due scan
+    occurrences = Column(Integer, nullable=False, default=0)
+    next_due_at = Column(DateTime(timezone=True), nullable=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('ix_recurring_expenses_next_due_at', 'next_due_at'),
+        CheckConstraint('payer_id <> payee_id', name='ck_recurring_expenses_distinct_parties'),
+    )
+    
+    def __repr__(self):
+        return f"<RecurringExpense(id={self.id}, amount={self.amount}, interval={self.interval_count} {self.interval}, next_due_at={self.next_due_at})>"
@@ -0,0 +1,16 @@
+# app/models/reminder_state.py
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger, Integer
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class ReminderState(Base):
+    __tablename__ = "reminder_states"
+    
+    # One row per user who has been sent a debt reminder digest
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    last_reminded_at = Column(DateTime(timezone=True), nullable=False)
+    reminders_sent = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ReminderState(user_id={self.user_id}, last_reminded_at={self.last_reminded_at}, sent={self.reminders_sent})>"
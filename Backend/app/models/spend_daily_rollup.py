@@ -0,0 +1,22 @@
+# app/models/spend_daily_rollup.py
+from sqlalchemy import Column, Date, DateTime, ForeignKey, BigInteger, Integer, Numeric
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class SpendDailyRollup(Base):
+    __tablename__ = "spend_daily_rollups"
+    
+    # One row per user, day and counterparty; per-user totals sum over counterparties
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    # UTC calendar day of the transactions' created_at
+    day = Column(Date, primary_key=True)
+    counterparty_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    # Active transactions the user paid (as payer) and was paid for (as payee)
+    paid_amount = Column(Numeric(14, 2), nullable=False, default=0.00)
+    paid_count = Column(Integer, nullable=False, default=0)
+    borrowed_amount = Column(Numeric(14, 2), nullable=False, default=0.00)
+    borrowed_count = Column(Integer, nullable=False, default=0)
+    last_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<SpendDailyRollup(user_id={self.user_id}, day={self.day}, counterparty_id={self.counterparty_id})>"
@@ -0,0 +1,20 @@
+# app/models/spend_rollup_state.py
+from sqlalchemy import Column, Date, DateTime, SmallInteger, CheckConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class SpendRollupState(Base):
+    __tablename__ = "spend_rollup_state"
+    
+    # Single row
+    id = Column(SmallInteger, primary_key=True, default=1)
+    # Spend rollups cover every day before this one; later days are read live
+    rolled_up_until = Column(Date, nullable=True)
+    last_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        CheckConstraint('id = 1', name='ck_spend_rollup_state_single_row'),
+    )
+    
+    def __repr__(self):
+        return f"<SpendRollupState(rolled_up_until={self.rolled_up_until})>"
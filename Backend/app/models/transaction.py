@@ -1,6 +1,7 @@
 # app/models/transaction.py
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, Numeric, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, Numeric, String, Text, Index, PrimaryKeyConstraint, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.db.database import Base
 from app.models.base import BaseModel
 
@@ -9,14 +10,36 @@ class Transaction(Base, BaseModel):
 
     payer_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
     payee_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
+    group_id = Column(BigInteger, ForeignKey("groups.id"), nullable=True, index=True)
     transaction_amount = Column(Numeric(12, 2), nullable=False)
     description = Column(Text, nullable=False)
+    # Free-form spending category (e.g. "Food & Dining"), matched by budgets
+    category = Column(String(50), nullable=True)
     is_settled = Column(Boolean, default=False, index=True)
     is_group_transaction = Column(Boolean, default=False, index=True)
+    # Partition key, so it is part of the primary key
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
     
     # Relationships
     payer = relationship("User", foreign_keys=[payer_id], back_populates="payments_made")
     payee = relationship("User", foreign_keys=[payee_id], back_populates="payments_received")
+    group = relationship("Group", back_populates="transactions")
+    
+    # Keyset pagination over a user's history, one index per side of the transaction.
+    # The included columns let top-k selection over a time window run as an index-only scan.
+    # The partial index holds only unsettled rows, for the reminder pipeline's scan of debts by debtor.
+    # The table is range partitioned by month of created_at (see app/db/partitions.py)
+    __table_args__ = (
+        PrimaryKeyConstraint('id', 'created_at'),
+        Index('ix_transactions_payer_id_created_at_id_covering', 'payer_id', 'created_at', 'id',
+              postgresql_include=['transaction_amount', 'is_active']),
+        Index('ix_transactions_payee_id_created_at_id_covering', 'payee_id', 'created_at', 'id',
+              postgresql_include=['transaction_amount', 'is_active']),
+        Index('ix_transactions_unsettled_payee_id_created_at', 'payee_id', 'created_at',
+              postgresql_include=['payer_id'],
+              postgresql_where=text('is_active AND NOT is_settled')),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
     
     def __repr__(self):
         return f"<Transaction(id={self.id}, amount={self.transaction_amount}, settled={self.is_settled})>"
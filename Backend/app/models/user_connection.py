@@ -1,5 +1,5 @@
 #app/models/user_connection.py
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -15,6 +15,13 @@ class UserConnection(Base, BaseModel):
     user = relationship("User", foreign_keys=[user_id], back_populates="connections")
     connected_user = relationship("User", foreign_keys=[connected_user_id], back_populates="connected_to")
     
+    # One row per directed pair, the conflict target for connection upserts;
+    # last_updated_at serves the connection graph's incremental refresh
+    __table_args__ = (
+        Index('ux_user_connections_user_id_connected_user_id', 'user_id', 'connected_user_id', unique=True),
+        Index('ix_user_connections_last_updated_at', 'last_updated_at'),
+    )
+    
     def __repr__(self):
         return f"<UserConnection(user_id={self.user_id}, connected_user_id={self.connected_user_id})>"
 
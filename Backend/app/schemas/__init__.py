@@ -1,9 +1,17 @@
 # app/schemas/__init__.py
 from app.schemas.user import User, UserCreate, UserUpdate, UserInDB
-from app.schemas.user_connection import UserConnectionCreate, UserConnectionUpdate, UserConnectionInDB
-from app.schemas.transaction import Transaction, TransactionCreate, TransactionUpdate, TransactionInDB
-from app.schemas.group import Group, GroupCreate, GroupUpdate, GroupInDB
-from app.schemas.group_member import GroupMemberCreate, GroupMemberUpdate, GroupMemberInDB
+from app.schemas.user_connection import UserConnectionCreate, UserConnectionAdd, UserConnectionUpdate, UserConnectionInDB, MutualConnections, ConnectionSuggestion
+from app.schemas.transaction import Transaction, TransactionCreate, TransactionUpdate, TransactionInDB, TransactionBulkImportResult
+from app.schemas.group import Group, GroupCreate, GroupCreateRequest, GroupUpdate, GroupInDB
+from app.schemas.group_member import GroupMemberCreate, GroupMemberAdd, GroupMemberBatchRequest, GroupMemberBatchResult, GroupMemberUpdate, GroupMemberInDB
 from app.schemas.transaction_summary import TransactionSummary, TransactionSummaryCreate, TransactionSummaryUpdate, TransactionSummaryInDB
 from app.schemas.user_session import UserSession, UserSessionCreate, UserSessionUpdate, UserSessionInDB
-from app.schemas.social_auth import SocialAuth, SocialAuthCreate, SocialAuthUpdate, SocialAuthInDB
\ No newline at end of file
+from app.schemas.social_auth import SocialAuth, SocialAuthCreate, SocialAuthUpdate, SocialAuthInDB
+from app.schemas.settlement import MemberBalance, SettlementTransfer, SettlementPlan
+from app.schemas.pair_balance import CounterpartyBalance
+from app.schemas.ledger import BalanceAtTime
+from app.schemas.analytics import SpendGranularity, SpendBucket, SpendSeries, CounterpartySpend
+from app.schemas.dashboard import Dashboard, SpendAnalyzer, GroupSpend, MonthlyBudget, ChartPoint, ExpenseChart, DashboardTransaction, DebtsOwed
+from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetStatus
+from app.schemas.recurring_expense import RecurringInterval, RecurringExpenseCreate, RecurringExpenseUpdate, RecurringExpense
+from app.schemas.split import SplitParticipant, GroupExpenseCreate, SplitShare, GroupExpense
\ No newline at end of file
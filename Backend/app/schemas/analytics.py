@@ -0,0 +1,30 @@
+# app/schemas/analytics.py
+from typing import List, Literal, Optional
+from datetime import date
+from decimal import Decimal
+from pydantic import BaseModel
+
+SpendGranularity = Literal["day", "week", "month"]
+
+# Spend totals: what the user paid (as payer) and was paid for (as payee)
+class SpendTotalsBase(BaseModel):
+    paid_amount: Decimal
+    paid_count: int
+    borrowed_amount: Decimal
+    borrowed_count: int
+
+# Spend in one day, week or month starting on period_start
+class SpendBucket(SpendTotalsBase):
+    period_start: date
+
+# Spend over time; buckets without transactions are omitted
+class SpendSeries(BaseModel):
+    granularity: SpendGranularity
+    from_date: date
+    to_date: date
+    counterparty_id: Optional[int] = None
+    buckets: List[SpendBucket]
+
+# Spend with one counterparty over a date range
+class CounterpartySpend(SpendTotalsBase):
+    counterparty_id: int
@@ -0,0 +1,43 @@
+# app/schemas/budget.py
+from typing import Optional
+from datetime import date, datetime
+from decimal import Decimal
+from pydantic import BaseModel, validator
+
+from app.schemas.transaction import check_amount, normalize_category
+
+# Properties to receive on budget creation; no category means the overall budget
+class BudgetCreate(BaseModel):
+    category: Optional[str] = None
+    amount_limit: Decimal
+
+    @validator('category')
+    def category_must_be_valid(cls, v):
+        return normalize_category(v)
+
+    @validator('amount_limit')
+    def limit_must_be_valid(cls, v):
+        return check_amount(v, 'Budget limit')
+
+# Properties to receive on budget update
+class BudgetUpdate(BaseModel):
+    amount_limit: Decimal
+
+    @validator('amount_limit')
+    def limit_must_be_valid(cls, v):
+        return check_amount(v, 'Budget limit')
+
+# Properties to return to client: a budget and its consumption this month
+class BudgetStatus(BaseModel):
+    id: int
+    category: Optional[str] = None
+    amount_limit: Decimal
+    period_start: date
+    spent: Decimal
+    remaining: Decimal
+    transaction_count: int
+    percent_used: float
+    alert_level: int
+    alerted_at: Optional[datetime] = None
+    created_at: datetime
+    last_updated_at: datetime
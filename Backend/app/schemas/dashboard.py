@@ -0,0 +1,70 @@
+# app/schemas/dashboard.py
+from typing import List, Literal, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from pydantic import BaseModel
+
+from app.schemas.pair_balance import CounterpartyBalance
+
+# Amount the user paid within one group (None for direct transactions)
+class GroupSpend(BaseModel):
+    group_id: Optional[int] = None
+    amount: Decimal
+    percentage: float
+
+# Spend analyzer widget: what the user paid this month and over the last year
+class SpendAnalyzer(BaseModel):
+    month_total: Decimal
+    previous_month_total: Decimal
+    percent_change: Optional[float] = None
+    year_total: Decimal
+    month_by_group: List[GroupSpend]
+    year_by_group: List[GroupSpend]
+
+# Monthly budget widget: spending pace for the current month
+class MonthlyBudget(BaseModel):
+    month_start: date
+    spent: Decimal
+    days_elapsed: int
+    days_in_month: int
+    daily_average: Decimal
+    projected_total: Decimal
+
+# One point of an expense chart series
+class ChartPoint(BaseModel):
+    period: date
+    amount: Decimal
+
+# Expense chart widget: cumulative spend by day this month and spend by month
+class ExpenseChart(BaseModel):
+    daily_cumulative: List[ChartPoint]
+    monthly: List[ChartPoint]
+
+# A transaction as listed by the top expenses and recent transactions widgets
+class DashboardTransaction(BaseModel):
+    id: int
+    type: Literal["receivable", "borrowing"]
+    counterparty_id: int
+    group_id: Optional[int] = None
+    amount: Decimal
+    description: str
+    is_settled: bool
+    created_at: datetime
+
+# Debts owed widget: outstanding balances with counterparties
+class DebtsOwed(BaseModel):
+    total_owed: Decimal
+    total_receivable: Decimal
+    net_position: Decimal
+    owes: List[CounterpartyBalance]
+    owed_by: List[CounterpartyBalance]
+
+# Properties to return to client
+class Dashboard(BaseModel):
+    as_of: datetime
+    spend_analyzer: SpendAnalyzer
+    monthly_budget: MonthlyBudget
+    expense_chart: ExpenseChart
+    top_expenses: List[DashboardTransaction]
+    debts_owed: DebtsOwed
+    recent_transactions: List[DashboardTransaction]
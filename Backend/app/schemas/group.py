@@ -13,6 +13,10 @@ class GroupBase(BaseModel):
 class GroupCreate(GroupBase):
     pass
 
+# Properties to receive when a user creates a group (the creator becomes its admin)
+class GroupCreateRequest(BaseModel):
+    group_name: str
+
 # Properties to receive on group update
 class GroupUpdate(BaseModel):
     group_name: Optional[str] = None
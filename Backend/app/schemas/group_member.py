@@ -1,7 +1,7 @@
 # app/schemas/group_member.py
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 # Shared properties
 class GroupMemberBase(BaseModel):
@@ -13,6 +13,29 @@ class GroupMemberBase(BaseModel):
 class GroupMemberCreate(GroupMemberBase):
     pass
 
+# Properties to receive when adding a member through the API
+class GroupMemberAdd(BaseModel):
+    user_id: int
+
+# Properties to receive on a batch membership change
+class GroupMemberBatchRequest(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
+    @validator('add', 'remove')
+    def ids_must_be_unique(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError('User IDs must be unique')
+        return sorted(v)
+
+# Membership changes applied by a batch request
+class GroupMemberBatchResult(BaseModel):
+    group_id: int
+    added: List[int] = []
+    reactivated: List[int] = []
+    removed: List[int] = []
+    unchanged: List[int] = []
+
 # Properties to receive on group member update
 class GroupMemberUpdate(BaseModel):
     is_active: Optional[bool] = None
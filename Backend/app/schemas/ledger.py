@@ -0,0 +1,12 @@
+# app/schemas/ledger.py
+from datetime import datetime
+from decimal import Decimal
+from pydantic import BaseModel
+
+# A user's balances replayed from the ledger event log at a point in time
+class BalanceAtTime(BaseModel):
+    user_id: int
+    at: datetime
+    total_borrowings: Decimal = Decimal('0.00')
+    total_receivables: Decimal = Decimal('0.00')
+    total_amount: Decimal = Decimal('0.00')
@@ -0,0 +1,9 @@
+# app/schemas/pair_balance.py
+from decimal import Decimal
+from pydantic import BaseModel
+
+# Net balance with one counterparty, from the current user's point of view
+# (positive means the counterparty owes the current user)
+class CounterpartyBalance(BaseModel):
+    counterparty_id: int
+    balance: Decimal
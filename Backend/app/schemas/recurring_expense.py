@@ -0,0 +1,102 @@
+# app/schemas/recurring_expense.py
+from typing import Optional, Literal
+from datetime import datetime, timezone
+from decimal import Decimal
+from pydantic import BaseModel, Field, validator
+
+from app.schemas.transaction import check_amount, normalize_category
+
+RecurringInterval = Literal["daily", "weekly", "monthly", "yearly"]
+
+def as_utc(v: Optional[datetime]) -> Optional[datetime]:
+    """Take naive datetimes as UTC."""
+    if v is not None and v.tzinfo is None:
+        return v.replace(tzinfo=timezone.utc)
+    return v
+
+# Shared properties
+class RecurringExpenseBase(BaseModel):
+    payer_id: int
+    payee_id: int
+    group_id: Optional[int] = None
+    amount: Decimal
+    description: str
+    category: Optional[str] = None
+    interval: RecurringInterval = "monthly"
+    interval_count: int = Field(1, ge=1, le=366)
+    start_at: datetime
+    end_at: Optional[datetime] = None
+
+    @validator('start_at', 'end_at')
+    def times_must_be_aware(cls, v):
+        return as_utc(v)
+
+    @validator('amount')
+    def amount_must_be_valid(cls, v):
+        return check_amount(v, 'Amount')
+
+    @validator('category')
+    def category_must_be_valid(cls, v):
+        return normalize_category(v)
+
+    @validator('payee_id')
+    def parties_must_differ(cls, v, values):
+        if v == values.get('payer_id'):
+            raise ValueError('Payer and payee must be different users')
+        return v
+
+    @validator('end_at')
+    def end_must_follow_start(cls, v, values):
+        if v is not None and values.get('start_at') is not None and v < values['start_at']:
+            raise ValueError('end_at cannot be before start_at')
+        return v
+
+# Properties to receive on recurring expense creation
+class RecurringExpenseCreate(RecurringExpenseBase):
+    pass
+
+# Properties to receive on recurring expense update
+class RecurringExpenseUpdate(BaseModel):
+    # amount and description can be left out but not cleared; category and end_at can be cleared with null
+    amount: Optional[Decimal] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    end_at: Optional[datetime] = None
+
+    @validator('end_at')
+    def end_must_be_aware(cls, v):
+        return as_utc(v)
+
+    @validator('amount', pre=True)
+    def amount_cannot_be_null(cls, v):
+        if v is None:
+            raise ValueError('Amount cannot be null')
+        return v
+
+    @validator('description', pre=True)
+    def description_cannot_be_null(cls, v):
+        if v is None:
+            raise ValueError('Description cannot be null')
+        return v
+
+    @validator('amount')
+    def amount_must_be_valid(cls, v):
+        return check_amount(v, 'Amount')
+
+    @validator('category')
+    def category_must_be_valid(cls, v):
+        return normalize_category(v)
+
+# Properties to return to client
+class RecurringExpense(RecurringExpenseBase):
+    id: int
+    created_by: int
+    occurrences: int
+    next_due_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    is_active: bool
+    created_at: datetime
+    last_updated_at: datetime
+
+    class Config:
+        from_attributes = True
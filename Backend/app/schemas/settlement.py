@@ -0,0 +1,22 @@
+# app/schemas/settlement.py
+from typing import List
+from decimal import Decimal
+from pydantic import BaseModel
+
+# A member's net outstanding balance (positive means they are owed money)
+class MemberBalance(BaseModel):
+    user_id: int
+    net_balance: Decimal
+
+# A single payment that settles part of the group's debts
+class SettlementTransfer(BaseModel):
+    from_user_id: int
+    to_user_id: int
+    amount: Decimal
+
+# Properties to return to client
+class SettlementPlan(BaseModel):
+    group_id: int
+    balances: List[MemberBalance]
+    transfers: List[SettlementTransfer]
+    is_optimal: bool
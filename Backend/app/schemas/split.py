@@ -0,0 +1,53 @@
+# app/schemas/split.py
+from typing import Optional, List, Literal
+from decimal import Decimal
+from pydantic import BaseModel, validator
+
+from app.schemas.transaction import Transaction, check_amount, normalize_category
+
+SplitMode = Literal["equal", "shares", "percentage", "exact"]
+
+# One member taking part in a split; ``value`` is the member's share count,
+# percentage or exact amount depending on the split mode (unused for equal)
+class SplitParticipant(BaseModel):
+    user_id: int
+    value: Optional[Decimal] = None
+
+# Properties to receive on group expense creation
+class GroupExpenseCreate(BaseModel):
+    payer_id: int
+    total_amount: Decimal
+    description: str
+    category: Optional[str] = None
+    mode: SplitMode = "equal"
+    participants: List[SplitParticipant]
+
+    @validator('total_amount')
+    def amount_must_be_valid(cls, v):
+        return check_amount(v, 'Total amount')
+
+    @validator('category')
+    def category_must_be_valid(cls, v):
+        return normalize_category(v)
+
+    @validator('participants')
+    def participants_must_be_unique(cls, v):
+        if not v:
+            raise ValueError('At least one participant is required')
+        if len({participant.user_id for participant in v}) != len(v):
+            raise ValueError('Participants must be unique')
+        return v
+
+# A participant's computed share of the expense
+class SplitShare(BaseModel):
+    user_id: int
+    amount: Decimal
+
+# Result of splitting a group expense
+class GroupExpense(BaseModel):
+    group_id: int
+    payer_id: int
+    total_amount: Decimal
+    mode: SplitMode
+    shares: List[SplitShare]
+    transactions: List[Transaction]
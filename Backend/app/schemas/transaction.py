@@ -1,24 +1,55 @@
 # app/schemas/transaction.py
-from typing import Optional
+from typing import Optional, List, NamedTuple
 from datetime import datetime
 from decimal import Decimal
 from pydantic import BaseModel, validator
 
+from app.core.utils.serialization import TrustedModelSerializer
+
+CATEGORY_MAX_LENGTH = 50
+
+# Amount columns are NUMERIC(12, 2)
+CENTS = Decimal("0.01")
+MAX_AMOUNT = Decimal("9999999999.99")
+
+def normalize_category(v: Optional[str]) -> Optional[str]:
+    """Strip a category name; blank means uncategorized."""
+    if v is None:
+        return None
+    v = v.strip()
+    if len(v) > CATEGORY_MAX_LENGTH:
+        raise ValueError(f'Category cannot exceed {CATEGORY_MAX_LENGTH} characters')
+    return v or None
+
+def check_amount(v: Decimal, label: str) -> Decimal:
+    """Validate a positive amount that fits the NUMERIC(12, 2) columns, quantized to cents."""
+    if v <= 0:
+        raise ValueError(f'{label} must be positive')
+    if v > MAX_AMOUNT:
+        raise ValueError(f'{label} cannot exceed {MAX_AMOUNT}')
+    if v != v.quantize(CENTS):
+        raise ValueError(f'{label} cannot have more than 2 decimal places')
+    return v.quantize(CENTS)
+
 # Shared properties
 class TransactionBase(BaseModel):
     payer_id: int
     payee_id: int
+    group_id: Optional[int] = None
     transaction_amount: Decimal
     description: str
+    category: Optional[str] = None
     is_settled: bool = False
     is_group_transaction: bool = False
     is_active: bool = True
 
     @validator('transaction_amount')
-    def amount_must_be_positive(cls, v):
-        if v <= 0:
-            raise ValueError('Transaction amount must be positive')
-        return v
+    def amount_must_be_valid(cls, v):
+        return check_amount(v, 'Transaction amount')
+
+    @validator('category')
+    def category_must_be_valid(cls, v):
+        return normalize_category(v)
 
 # Properties to receive on transaction creation
 class TransactionCreate(TransactionBase):
@@ -45,4 +76,32 @@ class Transaction(TransactionInDBBase):
 
 # Properties stored in DB
 class TransactionInDB(TransactionInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+# Compact row projection holding exactly the columns of the Transaction response schema
+class TransactionRow(NamedTuple):
+    payer_id: int
+    payee_id: int
+    group_id: Optional[int]
+    transaction_amount: Decimal
+    description: str
+    category: Optional[str]
+    is_settled: bool
+    is_group_transaction: bool
+    is_active: bool
+    id: int
+    created_at: datetime
+    last_updated_at: datetime
+
+# A page of transaction history with an opaque cursor for the next page
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
+# Result of a bulk transaction import
+class TransactionBulkImportResult(BaseModel):
+    inserted: int
+    users_updated: int
+
+# Serializer for trusted DB rows returned to clients
+transaction_serializer = TrustedModelSerializer(Transaction)
@@ -1,9 +1,11 @@
 #app/schemas/user.py
-from typing import Optional, List
+from typing import Optional, List, NamedTuple
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, validator
 import re
 
+from app.core.utils.serialization import TrustedModelSerializer
+
 # Shared properties
 class UserBase(BaseModel):
     name: str
@@ -91,4 +93,28 @@ class User(UserInDBBase):
 
 # Properties stored in DB
 class UserInDB(UserInDBBase):
-    password: str
\ No newline at end of file
+    password: str
+
+# Compact row projection holding exactly the columns of the User response schema
+class UserProfileRow(NamedTuple):
+    name: str
+    other_name: Optional[str]
+    username: str
+    email: str
+    is_social_account: bool
+    mobile_number: str
+    is_password_random: bool
+    is_user_dummy: bool
+    is_user_verified: bool
+    is_mobile_verified: bool
+    is_private_user: bool
+    auth_provider: Optional[str]
+    is_active: bool
+    max_session: int
+    id: int
+    last_login: Optional[datetime]
+    created_at: datetime
+    last_updated_at: datetime
+
+# Serializer for trusted DB rows returned to clients
+user_serializer = TrustedModelSerializer(User)
@@ -1,5 +1,5 @@
 # app/schemas/user_connection.py
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -12,6 +12,10 @@ class UserConnectionCreate(UserConnectionBase):
     user_id: int
     connected_user_id: int
 
+# Properties to receive when the current user connects to someone
+class UserConnectionAdd(BaseModel):
+    connected_user_id: int
+
 # Properties to receive on user connection update
 class UserConnectionUpdate(UserConnectionBase):
     is_active: Optional[bool] = None
@@ -23,4 +27,15 @@ class UserConnectionInDB(UserConnectionBase):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Users connected to both the current user and another user
+class MutualConnections(BaseModel):
+    user_id: int
+    mutual_count: int
+    user_ids: List[int] = []
+
+# A suggested connection and how many connections it shares with the user
+class ConnectionSuggestion(BaseModel):
+    user_id: int
+    mutual_count: int
@@ -0,0 +1,633 @@
+"""
+Columnar analytics sink.
+
+Long-range analytics over ``transactions`` are scans, which the OLTP
+Postgres is a poor fit for. When ``ANALYTICS_SINK`` is set, every committed
+transaction write is also copied into a column store laid out for those
+scans: each transaction becomes two legs, one per party, keyed by
+``(user_id, created_at, transaction_id)``. Two stores implement the same
+interface:
+
+- ``ClickHouseSink``: a ``ReplacingMergeTree`` table versioned by
+  ``last_updated_at``, read with ``FINAL`` so only the newest version of a
+  leg is counted.
+- ``LocalSink``: an embedded SQLite file with the same key, upserting only
+  newer versions; for tests and single-node installs.
+
+Versions must follow commit order. ``ledger.update_transaction`` stamps
+``last_updated_at`` with ``clock_timestamp()`` while holding the row lock,
+not with ``now()``: a writer that started earlier but waited on the lock
+behind a later one commits after it, and must carry the later stamp.
+
+Writers call ``submit`` after their commit. Rows are buffered per
+transaction (later versions replace earlier ones) and written by a
+background task in micro-batches, every ``ANALYTICS_FLUSH_INTERVAL_MS`` or
+as soon as ``ANALYTICS_BATCH_SIZE`` rows are pending, so a write never
+waits on the sink. A failed batch is retried with backoff; past
+``ANALYTICS_MAX_PENDING`` the oldest rows are dropped, and the ``backfill``
+job re-copies history from Postgres (also used for the initial load).
+
+Spend queries spanning ``ANALYTICS_OFFLOAD_MIN_DAYS`` or more are answered
+by the sink, shorter ones by the spend rollups; if the sink fails, reads
+fall back to the rollups.
+"""
+import asyncio
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionRow
+from app.services import spend_rollup
+from app.services.spend_rollup import SpendTotals
+from app.services.settlement import to_cents, from_cents
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+LEGS_TABLE = "transaction_legs"
+SIDE_PAID = 1
+SIDE_BORROWED = 2
+
+UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MAX_RETRY_DELAY = 30.0
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time(), timezone.utc)
+
+def _legs(row: TransactionRow):
+    """The payer's and the payee's leg of a transaction, as (user_id, counterparty_id, side)."""
+    return ((row.payer_id, row.payee_id, SIDE_PAID), (row.payee_id, row.payer_id, SIDE_BORROWED))
+
+class AnalyticsSink(ABC):
+    """Interface of an analytics store holding the legs of every transaction."""
+
+    name = "none"
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Connect and create the legs table if needed."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release connections."""
+
+    @abstractmethod
+    async def insert(self, rows: Sequence[TransactionRow]) -> None:
+        """Write transactions; a row replaces any older version of the same transaction."""
+
+    @abstractmethod
+    async def spend_series(
+        self,
+        user_id: int,
+        granularity: str,
+        from_day: date,
+        to_day: date,
+        counterparty_id: Optional[int] = None
+    ) -> List[SpendTotals]:
+        """Same contract as ``spend_rollup.get_spend_series``."""
+
+    @abstractmethod
+    async def counterparty_spend(self, user_id: int, from_day: date, to_day: date) -> List[SpendTotals]:
+        """Same contract as ``spend_rollup.get_counterparty_spend``."""
+
+class LocalSink(AnalyticsSink):
+    """
+    SQLite-backed sink.
+
+    The connection lives on a single worker thread, which serializes access
+    to it; the file is in WAL mode so several processes on one node can
+    share it. Amounts are stored as integer cents and times as epoch
+    microseconds, so sums are exact.
+    """
+
+    name = "local"
+
+    CREATE_SQL = f"""
+        CREATE TABLE IF NOT EXISTS {LEGS_TABLE} (
+            user_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            transaction_id INTEGER NOT NULL,
+            counterparty_id INTEGER NOT NULL,
+            side INTEGER NOT NULL,
+            group_id INTEGER,
+            amount_cents INTEGER NOT NULL,
+            is_settled INTEGER NOT NULL,
+            is_active INTEGER NOT NULL,
+            last_updated_at INTEGER NOT NULL,
+            PRIMARY KEY (user_id, created_at, transaction_id)
+        ) WITHOUT ROWID
+    """
+
+    UPSERT_SQL = f"""
+        INSERT INTO {LEGS_TABLE} (user_id, created_at, transaction_id, counterparty_id, side, group_id,
+                                  amount_cents, is_settled, is_active, last_updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, created_at, transaction_id) DO UPDATE SET
+            group_id = excluded.group_id,
+            amount_cents = excluded.amount_cents,
+            is_settled = excluded.is_settled,
+            is_active = excluded.is_active,
+            last_updated_at = excluded.last_updated_at
+        WHERE excluded.last_updated_at >= {LEGS_TABLE}.last_updated_at
+    """
+
+    PERIODS = {
+        "day": "date(created_at / 1000000, 'unixepoch')",
+        "week": "date(created_at / 1000000, 'unixepoch', '-6 days', 'weekday 1')",
+        "month": "date(created_at / 1000000, 'unixepoch', 'start of month')",
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def _micros(moment: datetime) -> int:
+        return (moment - UNIX_EPOCH) // timedelta(microseconds=1)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _open(self) -> None:
+        self._connection = sqlite3.connect(self.path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(self.CREATE_SQL)
+        self._connection.commit()
+
+    async def open(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics-sqlite")
+        await self._run(self._open)
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _insert(self, rows: Sequence[TransactionRow]) -> None:
+        records = []
+        for row in rows:
+            created_at = self._micros(row.created_at)
+            common = (to_cents(row.transaction_amount), int(row.is_settled), int(row.is_active),
+                      self._micros(row.last_updated_at))
+            for user_id, counterparty_id, side in _legs(row):
+                records.append((user_id, created_at, row.id, counterparty_id, side, row.group_id) + common)
+        with self._connection:
+            self._connection.executemany(self.UPSERT_SQL, records)
+
+    async def insert(self, rows: Sequence[TransactionRow]) -> None:
+        await self._run(self._insert, rows)
+
+    def _query(self, key_expression: str, counterparty_id: Optional[int], params: list) -> list:
+        counterparty = "AND counterparty_id = ?" if counterparty_id is not None else ""
+        query = f"""
+            SELECT {key_expression} AS key,
+                   SUM(CASE WHEN side = {SIDE_PAID} THEN amount_cents ELSE 0 END),
+                   SUM(side = {SIDE_PAID}),
+                   SUM(CASE WHEN side = {SIDE_BORROWED} THEN amount_cents ELSE 0 END),
+                   SUM(side = {SIDE_BORROWED})
+            FROM {LEGS_TABLE}
+            WHERE user_id = ? AND created_at >= ? AND created_at < ? AND is_active {counterparty}
+            GROUP BY 1
+            ORDER BY 1
+        """
+        if counterparty_id is not None:
+            params = params + [counterparty_id]
+        return self._connection.execute(query, params).fetchall()
+
+    def _range(self, user_id: int, from_day: date, to_day: date) -> list:
+        return [user_id, self._micros(_day_start(from_day)), self._micros(_day_start(to_day))]
+
+    @staticmethod
+    def _totals(rows, key) -> List[SpendTotals]:
+        return [
+            SpendTotals(key(k), from_cents(paid), int(paid_count), from_cents(borrowed), int(borrowed_count))
+            for k, paid, paid_count, borrowed, borrowed_count in rows
+        ]
+
+    async def spend_series(self, user_id, granularity, from_day, to_day, counterparty_id=None):
+        rows = await self._run(self._query, self.PERIODS[granularity], counterparty_id,
+                               self._range(user_id, from_day, to_day))
+        return self._totals(rows, date.fromisoformat)
+
+    async def counterparty_spend(self, user_id, from_day, to_day):
+        rows = await self._run(self._query, "counterparty_id", None, self._range(user_id, from_day, to_day))
+        return self._totals(rows, int)
+
+class ClickHouseSink(AnalyticsSink):
+    """
+    ClickHouse-backed sink, over ``clickhouse-connect``'s HTTP client.
+
+    The client is synchronous, so calls run in the default thread pool. Its
+    session ID is disabled so concurrent queries don't collide on one
+    server-side session.
+    """
+
+    name = "clickhouse"
+
+    CREATE_SQL = f"""
+        CREATE TABLE IF NOT EXISTS {LEGS_TABLE} (
+            user_id Int64,
+            created_at DateTime64(6, 'UTC'),
+            transaction_id Int64,
+            counterparty_id Int64,
+            side Int8,
+            group_id Nullable(Int64),
+            amount Decimal(12, 2),
+            is_settled Bool,
+            is_active Bool,
+            last_updated_at DateTime64(6, 'UTC')
+        )
+        ENGINE = ReplacingMergeTree(last_updated_at)
+        PARTITION BY toYYYYMM(created_at)
+        ORDER BY (user_id, created_at, transaction_id)
+    """
+
+    COLUMNS = ("user_id", "created_at", "transaction_id", "counterparty_id", "side", "group_id",
+               "amount", "is_settled", "is_active", "last_updated_at")
+
+    PERIODS = {
+        "day": "toDate(created_at)",
+        "week": "toMonday(created_at)",
+        "month": "toStartOfMonth(created_at)",
+    }
+
+    def __init__(self, host: str, port: int, username: str, password: str, database: str, secure: bool = False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.database = database
+        self.secure = secure
+        self._client = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "ClickHouseSink":
+        """Create a sink configured from application settings."""
+        return cls(
+            host=settings.CLICKHOUSE_HOST,
+            port=settings.CLICKHOUSE_PORT,
+            username=settings.CLICKHOUSE_USER,
+            password=settings.CLICKHOUSE_PASSWORD,
+            database=settings.CLICKHOUSE_DATABASE,
+            secure=settings.CLICKHOUSE_SECURE
+        )
+
+    def _open(self) -> None:
+        import clickhouse_connect
+        from clickhouse_connect import common
+
+        common.set_setting("autogenerate_session_id", False)
+        self._client = clickhouse_connect.get_client(
+            host=self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            database=self.database,
+            secure=self.secure
+        )
+        self._client.command(self.CREATE_SQL)
+
+    async def open(self) -> None:
+        await asyncio.to_thread(self._open)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await asyncio.to_thread(self._client.close)
+            self._client = None
+
+    async def insert(self, rows: Sequence[TransactionRow]) -> None:
+        records = [
+            [user_id, row.created_at, row.id, counterparty_id, side, row.group_id,
+             row.transaction_amount, row.is_settled, row.is_active, row.last_updated_at]
+            for row in rows
+            for user_id, counterparty_id, side in _legs(row)
+        ]
+        await asyncio.to_thread(self._client.insert, LEGS_TABLE, records, column_names=self.COLUMNS)
+
+    async def _query(self, key_expression: str, counterparty_id: Optional[int], parameters: dict) -> list:
+        counterparty = "AND counterparty_id = {counterparty_id:Int64}" if counterparty_id is not None else ""
+        query = f"""
+            SELECT {key_expression} AS key,
+                   sumIf(amount, side = {SIDE_PAID}), countIf(side = {SIDE_PAID}),
+                   sumIf(amount, side = {SIDE_BORROWED}), countIf(side = {SIDE_BORROWED})
+            FROM {LEGS_TABLE} FINAL
+            WHERE user_id = {{user_id:Int64}}
+              AND created_at >= {{from_time:DateTime64(6, 'UTC')}}
+              AND created_at < {{to_time:DateTime64(6, 'UTC')}}
+              AND is_active {counterparty}
+            GROUP BY key
+            ORDER BY key
+        """
+        if counterparty_id is not None:
+            parameters = dict(parameters, counterparty_id=counterparty_id)
+        result = await asyncio.to_thread(self._client.query, query, parameters=parameters)
+        return result.result_rows
+
+    @staticmethod
+    def _range(user_id: int, from_day: date, to_day: date) -> dict:
+        return {"user_id": user_id, "from_time": _day_start(from_day), "to_time": _day_start(to_day)}
+
+    @staticmethod
+    def _totals(rows) -> List[SpendTotals]:
+        return [
+            SpendTotals(key, paid, int(paid_count), borrowed, int(borrowed_count))
+            for key, paid, paid_count, borrowed, borrowed_count in rows
+        ]
+
+    async def spend_series(self, user_id, granularity, from_day, to_day, counterparty_id=None):
+        rows = await self._query(self.PERIODS[granularity], counterparty_id, self._range(user_id, from_day, to_day))
+        return self._totals(rows)
+
+    async def counterparty_spend(self, user_id, from_day, to_day):
+        rows = await self._query("counterparty_id", None, self._range(user_id, from_day, to_day))
+        return self._totals(rows)
+
+class AnalyticsBatcher:
+    """
+    Buffers committed transaction rows and writes them to the sink in micro-batches.
+
+    The background task is started on the first ``submit`` (or by
+    ``start``) and flushes what is pending every ``flush_interval`` seconds,
+    or early once ``batch_size`` rows are waiting.
+    """
+
+    def __init__(
+        self,
+        sink: Optional[AnalyticsSink],
+        flush_interval_ms: int = 500,
+        batch_size: int = 5000,
+        max_pending: int = 200000
+    ):
+        self.sink = sink
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        # Structure: {transaction_id: newest row}, oldest first
+        self._pending: "OrderedDict[int, TransactionRow]" = OrderedDict()
+        self._dropped = 0
+        self._opened = False
+        self._open_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "AnalyticsBatcher":
+        """Create a batcher for the sink named by the application settings."""
+        sinks = {
+            "none": lambda: None,
+            "local": lambda: LocalSink(settings.ANALYTICS_LOCAL_PATH),
+            "clickhouse": lambda: ClickHouseSink.from_settings(settings),
+        }
+        return cls(
+            sink=sinks[settings.ANALYTICS_SINK](),
+            flush_interval_ms=settings.ANALYTICS_FLUSH_INTERVAL_MS,
+            batch_size=settings.ANALYTICS_BATCH_SIZE,
+            max_pending=settings.ANALYTICS_MAX_PENDING
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, rows: Iterable[TransactionRow]) -> None:
+        """
+        Queue committed transaction rows for the sink; never blocks.
+
+        Args:
+            rows: Rows carrying ``TransactionRow`` fields (ORM objects work too)
+        """
+        if not self.enabled:
+            return
+
+        for row in rows:
+            if not isinstance(row, TransactionRow):
+                row = TransactionRow(*(getattr(row, name) for name in TransactionRow._fields))
+            current = self._pending.get(row.id)
+            if current is None or current.last_updated_at <= row.last_updated_at:
+                self._pending[row.id] = row
+                self._pending.move_to_end(row.id)
+
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self._dropped += 1
+
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+        self._ensure_task()
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def start(self) -> None:
+        """Open the sink and start the flush task."""
+        if not self.enabled:
+            return
+        await self.ensure_open()
+        self._ensure_task()
+        logger.info(f"Analytics sink '{self.sink.name}' started")
+
+    async def stop(self) -> None:
+        """Stop the flush task, write out what is pending and close the sink."""
+        if not self.enabled:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            while self._pending:
+                await self.flush()
+        except Exception as e:
+            logger.error(f"Analytics sink lost {len(self._pending)} rows on shutdown: {str(e)}")
+        if self._opened:
+            await self.sink.close()
+            self._opened = False
+
+    async def ensure_open(self) -> None:
+        """Open the sink if it isn't yet."""
+        async with self._open_lock:
+            if not self._opened:
+                await self.sink.open()
+                self._opened = True
+
+    async def flush(self) -> int:
+        """
+        Write up to ``batch_size`` pending rows to the sink.
+
+        Rows are put back if the write fails, unless a newer version of the
+        same transaction was submitted meanwhile.
+
+        Returns:
+            Number of rows written
+        """
+        if not self._pending:
+            return 0
+
+        await self.ensure_open()
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popitem(last=False)[1])
+        try:
+            await self.sink.insert(batch)
+        except Exception:
+            for row in reversed(batch):
+                if row.id not in self._pending:
+                    self._pending[row.id] = row
+                    self._pending.move_to_end(row.id, last=False)
+            raise
+        return len(batch)
+
+    async def _run(self) -> None:
+        delay = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if self._dropped:
+                logger.warning(f"Analytics sink backlog full: dropped {self._dropped} rows; run the backfill job")
+                self._dropped = 0
+            try:
+                while len(self._pending) >= self.batch_size:
+                    await self.flush()
+                await self.flush()
+                delay = self.flush_interval
+            except Exception as e:
+                delay = min(max(delay * 2, 1.0), MAX_RETRY_DELAY)
+                logger.error(f"Analytics sink write failed, retrying in {delay:.0f}s: {str(e)}")
+
+# Global batcher instance
+analytics_batcher = AnalyticsBatcher.from_settings(settings)
+
+def submit(rows: Iterable[TransactionRow]) -> None:
+    """Queue committed transaction rows for the analytics sink, if one is configured."""
+    analytics_batcher.submit(rows)
+
+# Reads
+
+def offloads(from_day: date, to_day: date) -> bool:
+    """Whether a query over [from_day, to_day) is long enough to go to the sink."""
+    return analytics_batcher.enabled and (to_day - from_day).days >= settings.ANALYTICS_OFFLOAD_MIN_DAYS
+
+async def get_spend_series(
+    db: AsyncSession,
+    user_id: int,
+    granularity: str,
+    from_day: date,
+    to_day: date,
+    counterparty_id: Optional[int] = None
+) -> List[SpendTotals]:
+    """
+    Get a user's spend per day, week or month, from the sink for long ranges.
+
+    See ``spend_rollup.get_spend_series`` for the arguments and result.
+    """
+    if offloads(from_day, to_day):
+        try:
+            await analytics_batcher.ensure_open()
+            return await analytics_batcher.sink.spend_series(user_id, granularity, from_day, to_day, counterparty_id)
+        except Exception as e:
+            logger.warning(f"Analytics sink read failed, using rollups: {str(e)}")
+
+    return await spend_rollup.get_spend_series(
+        db=db,
+        user_id=user_id,
+        granularity=granularity,
+        from_day=from_day,
+        to_day=to_day,
+        counterparty_id=counterparty_id
+    )
+
+async def get_counterparty_spend(db: AsyncSession, user_id: int, from_day: date, to_day: date) -> List[SpendTotals]:
+    """
+    Get a user's spend with each counterparty, from the sink for long ranges.
+
+    See ``spend_rollup.get_counterparty_spend`` for the arguments and result.
+    """
+    if offloads(from_day, to_day):
+        try:
+            await analytics_batcher.ensure_open()
+            return await analytics_batcher.sink.counterparty_spend(user_id, from_day, to_day)
+        except Exception as e:
+            logger.warning(f"Analytics sink read failed, using rollups: {str(e)}")
+
+    return await spend_rollup.get_counterparty_spend(db=db, user_id=user_id, from_day=from_day, to_day=to_day)
+
+# Backfill job
+
+async def backfill(db: AsyncSession, since: Optional[date] = None) -> int:
+    """
+    Copy transactions from Postgres into the sink, bypassing the batcher.
+
+    Safe to rerun: the sink keeps the newest version of every transaction.
+
+    Args:
+        db: Database session
+        since: Only copy transactions created on or after this day
+
+    Returns:
+        Number of transactions copied
+    """
+    if not analytics_batcher.enabled:
+        logger.warning("No analytics sink configured; nothing to backfill")
+        return 0
+
+    sink = analytics_batcher.sink
+    await analytics_batcher.ensure_open()
+
+    query = select(*(getattr(Transaction, name) for name in TransactionRow._fields))
+    if since is not None:
+        query = query.where(Transaction.created_at >= _day_start(since))
+    result = await db.stream(query.execution_options(yield_per=analytics_batcher.batch_size))
+
+    copied = 0
+    async for partition in result.partitions():
+        await sink.insert([TransactionRow._make(row) for row in partition])
+        copied += len(partition)
+    logger.info(f"Analytics sink '{sink.name}' backfilled with {copied} transactions")
+    return copied
+
+async def run_backfill(since: Optional[date] = None) -> int:
+    """Job entry point: backfill the sink in its own session."""
+    from app.db.database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            return await backfill(db, since)
+    finally:
+        await analytics_batcher.stop()
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_backfill(date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None))
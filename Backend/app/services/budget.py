@@ -0,0 +1,409 @@
+"""
+Monthly budgets per user and category.
+
+A budget tracks what its user paid (as payer) in active transactions of its
+category during the current UTC calendar month; the overall budget, stored
+with an empty category, counts every category. Consumption is kept on the
+budget row itself: the ledger write path applies each transaction's amount
+to the payer's matching budgets in the same database transaction, so
+reading budgets never sums transactions.
+
+Counters belong to the month in ``period_start``. The first write of a new
+month resets them, and reads report a budget untouched this month as
+unspent. Only writes in the budget's current month count: deactivating a
+transaction from an earlier month leaves the budget alone.
+
+Each update recomputes the budget's alert level, the highest threshold in
+``ALERT_THRESHOLDS`` (percent of the limit) its spend has reached. A write
+that raises the level stamps ``alerted_at``; that is the threshold crossing.
+
+Creating a budget commits the row and then recounts the month from
+``transactions``. A writer whose delta statement ran before that commit
+did not see the budget, so writers and recounts are serialized per payer
+on an advisory lock: writers take it shared (``lock_budgets``) before the
+statement applying their deltas, whether or not the payer has budgets, and
+a recount takes it exclusively before summing. Either the recount waits
+for the writer to commit and counts its transaction, or the writer waits
+for the recount and applies its delta on top of it.
+"""
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, update, and_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from starlette.status import HTTP_404_NOT_FOUND
+
+from app.models.budget import Budget
+from app.models.transaction import Transaction
+from app.db.partitions import add_months
+from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetStatus
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Alert thresholds, in percent of the budget limit
+ALERT_THRESHOLDS = (80, 100)
+
+# Stored category of the overall budget
+OVERALL_CATEGORY = ""
+
+ZERO = Decimal("0.00")
+
+# Per-payer advisory lock (namespace, user ID folded into 32 bits); a
+# collision only serializes two users' recounts and writes
+LOCK_KEY_SQL = "hashtext('budgets'), CAST({user_id} % 2147483648 AS INTEGER)"
+
+LOCK_BUDGETS_SQL = f"""
+    SELECT pg_advisory_xact_lock_shared({LOCK_KEY_SQL.format(user_id="user_id")})
+    FROM unnest(CAST(:user_ids AS BIGINT[])) AS user_id
+"""
+
+LOCK_BUDGETS_FOR_RECOUNT_SQL = f"SELECT pg_advisory_xact_lock({LOCK_KEY_SQL.format(user_id=':user_id')})"
+
+def period_start(moment: datetime) -> date:
+    """First day of the UTC calendar month containing ``moment``."""
+    return moment.astimezone(timezone.utc).date().replace(day=1)
+
+def alert_level(spent: Decimal, amount_limit: Decimal) -> int:
+    """Highest threshold in ``ALERT_THRESHOLDS`` that ``spent`` has reached, 0 if none."""
+    return max((threshold for threshold in ALERT_THRESHOLDS if spent * 100 >= amount_limit * threshold), default=0)
+
+def _alert_level_sql(spent: str, amount_limit: str) -> str:
+    """SQL twin of ``alert_level``."""
+    cases = " ".join(
+        f"WHEN ({spent}) * 100 >= ({amount_limit}) * {threshold} THEN {threshold}"
+        for threshold in sorted(ALERT_THRESHOLDS, reverse=True)
+    )
+    return f"CASE {cases} ELSE 0 END"
+
+def budget_update_sql(deltas: str) -> str:
+    """
+    Build CTEs applying spend deltas to the matching budgets.
+
+    The payer's active budgets for the delta's category and the overall
+    budget are locked in ID order, rolled over to the delta's month if they
+    are behind, and updated with the new spend and alert level. Deltas from
+    a month before a budget's current one are ignored.
+
+    Args:
+        deltas: SELECT producing (user_id, category, period_start, amount,
+            transaction_count) rows, all for the same month
+
+    Returns:
+        SQL text for a WITH list; the last CTE, ``budget_updates``, returns
+        (id, user_id, category, amount_limit, spent, previous_level, alert_level)
+    """
+    return f"""
+    budget_deltas AS (
+        SELECT b.id, d.period_start, SUM(d.amount) AS amount, SUM(d.transaction_count) AS transaction_count
+        FROM ({deltas}) AS d (user_id, category, period_start, amount, transaction_count)
+        JOIN budgets b ON b.user_id = d.user_id AND b.is_active
+             AND (b.category = '{OVERALL_CATEGORY}' OR b.category = d.category)
+        GROUP BY b.id, d.period_start
+    ),
+    budget_locks AS (
+        SELECT b.id, b.amount_limit, d.period_start, d.amount, d.transaction_count AS delta_count,
+               CASE WHEN b.period_start = d.period_start THEN b.spent ELSE 0 END AS spent,
+               CASE WHEN b.period_start = d.period_start THEN b.transaction_count ELSE 0 END AS transaction_count,
+               CASE WHEN b.period_start = d.period_start THEN b.alert_level ELSE 0 END AS alert_level
+        FROM budgets b
+        JOIN budget_deltas d ON d.id = b.id
+        WHERE d.period_start >= b.period_start
+        ORDER BY b.id
+        FOR UPDATE OF b
+    ),
+    budget_totals AS (
+        SELECT id, period_start,
+               spent + amount AS spent,
+               transaction_count + delta_count AS transaction_count,
+               alert_level AS previous_level,
+               {_alert_level_sql("spent + amount", "amount_limit")} AS alert_level
+        FROM budget_locks
+    ),
+    budget_updates AS (
+        UPDATE budgets AS b SET
+            period_start = t.period_start,
+            spent = t.spent,
+            transaction_count = t.transaction_count,
+            alert_level = t.alert_level,
+            alerted_at = CASE WHEN t.alert_level > t.previous_level THEN now() ELSE b.alerted_at END,
+            last_updated_at = now()
+        FROM budget_totals t
+        WHERE b.id = t.id
+        RETURNING b.id, b.user_id, b.category, b.amount_limit, b.spent, t.previous_level, b.alert_level
+    )
+"""
+
+APPLY_BUDGET_DELTA_SQL = f"""
+    WITH {budget_update_sql(
+        "SELECT CAST(:user_id AS BIGINT), CAST(:category AS VARCHAR(50)), CAST(:period_start AS DATE), "
+        "CAST(:amount AS NUMERIC), CAST(:transaction_count AS INTEGER)"
+    )}
+    SELECT id, user_id, category, amount_limit, spent, previous_level, alert_level FROM budget_updates
+"""
+
+# Write path
+
+async def lock_budgets(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """
+    Hold the payers' budgets against a recount until commit.
+
+    Call before the statement that applies the payers' budget deltas, not in
+    it: that statement must see any budget committed while this one waited.
+    The caller owns the surrounding transaction.
+
+    Args:
+        db: Database session
+        user_ids: Payers of the transactions being written
+    """
+    await db.execute(text(LOCK_BUDGETS_SQL), {"user_ids": sorted(set(user_ids))})
+
+async def apply_budget_delta(
+    db: AsyncSession,
+    payer_id: int,
+    category: Optional[str],
+    amount: Decimal,
+    created_at: datetime,
+    sign: int
+) -> None:
+    """
+    Add (or with ``sign=-1``, remove) a transaction's amount to the payer's budgets.
+
+    Takes the payer's budget lock first (see ``lock_budgets``). The caller
+    owns the surrounding transaction.
+
+    Args:
+        db: Database session
+        payer_id: User who paid
+        category: Transaction category, or None
+        amount: Transaction amount
+        created_at: Transaction creation time; picks the month
+        sign: 1 to count the transaction, -1 to stop counting it
+    """
+    await lock_budgets(db, [payer_id])
+    result = await db.execute(text(APPLY_BUDGET_DELTA_SQL), {
+        "user_id": payer_id,
+        "category": category,
+        "period_start": period_start(created_at),
+        "amount": amount * sign,
+        "transaction_count": sign
+    })
+    for budget_id, user_id, budget_category, amount_limit, spent, previous_level, level in result:
+        if level > previous_level:
+            logger.info(
+                f"Budget {budget_id} of user {user_id} ({budget_category or 'overall'}) "
+                f"reached {level}%: {spent} of {amount_limit}"
+            )
+
+# Reads
+
+def _status(budget: Budget, current_period: date) -> BudgetStatus:
+    """A budget as of ``current_period``; counters from an earlier month read as zero."""
+    is_current = budget.period_start == current_period
+    spent = budget.spent if is_current else ZERO
+    return BudgetStatus(
+        id=budget.id,
+        category=budget.category or None,
+        amount_limit=budget.amount_limit,
+        period_start=current_period,
+        spent=spent,
+        remaining=budget.amount_limit - spent,
+        transaction_count=budget.transaction_count if is_current else 0,
+        percent_used=round(float(spent * 100 / budget.amount_limit), 1),
+        alert_level=budget.alert_level if is_current else 0,
+        alerted_at=budget.alerted_at if is_current else None,
+        created_at=budget.created_at,
+        last_updated_at=budget.last_updated_at
+    )
+
+async def get_budgets(db: AsyncSession, user_id: int) -> List[BudgetStatus]:
+    """
+    Get a user's active budgets with their current-month consumption.
+
+    Args:
+        db: Database session
+        user_id: User whose budgets to read
+
+    Returns:
+        List of budgets, the overall budget first, then by category
+    """
+    result = await db.execute(
+        select(Budget)
+        .where(and_(Budget.user_id == user_id, Budget.is_active == True))
+        .order_by(Budget.category)
+    )
+    current_period = period_start(datetime.now(timezone.utc))
+    return [_status(budget, current_period) for budget in result.scalars()]
+
+async def _get_locked_budget(db: AsyncSession, budget_id: int, user_id: int) -> Budget:
+    result = await db.execute(
+        select(Budget)
+        .where(and_(Budget.id == budget_id, Budget.user_id == user_id, Budget.is_active == True))
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    budget = result.scalar_one_or_none()
+    if not budget:
+        await db.rollback()
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Budget not found"
+        )
+    return budget
+
+# Management
+
+async def recount_budget(db: AsyncSession, budget_id: int, user_id: int) -> BudgetStatus:
+    """
+    Recompute a budget's consumption for the current month from its transactions.
+
+    Waits for the user's in-flight writers to commit, holding off new ones
+    (see ``lock_budgets``), then locks the budget row: every transaction is
+    either in the count or applies its delta on top of it afterwards. Reads
+    one month of the user's transactions through the ``(payer_id,
+    created_at, id)`` index.
+
+    Args:
+        db: Database session
+        budget_id: Budget to recount
+        user_id: Owner of the budget
+
+    Returns:
+        Recounted budget status
+
+    Raises:
+        HTTPException: If the budget doesn't exist or isn't the user's
+    """
+    # Before the row lock, which a writer holding the advisory lock may be waiting for
+    await db.execute(text(LOCK_BUDGETS_FOR_RECOUNT_SQL), {"user_id": user_id})
+    budget = await _get_locked_budget(db, budget_id, user_id)
+
+    now = datetime.now(timezone.utc)
+    current_period = period_start(now)
+    month_start = datetime.combine(current_period, datetime.min.time(), timezone.utc)
+    month_end = datetime.combine(add_months(current_period, 1), datetime.min.time(), timezone.utc)
+    conditions = [
+        Transaction.payer_id == user_id,
+        Transaction.is_active == True,
+        Transaction.created_at >= month_start,
+        Transaction.created_at < month_end
+    ]
+    if budget.category != OVERALL_CATEGORY:
+        conditions.append(Transaction.category == budget.category)
+    result = await db.execute(
+        select(func.coalesce(func.sum(Transaction.transaction_amount), ZERO), func.count()).where(and_(*conditions))
+    )
+    spent, transaction_count = result.one()
+
+    previous_level = budget.alert_level if budget.period_start == current_period else 0
+    level = alert_level(spent, budget.amount_limit)
+    budget.period_start = current_period
+    budget.spent = spent
+    budget.transaction_count = transaction_count
+    budget.alert_level = level
+    if level > previous_level:
+        budget.alerted_at = now
+    await db.commit()
+    await db.refresh(budget)
+
+    return _status(budget, current_period)
+
+async def create_budget(db: AsyncSession, user_id: int, budget_data: BudgetCreate) -> BudgetStatus:
+    """
+    Create a budget, or reactivate and update the user's budget for that category.
+
+    The row is committed before its consumption is counted: transactions
+    written after the recount update it incrementally, and those in flight
+    are waited for by the recount (see ``recount_budget``).
+
+    Args:
+        db: Database session
+        user_id: Owner of the budget
+        budget_data: Budget data from request
+
+    Returns:
+        Budget status with this month's consumption
+    """
+    stmt = pg_insert(Budget).values(
+        user_id=user_id,
+        category=budget_data.category or OVERALL_CATEGORY,
+        amount_limit=budget_data.amount_limit,
+        period_start=period_start(datetime.now(timezone.utc)),
+        spent=ZERO,
+        transaction_count=0,
+        alert_level=0,
+        is_active=True
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Budget.user_id, Budget.category],
+        set_={"amount_limit": stmt.excluded.amount_limit, "is_active": True, "last_updated_at": func.now()}
+    ).returning(Budget.id)
+    result = await db.execute(stmt)
+    budget_id = result.scalar_one()
+    await db.commit()
+
+    logger.info(f"Budget {budget_id} set for user {user_id}: {budget_data.category or 'overall'} {budget_data.amount_limit}")
+    return await recount_budget(db, budget_id, user_id)
+
+async def update_budget(db: AsyncSession, budget_id: int, user_id: int, budget_data: BudgetUpdate) -> BudgetStatus:
+    """
+    Change a budget's limit, re-evaluating its alert level against current spend.
+
+    Args:
+        db: Database session
+        budget_id: Budget to update
+        user_id: Owner of the budget
+        budget_data: New budget data
+
+    Returns:
+        Updated budget status
+
+    Raises:
+        HTTPException: If the budget doesn't exist or isn't the user's
+    """
+    budget = await _get_locked_budget(db, budget_id, user_id)
+
+    now = datetime.now(timezone.utc)
+    current_period = period_start(now)
+    if budget.period_start != current_period:
+        budget.period_start = current_period
+        budget.spent = ZERO
+        budget.transaction_count = 0
+        budget.alert_level = 0
+
+    previous_level = budget.alert_level
+    budget.amount_limit = budget_data.amount_limit
+    budget.alert_level = alert_level(budget.spent, budget.amount_limit)
+    if budget.alert_level > previous_level:
+        budget.alerted_at = now
+    await db.commit()
+    await db.refresh(budget)
+
+    return _status(budget, current_period)
+
+async def delete_budget(db: AsyncSession, budget_id: int, user_id: int) -> bool:
+    """
+    Deactivate a budget. It stops being updated; recreating it recounts.
+
+    Args:
+        db: Database session
+        budget_id: Budget to deactivate
+        user_id: Owner of the budget
+
+    Returns:
+        True if an active budget was deactivated
+    """
+    result = await db.execute(
+        update(Budget)
+        .where(and_(Budget.id == budget_id, Budget.user_id == user_id, Budget.is_active == True))
+        .values(is_active=False, last_updated_at=func.now())
+        .returning(Budget.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.scalar_one_or_none() is not None
+    await db.commit()
+    return deleted
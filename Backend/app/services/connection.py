@@ -0,0 +1,201 @@
+"""
+User connections: writes and graph queries.
+
+Reads go to the per-process ``connection_graph`` when it is enabled, and to
+equivalent SQL over ``user_connections`` otherwise. Writes update the table
+and then the local graph, so this process sees its own changes immediately
+and other processes within ``CONNECTION_GRAPH_REFRESH_SECONDS``.
+"""
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import select, update, and_, or_, exists, func, union, intersect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from app.models.user import User
+from app.models.user_connection import UserConnection
+from app.services.connection_graph import connection_graph
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+def _connection_ids_query(user_id: int):
+    """Users connected to ``user_id`` by an active row in either direction."""
+    outgoing = select(UserConnection.connected_user_id.label("user_id")).where(
+        and_(UserConnection.user_id == user_id, UserConnection.is_active == True)
+    )
+    incoming = select(UserConnection.user_id.label("user_id")).where(
+        and_(UserConnection.connected_user_id == user_id, UserConnection.is_active == True)
+    )
+    return union(outgoing, incoming)
+
+async def _use_graph(db: AsyncSession) -> bool:
+    if not connection_graph.enabled:
+        return False
+    await connection_graph.ensure_fresh(db)
+    return True
+
+async def get_connection_ids(db: AsyncSession, user_id: int) -> List[int]:
+    """
+    Get the IDs of everyone a user is connected to.
+
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+
+    Returns:
+        Sorted list of user IDs
+    """
+    if await _use_graph(db):
+        return connection_graph.neighbours(user_id).tolist()
+
+    connections = _connection_ids_query(user_id).subquery()
+    result = await db.execute(select(connections.c.user_id).order_by(connections.c.user_id))
+    return list(result.scalars())
+
+async def get_mutual_connection_ids(db: AsyncSession, user_id: int, other_user_id: int) -> List[int]:
+    """
+    Get the IDs of everyone connected to both users.
+
+    Args:
+        db: Database session
+        user_id: First user ID
+        other_user_id: Second user ID
+
+    Returns:
+        Sorted list of user IDs
+    """
+    if await _use_graph(db):
+        return connection_graph.mutual(user_id, other_user_id).tolist()
+
+    mutual = intersect(_connection_ids_query(user_id), _connection_ids_query(other_user_id)).subquery()
+    result = await db.execute(select(mutual.c.user_id).order_by(mutual.c.user_id))
+    return list(result.scalars())
+
+async def suggest_connections(db: AsyncSession, user_id: int, limit: int = 10) -> List[Tuple[int, int]]:
+    """
+    Suggest active users two hops away, ranked by mutual connections.
+
+    Args:
+        db: Database session
+        user_id: User to suggest connections for
+        limit: Maximum number of suggestions
+
+    Returns:
+        List of (user_id, mutual count), by count descending then user ID
+    """
+    if await _use_graph(db):
+        # Over-fetch so dropping inactive users rarely leaves the list short
+        candidates, counts = connection_graph.friends_of_friends(user_id, limit * 2)
+        if not len(candidates):
+            return []
+        result = await db.execute(
+            select(User.id).where(and_(User.id.in_(candidates.tolist()), User.is_active == True))
+        )
+        active = set(result.scalars())
+        return [(candidate, count) for candidate, count in zip(candidates.tolist(), counts.tolist())
+                if candidate in active][:limit]
+
+    friends = _connection_ids_query(user_id).cte("friends")
+    two_hops = union(
+        select(friends.c.user_id.label("friend_id"), UserConnection.connected_user_id.label("candidate_id"))
+        .join(UserConnection, UserConnection.user_id == friends.c.user_id)
+        .where(UserConnection.is_active == True),
+        select(friends.c.user_id.label("friend_id"), UserConnection.user_id.label("candidate_id"))
+        .join(UserConnection, UserConnection.connected_user_id == friends.c.user_id)
+        .where(UserConnection.is_active == True)
+    ).subquery()
+    mutual_count = func.count().label("mutual_count")
+    query = (
+        select(two_hops.c.candidate_id, mutual_count)
+        .join(User, User.id == two_hops.c.candidate_id)
+        .where(and_(
+            two_hops.c.candidate_id != user_id,
+            two_hops.c.candidate_id.not_in(select(friends.c.user_id)),
+            User.is_active == True
+        ))
+        .group_by(two_hops.c.candidate_id)
+        .order_by(mutual_count.desc(), two_hops.c.candidate_id)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return [(candidate_id, count) for candidate_id, count in result]
+
+async def add_connection(db: AsyncSession, user_id: int, connected_user_id: int) -> UserConnection:
+    """
+    Connect a user to another, reactivating a previous connection if there is one.
+
+    Args:
+        db: Database session
+        user_id: ID of the connecting user
+        connected_user_id: ID of the user to connect to
+
+    Returns:
+        Active UserConnection object
+
+    Raises:
+        HTTPException: If the target is the user themselves, or doesn't exist or is inactive
+    """
+    if user_id == connected_user_id:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Users cannot connect to themselves"
+        )
+
+    user_is_active = await db.execute(
+        select(exists().where(and_(User.id == connected_user_id, User.is_active == True)))
+    )
+    if not user_is_active.scalar_one():
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="User not found or inactive"
+        )
+
+    stmt = pg_insert(UserConnection).values(user_id=user_id, connected_user_id=connected_user_id, is_active=True)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserConnection.user_id, UserConnection.connected_user_id],
+        set_={"is_active": True, "last_updated_at": func.now()}
+    ).returning(UserConnection)
+    result = await db.execute(stmt.execution_options(populate_existing=True))
+    connection = result.scalar_one()
+    await db.commit()
+
+    connection_graph.apply_change(user_id, connected_user_id, True)
+    logger.info(f"User {user_id} connected to user {connected_user_id}")
+    return connection
+
+async def remove_connection(db: AsyncSession, user_id: int, other_user_id: int) -> bool:
+    """
+    Disconnect two users by deactivating the rows in both directions.
+
+    Args:
+        db: Database session
+        user_id: ID of the user removing the connection
+        other_user_id: ID of the other user
+
+    Returns:
+        True if any active row was deactivated
+    """
+    result = await db.execute(
+        update(UserConnection)
+        .where(and_(
+            or_(
+                and_(UserConnection.user_id == user_id, UserConnection.connected_user_id == other_user_id),
+                and_(UserConnection.user_id == other_user_id, UserConnection.connected_user_id == user_id)
+            ),
+            UserConnection.is_active == True
+        ))
+        .values(is_active=False, last_updated_at=func.now())
+        .returning(UserConnection.user_id, UserConnection.connected_user_id)
+        .execution_options(synchronize_session=False)
+    )
+    removed = result.all()
+    await db.commit()
+
+    connection_graph.apply_changes((source, target, False) for source, target in removed)
+    if removed:
+        logger.info(f"User {user_id} disconnected from user {other_user_id}")
+    return bool(removed)
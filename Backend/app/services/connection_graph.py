@@ -0,0 +1,405 @@
+"""
+Per-process connection graph.
+
+``user_connections`` rows are directed, but two users are connected when an
+active row exists in either direction. The graph keeps that undirected
+adjacency in CSR form: ``user_ids`` maps compact node indexes to user IDs,
+and the neighbours of node ``i`` are ``indices[indptr[i]:indptr[i + 1]]``,
+sorted, with ``directions`` recording which rows back each pair. All three
+index arrays are int64, so a million edges cost a few dozen megabytes and a
+neighbour lookup is a slice.
+
+Edge changes are applied to a small overlay keyed by user ID instead of
+rebuilding the arrays; the overlay is folded back into the CSR arrays once
+it grows past ``compact_threshold`` pairs. Changes made by other processes
+are picked up by ``refresh``, which re-reads only the rows updated since the
+last one. Rows are soft-deleted (``is_active``), so nothing is missed.
+
+Writes stamp ``last_updated_at`` with ``now()``, their transaction's start
+time, and become visible only when they commit. A refresh's watermark is
+therefore the start of the oldest transaction still open when it reads, not
+the newest timestamp it saw: every write it could not see yet is stamped
+at or after that. Only transactions that could write connections count:
+client backends of the application's own role that are not idle. A refresh
+reads ``user_connections`` through its ``last_updated_at`` index, so its cost
+follows the window; once a long transaction holds the watermark more than
+``max_refresh_lag_seconds`` back, the graph is reloaded instead. It is also
+rebuilt from scratch every ``rebuild_seconds`` as a backstop (e.g. for
+writers under another database role, whose transactions are not counted).
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.models.user_connection import UserConnection
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Direction bits of a pair, seen from the row's user
+OUTGOING = 1
+INCOMING = 2
+
+EMPTY = np.empty(0, dtype=np.int64)
+
+def _swap_directions(directions: np.ndarray) -> np.ndarray:
+    """The same pairs' direction bits seen from the other end."""
+    return ((directions & OUTGOING) << 1) | ((directions & INCOMING) >> 1)
+
+class ConnectionGraph:
+    """
+    Undirected connection graph in CSR arrays with an incremental overlay.
+
+    The graph is built lazily on first use and is only read and written from
+    the event loop thread.
+    """
+
+    def __init__(self, enabled: bool = True, refresh_seconds: int = 5, compact_threshold: int = 100000,
+                 rebuild_seconds: int = 3600, max_refresh_lag_seconds: int = 300):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.compact_threshold = compact_threshold
+        self.rebuild_seconds = rebuild_seconds
+        self.max_refresh_lag_seconds = max_refresh_lag_seconds
+
+        self.user_ids = EMPTY
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = EMPTY
+        self.directions = EMPTY
+
+        # Structure: {user_id: {neighbour_id: direction bits, 0 when disconnected}}
+        self._overlay: Dict[int, Dict[int, int]] = {}
+        self._overlay_pairs = 0
+
+        self._loaded = False
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> "ConnectionGraph":
+        """Create a graph configured from application settings."""
+        return cls(
+            enabled=settings.CONNECTION_GRAPH_ENABLED,
+            refresh_seconds=settings.CONNECTION_GRAPH_REFRESH_SECONDS,
+            compact_threshold=settings.CONNECTION_GRAPH_COMPACT_THRESHOLD,
+            rebuild_seconds=settings.CONNECTION_GRAPH_REBUILD_SECONDS,
+            max_refresh_lag_seconds=settings.CONNECTION_GRAPH_MAX_REFRESH_LAG_SECONDS
+        )
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def edge_count(self) -> int:
+        """Number of undirected pairs in the CSR arrays (excluding the overlay)."""
+        return len(self.indices) // 2
+
+    # Building
+
+    def build(self, user_ids: np.ndarray, connected_user_ids: np.ndarray) -> None:
+        """
+        Replace the graph with the given active directed edges.
+
+        Args:
+            user_ids: Source user of each edge
+            connected_user_ids: Target user of each edge
+        """
+        sources = np.asarray(user_ids, dtype=np.int64)
+        targets = np.asarray(connected_user_ids, dtype=np.int64)
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+
+        outgoing = np.full(len(sources), OUTGOING, dtype=np.int64)
+        self._build(
+            np.concatenate((sources, targets)),
+            np.concatenate((targets, sources)),
+            np.concatenate((outgoing, _swap_directions(outgoing)))
+        )
+        self._overlay = {}
+        self._overlay_pairs = 0
+        self._loaded = True
+
+    def _build(self, rows: np.ndarray, cols: np.ndarray, directions: np.ndarray) -> None:
+        """Build the CSR arrays from symmetric (user, neighbour, bits) triples, OR-ing duplicates."""
+        node_ids = np.unique(rows)
+        n = len(node_ids)
+        row_index = np.searchsorted(node_ids, rows)
+        col_index = np.searchsorted(node_ids, cols)
+
+        keys = row_index * n + col_index
+        order = np.argsort(keys, kind="stable")
+        keys, directions = keys[order], directions[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else EMPTY
+        unique_keys = keys[starts]
+        merged = np.bitwise_or.reduceat(directions, starts) if len(keys) else EMPTY
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(unique_keys // n, minlength=n) if n else EMPTY, out=indptr[1:])
+
+        self.user_ids = node_ids.astype(np.int64, copy=False)
+        self.indptr = indptr
+        self.indices = (unique_keys % n).astype(np.int64, copy=False) if n else EMPTY
+        self.directions = merged.astype(np.int64, copy=False)
+
+    def compact(self) -> None:
+        """Fold the overlay into the CSR arrays."""
+        if not self._overlay:
+            return
+
+        counts = np.diff(self.indptr)
+        rows = np.repeat(self.user_ids, counts)
+        cols = self.user_ids[self.indices]
+        directions = self.directions
+
+        # Drop every base pair the overlay overrides, then append the overlay's live pairs
+        n = len(self.user_ids)
+        overridden = np.array(
+            [(user_id, neighbour_id) for user_id, pairs in self._overlay.items() for neighbour_id in pairs],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        row_nodes = np.minimum(np.searchsorted(self.user_ids, overridden[:, 0]), max(n - 1, 0))
+        col_nodes = np.minimum(np.searchsorted(self.user_ids, overridden[:, 1]), max(n - 1, 0))
+        in_base = (self.user_ids[row_nodes] == overridden[:, 0]) & (self.user_ids[col_nodes] == overridden[:, 1]) \
+            if n else np.zeros(len(overridden), dtype=bool)
+        base_keys = np.repeat(np.arange(n, dtype=np.int64), counts) * n + self.indices
+        keep = ~np.isin(base_keys, row_nodes[in_base] * n + col_nodes[in_base])
+
+        extra = [(user_id, neighbour_id, bits)
+                 for user_id, pairs in self._overlay.items()
+                 for neighbour_id, bits in pairs.items() if bits]
+        extra_array = np.array(extra, dtype=np.int64).reshape(-1, 3)
+
+        self._build(
+            np.concatenate((rows[keep], extra_array[:, 0])),
+            np.concatenate((cols[keep], extra_array[:, 1])),
+            np.concatenate((directions[keep], extra_array[:, 2]))
+        )
+        self._overlay = {}
+        self._overlay_pairs = 0
+        logger.info(f"Connection graph compacted: {len(self.user_ids)} users, {self.edge_count} connections")
+
+    # Edge changes
+
+    def _base_row(self, user_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbour node indexes and direction bits of a user in the CSR arrays."""
+        node = np.searchsorted(self.user_ids, user_id)
+        if node >= len(self.user_ids) or self.user_ids[node] != user_id:
+            return EMPTY, EMPTY
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end], self.directions[start:end]
+
+    def _directions(self, user_id: int, neighbour_id: int) -> int:
+        pairs = self._overlay.get(user_id)
+        if pairs is not None and neighbour_id in pairs:
+            return pairs[neighbour_id]
+
+        indices, directions = self._base_row(user_id)
+        node = np.searchsorted(self.user_ids, neighbour_id)
+        if node >= len(self.user_ids) or self.user_ids[node] != neighbour_id:
+            return 0
+        position = np.searchsorted(indices, node)
+        if position < len(indices) and indices[position] == node:
+            return int(directions[position])
+        return 0
+
+    def _set_directions(self, user_id: int, neighbour_id: int, bits: int) -> None:
+        pairs = self._overlay.setdefault(user_id, {})
+        if neighbour_id not in pairs:
+            self._overlay_pairs += 1
+        pairs[neighbour_id] = bits
+
+    def apply_change(self, user_id: int, connected_user_id: int, is_active: bool) -> None:
+        """
+        Apply the new state of one directed ``user_connections`` row.
+
+        Ignored until the graph is loaded; the load reads the row anyway.
+        """
+        if not self._loaded or user_id == connected_user_id:
+            return
+
+        bits = self._directions(user_id, connected_user_id)
+        bits = bits | OUTGOING if is_active else bits & ~OUTGOING
+        self._set_directions(user_id, connected_user_id, bits)
+        self._set_directions(connected_user_id, user_id, int(_swap_directions(bits)))
+
+        if self._overlay_pairs > self.compact_threshold:
+            self.compact()
+
+    def apply_changes(self, changes: Iterable[Tuple[int, int, bool]]) -> None:
+        """Apply ``(user_id, connected_user_id, is_active)`` row states in order."""
+        for user_id, connected_user_id, is_active in changes:
+            self.apply_change(user_id, connected_user_id, is_active)
+
+    # Queries
+
+    def neighbours(self, user_id: int) -> np.ndarray:
+        """Sorted user IDs of everyone connected to a user."""
+        indices, _ = self._base_row(user_id)
+        neighbour_ids = self.user_ids[indices]
+
+        pairs = self._overlay.get(user_id)
+        if pairs:
+            overridden = np.fromiter(pairs.keys(), dtype=np.int64, count=len(pairs))
+            connected = np.fromiter((n for n, bits in pairs.items() if bits), dtype=np.int64)
+            neighbour_ids = np.union1d(neighbour_ids[~np.isin(neighbour_ids, overridden)], connected)
+        return neighbour_ids
+
+    def is_connected(self, user_id: int, other_user_id: int) -> bool:
+        return self._directions(user_id, other_user_id) != 0
+
+    def mutual(self, user_id: int, other_user_id: int) -> np.ndarray:
+        """Sorted user IDs connected to both users."""
+        return np.intersect1d(self.neighbours(user_id), self.neighbours(other_user_id), assume_unique=True)
+
+    def mutual_count(self, user_id: int, other_user_id: int) -> int:
+        return len(self.mutual(user_id, other_user_id))
+
+    def friends_of_friends(self, user_id: int, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank users two hops away by how many connections they share with the user.
+
+        Args:
+            user_id: User to suggest connections for
+            limit: Maximum number of candidates
+
+        Returns:
+            Tuple of (candidate user IDs, mutual counts), ordered by count
+            descending then user ID
+        """
+        friends = self.neighbours(user_id)
+        if not len(friends):
+            return EMPTY, EMPTY
+
+        # Friends untouched by the overlay are gathered from the CSR arrays in one go
+        nodes = np.searchsorted(self.user_ids, friends)
+        nodes = np.minimum(nodes, max(len(self.user_ids) - 1, 0))
+        in_base = (self.user_ids[nodes] == friends) if len(self.user_ids) else np.zeros(len(friends), dtype=bool)
+        in_overlay = np.fromiter((int(f) in self._overlay for f in friends), dtype=bool, count=len(friends)) \
+            if self._overlay else np.zeros(len(friends), dtype=bool)
+        fast = nodes[in_base & ~in_overlay]
+
+        starts, ends = self.indptr[fast], self.indptr[fast + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        two_hops = [self.user_ids[self.indices[offsets]]]
+        two_hops += [self.neighbours(int(f)) for f in friends[in_overlay]]
+
+        candidates, counts = np.unique(np.concatenate(two_hops), return_counts=True)
+        keep = ~np.isin(candidates, friends) & (candidates != user_id)
+        candidates, counts = candidates[keep], counts[keep]
+
+        # candidates are sorted, so a stable sort on -count breaks ties by user ID
+        order = np.argsort(-counts, kind="stable")[:limit]
+        return candidates[order], counts[order]
+
+    # Loading
+
+    def is_stale(self) -> bool:
+        return not self._loaded or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def lags(self) -> bool:
+        """Whether a refresh would re-read more than ``max_refresh_lag_seconds`` of writes."""
+        return self._watermark is not None and \
+            datetime.now(timezone.utc) - self._watermark > timedelta(seconds=self.max_refresh_lag_seconds)
+
+    async def _open_transactions_start(self, db: AsyncSession) -> datetime:
+        """
+        Start of the oldest transaction that could be writing connections, this one included.
+
+        Rows written by transactions that have not committed yet are stamped
+        at or after it, so the next refresh reads from here. Idle sessions,
+        background workers (e.g. autovacuum) and other roles' sessions are
+        left out.
+        """
+        result = await db.execute(text(
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND usename = current_user "
+            "AND backend_type = 'client backend' AND state <> 'idle'"
+        ))
+        return result.scalar()
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the graph from every active row."""
+        watermark = await self._open_transactions_start(db)
+        result = await db.stream(
+            select(UserConnection.user_id, UserConnection.connected_user_id)
+            .where(UserConnection.is_active == True)
+        )
+        sources, targets = [], []
+        async for partition in result.partitions(50000):
+            edges = np.array(partition, dtype=np.int64).reshape(-1, 2)
+            sources.append(edges[:, 0])
+            targets.append(edges[:, 1])
+
+        self.build(
+            np.concatenate(sources) if sources else EMPTY,
+            np.concatenate(targets) if targets else EMPTY
+        )
+        self._watermark = watermark
+        self._refreshed_at = self._loaded_at = time.monotonic()
+        logger.info(f"Connection graph loaded: {len(self.user_ids)} users, {self.edge_count} connections")
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """
+        Apply rows updated since the last load or refresh.
+
+        Rows written at or after the watermark are re-read; applying a row
+        twice is harmless, since it sets absolute state.
+
+        Returns:
+            Number of rows applied
+        """
+        watermark = await self._open_transactions_start(db)
+        query = select(
+            UserConnection.user_id,
+            UserConnection.connected_user_id,
+            UserConnection.is_active
+        ).order_by(UserConnection.last_updated_at)
+        if self._watermark is not None:
+            query = query.where(UserConnection.last_updated_at >= self._watermark)
+        rows = (await db.execute(query)).all()
+
+        self.apply_changes((user_id, connected_user_id, bool(is_active))
+                           for user_id, connected_user_id, is_active in rows)
+        self._watermark = watermark
+        self._refreshed_at = time.monotonic()
+        return len(rows)
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """
+        Load the graph on first use, refresh it once ``refresh_seconds`` have
+        passed and reload it once ``rebuild_seconds`` have, or when the
+        refresh window has grown too long.
+        """
+        if not self.is_stale():
+            return
+        async with self._lock:
+            if not self._loaded or time.monotonic() - self._loaded_at >= self.rebuild_seconds:
+                await self.load(db)
+            elif self.lags():
+                logger.warning(f"Connection graph refresh window starts at {self._watermark}, reloading")
+                await self.load(db)
+            elif self.is_stale():
+                await self.refresh(db)
+
+    def clear(self) -> None:
+        """Drop the graph; the next use loads it again."""
+        self.build(EMPTY, EMPTY)
+        self._loaded = False
+        self._watermark = None
+        self._refreshed_at = self._loaded_at = 0.0
+
+# Global graph instance
+connection_graph = ConnectionGraph.from_settings(settings)
@@ -0,0 +1,311 @@
+"""
+Dashboard aggregates.
+
+The dashboard's widgets all summarize the same data, so the user's active
+transactions from the last ``CHART_MONTHS`` calendar months are fetched once
+(two index range scans, one per side) and loaded into NumPy arrays; every
+widget is then a few vectorized reductions over those arrays. Outstanding
+debts are not bounded by that window, so they come from ``pair_balances``.
+
+Spend is what the user paid, i.e. transactions where they are the payer.
+Months and days are UTC. The encoded payload is cached per user for a few
+seconds, which absorbs the bursts of reloads a dashboard sees.
+"""
+import time
+import calendar
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter
+from sqlalchemy import select, and_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.db.partitions import add_months
+from app.models.transaction import Transaction
+from app.schemas.dashboard import (
+    Dashboard,
+    SpendAnalyzer,
+    GroupSpend,
+    MonthlyBudget,
+    ChartPoint,
+    ExpenseChart,
+    DashboardTransaction,
+    DebtsOwed
+)
+from app.schemas.pair_balance import CounterpartyBalance
+from app.services.pair_balance import get_counterparty_balances
+from app.services.settlement import to_cents, from_cents
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+CHART_MONTHS = 12
+TOP_EXPENSES_LIMIT = 5
+RECENT_TRANSACTIONS_LIMIT = 10
+GROUP_BREAKDOWN_LIMIT = 5
+DEBTS_LIMIT = 5
+ZERO = Decimal("0.00")
+
+DASHBOARD_COLUMNS = (
+    Transaction.id,
+    Transaction.payer_id,
+    Transaction.payee_id,
+    Transaction.group_id,
+    Transaction.transaction_amount,
+    Transaction.description,
+    Transaction.is_settled,
+    Transaction.created_at
+)
+
+dashboard_adapter = TypeAdapter(Dashboard)
+
+async def get_dashboard_rows(db: AsyncSession, user_id: int, since: datetime) -> list:
+    """
+    Get a user's active transactions created since ``since``, on either side.
+
+    Each side is a range scan of its ``(side, created_at, id)`` index and
+    only touches partitions from ``since`` onwards.
+    """
+    def branch(side_column):
+        return select(*DASHBOARD_COLUMNS).where(and_(
+            side_column == user_id,
+            Transaction.created_at >= since,
+            Transaction.is_active == True
+        ))
+
+    result = await db.execute(union_all(branch(Transaction.payer_id), branch(Transaction.payee_id)))
+    return result.all()
+
+def _percentage(part: int, total: int) -> float:
+    return round(part * 100 / total, 1) if total else 0.0
+
+def _group_breakdown(group_ids: np.ndarray, cents: np.ndarray) -> List[GroupSpend]:
+    """Largest per-group totals, -1 standing for direct transactions."""
+    if not len(cents):
+        return []
+    groups, inverse = np.unique(group_ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=cents).astype(np.int64)
+    total = int(totals.sum())
+    order = np.argsort(-totals, kind="stable")[:GROUP_BREAKDOWN_LIMIT]
+    return [
+        GroupSpend(
+            group_id=int(groups[i]) if groups[i] >= 0 else None,
+            amount=from_cents(int(totals[i])),
+            percentage=_percentage(int(totals[i]), total)
+        )
+        for i in order
+    ]
+
+def compute_dashboard(
+    user_id: int,
+    rows: Sequence,
+    balances: Sequence[Tuple[int, Decimal]],
+    now: datetime
+) -> Dashboard:
+    """
+    Compute every dashboard widget.
+
+    Args:
+        user_id: User the dashboard is for
+        rows: Transactions from ``get_dashboard_rows``
+        balances: (counterparty_id, balance) from ``get_counterparty_balances``
+        now: Current time (timezone-aware)
+
+    Returns:
+        Dashboard payload
+    """
+    now = now.astimezone(timezone.utc)
+    month_start = date(now.year, now.month, 1)
+    first_month = add_months(month_start, -(CHART_MONTHS - 1))
+    days_in_month = calendar.monthrange(now.year, now.month)[1]
+    current = CHART_MONTHS - 1
+
+    n = len(rows)
+    ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=n)
+    payer_ids = np.fromiter((row.payer_id for row in rows), dtype=np.int64, count=n)
+    payee_ids = np.fromiter((row.payee_id for row in rows), dtype=np.int64, count=n)
+    group_ids = np.fromiter((-1 if row.group_id is None else row.group_id for row in rows), dtype=np.int64, count=n)
+    cents = np.fromiter((to_cents(row.transaction_amount) for row in rows), dtype=np.int64, count=n)
+    # Epoch microseconds; far cheaper than converting datetimes one by one
+    created = np.rint(
+        np.fromiter((row.created_at.timestamp() for row in rows), dtype=np.float64, count=n) * 1e6
+    ).astype(np.int64).astype("datetime64[us]")
+
+    month_index = (created.astype("datetime64[M]") - np.datetime64(first_month, "M")).astype(np.int64)
+    day_index = (created.astype("datetime64[D]") - np.datetime64(month_start, "D")).astype(np.int64)
+    # Rows stamped past the current month (clock skew) are listed but not charted
+    paid = (payer_ids == user_id) & (month_index <= current)
+    paid_this_month = paid & (month_index == current)
+
+    # Spend per month and per day of the current month
+    monthly = np.bincount(month_index[paid], weights=cents[paid], minlength=CHART_MONTHS).astype(np.int64)
+    daily = np.bincount(day_index[paid_this_month], weights=cents[paid_this_month], minlength=days_in_month)
+    daily_cumulative = np.cumsum(daily.astype(np.int64)[:now.day])
+
+    month_total = int(monthly[current])
+    previous_total = int(monthly[current - 1])
+    year_total = int(monthly.sum())
+
+    spend_analyzer = SpendAnalyzer(
+        month_total=from_cents(month_total),
+        previous_month_total=from_cents(previous_total),
+        percent_change=round((month_total - previous_total) * 100 / previous_total, 1) if previous_total else None,
+        year_total=from_cents(year_total),
+        month_by_group=_group_breakdown(group_ids[paid_this_month], cents[paid_this_month]),
+        year_by_group=_group_breakdown(group_ids[paid], cents[paid])
+    )
+
+    daily_average = month_total // now.day
+    monthly_budget = MonthlyBudget(
+        month_start=month_start,
+        spent=from_cents(month_total),
+        days_elapsed=now.day,
+        days_in_month=days_in_month,
+        daily_average=from_cents(daily_average),
+        projected_total=from_cents(month_total * days_in_month // now.day)
+    )
+
+    expense_chart = ExpenseChart(
+        daily_cumulative=[
+            ChartPoint(period=date(now.year, now.month, day + 1), amount=from_cents(int(amount)))
+            for day, amount in enumerate(daily_cumulative)
+        ],
+        monthly=[
+            ChartPoint(period=add_months(first_month, i), amount=from_cents(int(amount)))
+            for i, amount in enumerate(monthly)
+        ]
+    )
+
+    def listed(indexes: np.ndarray) -> List[DashboardTransaction]:
+        return [
+            DashboardTransaction(
+                id=rows[i].id,
+                type="receivable" if paid[i] else "borrowing",
+                counterparty_id=int(payee_ids[i] if paid[i] else payer_ids[i]),
+                group_id=rows[i].group_id,
+                amount=rows[i].transaction_amount,
+                description=rows[i].description,
+                is_settled=rows[i].is_settled,
+                created_at=rows[i].created_at
+            )
+            for i in indexes
+        ]
+
+    this_month = np.flatnonzero(paid_this_month)
+    top = this_month[np.argsort(-cents[this_month], kind="stable")[:TOP_EXPENSES_LIMIT]]
+    # Newest first, ties broken by ID
+    recent = np.lexsort((ids, created))[::-1][:RECENT_TRANSACTIONS_LIMIT]
+
+    receivable = sum((balance for _, balance in balances if balance > 0), ZERO)
+    owed = -sum((balance for _, balance in balances if balance < 0), ZERO)
+    by_balance = sorted(balances, key=lambda item: item[1])
+    debts_owed = DebtsOwed(
+        total_owed=owed,
+        total_receivable=receivable,
+        net_position=receivable - owed,
+        owes=[CounterpartyBalance(counterparty_id=c, balance=b) for c, b in by_balance[:DEBTS_LIMIT] if b < 0],
+        owed_by=[CounterpartyBalance(counterparty_id=c, balance=b) for c, b in reversed(by_balance[-DEBTS_LIMIT:]) if b > 0]
+    )
+
+    return Dashboard(
+        as_of=now,
+        spend_analyzer=spend_analyzer,
+        monthly_budget=monthly_budget,
+        expense_chart=expense_chart,
+        top_expenses=listed(top),
+        debts_owed=debts_owed,
+        recent_transactions=listed(recent)
+    )
+
+class DashboardCache:
+    """
+    Bounded LRU of encoded dashboard payloads per user with a short TTL.
+
+    Ledger writes drop both parties' entries in the process that made them;
+    the TTL bounds how stale a dashboard cached by another process can be.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: int = 15, max_entries: int = 10000):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # Structure: {user_id: (expires_at, payload)}
+        self._entries: "OrderedDict[int, Tuple[float, bytes]]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, settings) -> "DashboardCache":
+        """Create a cache configured from application settings."""
+        return cls(
+            enabled=settings.DASHBOARD_CACHE_ENABLED,
+            ttl=settings.DASHBOARD_CACHE_TTL_SECONDS,
+            max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES
+        )
+
+    def get(self, user_id: int) -> Optional[bytes]:
+        """Get a user's cached payload, or None if not cached."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return payload
+
+    def set(self, user_id: int, payload: bytes) -> None:
+        """Cache a user's encoded payload."""
+        if not self.enabled:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop the entries of the given users."""
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+    def invalidate_parties(self, transactions: Iterable) -> None:
+        """Drop the entries of every payer and payee of the given transactions."""
+        self.invalidate(*{user_id for row in transactions for user_id in (row.payer_id, row.payee_id)})
+
+# Global cache instance
+dashboard_cache = DashboardCache.from_settings(settings)
+
+async def get_dashboard(db: AsyncSession, user_id: int) -> bytes:
+    """
+    Get a user's encoded dashboard, from the cache when fresh.
+
+    Args:
+        db: Database session
+        user_id: User the dashboard is for
+
+    Returns:
+        UTF-8 encoded JSON bytes of a ``Dashboard``
+    """
+    payload = dashboard_cache.get(user_id)
+    if payload is not None:
+        return payload
+
+    now = datetime.now(timezone.utc)
+    since = datetime.combine(add_months(date(now.year, now.month, 1), -(CHART_MONTHS - 1)), datetime.min.time(), timezone.utc)
+    rows = await get_dashboard_rows(db, user_id, since)
+    balances = await get_counterparty_balances(db, user_id)
+
+    payload = dashboard_adapter.dump_json(compute_dashboard(user_id, rows, balances, now))
+    dashboard_cache.set(user_id, payload)
+    return payload
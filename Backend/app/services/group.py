@@ -0,0 +1,405 @@
+import logging
+from typing import Optional, Iterable, Set, List, FrozenSet, NamedTuple, Sequence
+from sqlalchemy import select, insert, update, and_, exists, union, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from app.models.group import Group
+from app.models.group_member import GroupMember
+from app.models.user import User
+from app.services.group_membership import group_membership_index
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+async def get_active_group_by_id(db: AsyncSession, group_id: int) -> Optional[Group]:
+    """
+    Get an active group by ID.
+
+    Args:
+        db: Database session
+        group_id: Group ID to lookup
+
+    Returns:
+        Group object if found and active, None otherwise
+    """
+    query = select(Group).where(
+        and_(
+            Group.id == group_id,
+            Group.is_active == True
+        )
+    )
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def get_user_group_ids(db: AsyncSession, user_id: int) -> FrozenSet[int]:
+    """
+    Get the IDs of every active group a user can access, through the membership index.
+
+    A user can access groups they are an active member of and groups they
+    administer. A cached result costs no database round-trip.
+
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+
+    Returns:
+        Frozenset of group IDs
+    """
+    group_ids = group_membership_index.get(user_id)
+    if group_ids is not None:
+        return group_ids
+
+    token = group_membership_index.token()
+    memberships = (
+        select(GroupMember.group_id)
+        .join(Group, Group.id == GroupMember.group_id)
+        .where(
+            and_(
+                GroupMember.user_id == user_id,
+                GroupMember.is_active == True,
+                Group.is_active == True
+            )
+        )
+    )
+    administered = select(Group.id).where(
+        and_(
+            Group.admin_id == user_id,
+            Group.is_active == True
+        )
+    )
+    result = await db.execute(union(memberships, administered))
+    group_ids = frozenset(result.scalars())
+
+    group_membership_index.set(user_id, group_ids, token)
+    return group_ids
+
+async def is_group_member(db: AsyncSession, group_id: int, user_id: int) -> bool:
+    """
+    Check if a user is an active member or the admin of an active group.
+
+    Args:
+        db: Database session
+        group_id: Group ID to check
+        user_id: User ID to check
+
+    Returns:
+        True if the user can access the group, False otherwise
+    """
+    return group_id in await get_user_group_ids(db, user_id)
+
+async def get_active_member_ids(db: AsyncSession, group_id: int, user_ids: Iterable[int]) -> Set[int]:
+    """
+    Get which of the given users are active members of a group, in one query.
+
+    The group's admin always counts as a member.
+
+    Args:
+        db: Database session
+        group_id: Group ID to check
+        user_ids: User IDs to check
+
+    Returns:
+        Set of the given user IDs that are active members or the admin
+    """
+    user_ids = list(user_ids)
+    members = select(GroupMember.user_id).where(
+        and_(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id.in_(user_ids),
+            GroupMember.is_active == True
+        )
+    )
+    admin = select(Group.admin_id).where(
+        and_(
+            Group.id == group_id,
+            Group.admin_id.in_(user_ids)
+        )
+    )
+    result = await db.execute(union(members, admin))
+    return set(result.scalars())
+
+async def get_user_groups(db: AsyncSession, user_id: int) -> List[Group]:
+    """
+    Get every active group a user can access.
+
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+
+    Returns:
+        List of Group objects ordered by ID
+    """
+    group_ids = await get_user_group_ids(db, user_id)
+    if not group_ids:
+        return []
+
+    query = select(Group).where(Group.id.in_(group_ids)).order_by(Group.id)
+    result = await db.execute(query)
+    return list(result.scalars())
+
+async def get_group_members(db: AsyncSession, group_id: int) -> List[GroupMember]:
+    """
+    Get a group's active members.
+
+    Args:
+        db: Database session
+        group_id: Group ID to lookup
+
+    Returns:
+        List of GroupMember objects ordered by user ID
+    """
+    query = (
+        select(GroupMember)
+        .where(
+            and_(
+                GroupMember.group_id == group_id,
+                GroupMember.is_active == True
+            )
+        )
+        .order_by(GroupMember.user_id)
+    )
+    result = await db.execute(query)
+    return list(result.scalars())
+
+async def create_group(db: AsyncSession, admin_id: int, group_name: str) -> Group:
+    """
+    Create a group with the given user as its admin and first member.
+
+    Args:
+        db: Database session
+        admin_id: ID of the creating user
+        group_name: Name of the group
+
+    Returns:
+        Created Group object
+    """
+    result = await db.execute(
+        insert(Group).values(admin_id=admin_id, group_name=group_name, is_active=True).returning(Group)
+    )
+    group = result.scalar_one()
+
+    await db.execute(insert(GroupMember).values(group_id=group.id, user_id=admin_id, is_active=True))
+    await db.commit()
+
+    group_membership_index.invalidate(admin_id)
+    logger.info(f"Group created: {group.id} by user {admin_id}")
+    return group
+
+async def add_group_member(db: AsyncSession, group_id: int, user_id: int) -> GroupMember:
+    """
+    Add a user to a group, reactivating a previous membership if there is one.
+
+    Args:
+        db: Database session
+        group_id: Group ID
+        user_id: ID of the user to add
+
+    Returns:
+        Active GroupMember object
+
+    Raises:
+        HTTPException: If the user doesn't exist or is inactive
+    """
+    user_is_active = await db.execute(
+        select(exists().where(and_(User.id == user_id, User.is_active == True)))
+    )
+    if not user_is_active.scalar_one():
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="User not found or inactive"
+        )
+
+    stmt = pg_insert(GroupMember).values(group_id=group_id, user_id=user_id, is_active=True)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GroupMember.group_id, GroupMember.user_id],
+        set_={"is_active": True, "last_updated_at": func.now()}
+    ).returning(GroupMember)
+    result = await db.execute(stmt.execution_options(populate_existing=True))
+    member = result.scalar_one()
+    await db.commit()
+
+    group_membership_index.invalidate(user_id)
+    logger.info(f"User {user_id} added to group {group_id}")
+    return member
+
+async def remove_group_member(db: AsyncSession, group, user_id: int) -> bool:
+    """
+    Deactivate a user's membership of a group.
+
+    Args:
+        db: Database session
+        group: Group object
+        user_id: ID of the user to remove
+
+    Returns:
+        True if an active membership was deactivated, False if there was none
+
+    Raises:
+        HTTPException: If the user is the group's admin
+    """
+    if group.admin_id == user_id:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="The group admin cannot be removed from the group"
+        )
+
+    result = await db.execute(
+        update(GroupMember)
+        .where(
+            and_(
+                GroupMember.group_id == group.id,
+                GroupMember.user_id == user_id,
+                GroupMember.is_active == True
+            )
+        )
+        .values(is_active=False)
+        .returning(GroupMember.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    removed = result.scalar_one_or_none() is not None
+    await db.commit()
+
+    if removed:
+        group_membership_index.invalidate(user_id)
+        logger.info(f"User {user_id} removed from group {group.id}")
+    return removed
+
+class MembershipChanges(NamedTuple):
+    """User IDs affected by a batch membership change, each list sorted."""
+    added: List[int]
+    reactivated: List[int]
+    removed: List[int]
+    unchanged: List[int]
+
+# Upsert many memberships; rows that are already active are left untouched and
+# not returned. xmax is 0 only for freshly inserted rows, which tells inserts
+# from reactivations.
+BATCH_ADD_MEMBERS_SQL = """
+    INSERT INTO group_members (group_id, user_id, is_active)
+    SELECT CAST(:group_id AS BIGINT), requested.user_id, TRUE
+    FROM unnest(CAST(:user_ids AS BIGINT[])) AS requested(user_id)
+    ORDER BY requested.user_id
+    ON CONFLICT (group_id, user_id) DO UPDATE SET
+        is_active = TRUE,
+        last_updated_at = now()
+    WHERE group_members.is_active IS DISTINCT FROM TRUE
+    RETURNING user_id, (xmax = 0) AS inserted
+"""
+
+BATCH_REMOVE_MEMBERS_SQL = """
+    UPDATE group_members SET is_active = FALSE, last_updated_at = now()
+    WHERE group_id = :group_id
+      AND user_id = ANY(CAST(:user_ids AS BIGINT[]))
+      AND is_active
+    RETURNING user_id
+"""
+
+async def batch_update_members(
+    db: AsyncSession,
+    group,
+    add: Sequence[int],
+    remove: Sequence[int]
+) -> MembershipChanges:
+    """
+    Add and remove many group members with set-based statements.
+
+    Every user to add must be an active user, checked with one query. All
+    changes commit together, then the affected users' membership index
+    entries are invalidated.
+
+    Args:
+        db: Database session
+        group: Group object
+        add: IDs of users to add (or reactivate)
+        remove: IDs of users to deactivate
+
+    Returns:
+        MembershipChanges describing what actually changed
+
+    Raises:
+        HTTPException: If the request is inconsistent or names unknown/inactive users
+    """
+    add_ids, remove_ids = set(add), set(remove)
+    if add_ids & remove_ids:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="A user cannot be both added and removed"
+        )
+    if group.admin_id in remove_ids:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="The group admin cannot be removed from the group"
+        )
+
+    if add_ids:
+        result = await db.execute(
+            select(User.id).where(and_(User.id.in_(add_ids), User.is_active == True))
+        )
+        invalid = sorted(add_ids - set(result.scalars()))
+        if invalid:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail=f"Users not found or inactive: {', '.join(map(str, invalid))}"
+            )
+
+    added, reactivated, removed = [], [], []
+    if add_ids:
+        result = await db.execute(text(BATCH_ADD_MEMBERS_SQL), {
+            "group_id": group.id,
+            "user_ids": sorted(add_ids)
+        })
+        for user_id, inserted in result:
+            (added if inserted else reactivated).append(user_id)
+
+    if remove_ids:
+        result = await db.execute(text(BATCH_REMOVE_MEMBERS_SQL), {
+            "group_id": group.id,
+            "user_ids": sorted(remove_ids)
+        })
+        removed = list(result.scalars())
+
+    await db.commit()
+
+    changed = set(added) | set(reactivated) | set(removed)
+    if changed:
+        group_membership_index.invalidate(*changed)
+        logger.info(
+            f"Group {group.id} membership batch: {len(added)} added, "
+            f"{len(reactivated)} reactivated, {len(removed)} removed"
+        )
+
+    return MembershipChanges(
+        added=sorted(added),
+        reactivated=sorted(reactivated),
+        removed=sorted(removed),
+        unchanged=sorted((add_ids | remove_ids) - changed)
+    )
+
+async def deactivate_group(db: AsyncSession, group_id: int) -> bool:
+    """
+    Deactivate (soft delete) a group.
+
+    Args:
+        db: Database session
+        group_id: Group ID to deactivate
+
+    Returns:
+        True if the group was active and is now deactivated
+    """
+    result = await db.execute(
+        update(Group)
+        .where(and_(Group.id == group_id, Group.is_active == True))
+        .values(is_active=False)
+        .returning(Group.id)
+        .execution_options(synchronize_session=False)
+    )
+    deactivated = result.scalar_one_or_none() is not None
+    await db.commit()
+
+    if deactivated:
+        group_membership_index.invalidate_group(group_id)
+        logger.info(f"Group deactivated: {group_id}")
+    return deactivated
@@ -0,0 +1,99 @@
+"""
+Per-process index of group memberships.
+
+Maps each user ID to the frozenset of group IDs the user can access (active
+memberships of active groups, plus groups the user administers), so group
+authorization checks are a set lookup instead of a database round-trip.
+
+Entries expire after ``ttl`` seconds, which bounds how long a membership
+change made by another worker can go unnoticed; changes made by this process
+invalidate the affected entries immediately.
+"""
+import time
+import logging
+from collections import OrderedDict
+from typing import FrozenSet, Optional, Tuple
+
+from app.core.config.settings import get_settings
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class GroupMembershipIndex:
+    """
+    Bounded LRU of user_id -> frozenset of group_ids with a TTL.
+
+    Loads race with invalidations: a caller takes a ``token()`` before
+    querying the database and passes it to ``set``, which drops the result
+    if any invalidation happened in between.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: int = 30, max_entries: int = 50000):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # Structure: {user_id: (expires_at, frozenset of group_ids)}
+        self._entries: "OrderedDict[int, Tuple[float, FrozenSet[int]]]" = OrderedDict()
+        self._generation = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "GroupMembershipIndex":
+        """Create an index configured from application settings."""
+        return cls(
+            enabled=settings.GROUP_MEMBERSHIP_CACHE_ENABLED,
+            ttl=settings.GROUP_MEMBERSHIP_CACHE_TTL_SECONDS,
+            max_entries=settings.GROUP_MEMBERSHIP_CACHE_MAX_ENTRIES
+        )
+
+    def get(self, user_id: int) -> Optional[FrozenSet[int]]:
+        """Get a user's cached group IDs, or None if not cached."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, group_ids = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return group_ids
+
+    def token(self) -> int:
+        """Get the current invalidation generation, to pass to ``set``."""
+        return self._generation
+
+    def set(self, user_id: int, group_ids: FrozenSet[int], token: int) -> None:
+        """Cache a user's group IDs loaded since ``token`` was taken."""
+        if not self.enabled or token != self._generation:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, group_ids)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop the entries of users whose memberships changed."""
+        self._generation += 1
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+    def invalidate_group(self, group_id: int) -> None:
+        """Drop every entry that includes a group (e.g. when it is deactivated)."""
+        self._generation += 1
+        stale = [user_id for user_id, (_, group_ids) in self._entries.items() if group_id in group_ids]
+        for user_id in stale:
+            del self._entries[user_id]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._generation += 1
+        self._entries.clear()
+
+# Global index instance
+group_membership_index = GroupMembershipIndex.from_settings(settings)
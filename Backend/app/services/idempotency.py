@@ -0,0 +1,446 @@
+"""
+Idempotency-Key handling for ledger writes.
+
+A write sent with an ``Idempotency-Key`` header runs at most once per user and
+key; retries get the stored response back. Completed responses live in the
+``idempotency_keys`` table until they expire, with a bounded in-process LRU in
+front of it so a retry usually costs no database round-trip at all.
+
+The key row, the ledger write and the stored response are one database
+transaction: the key is inserted first, the write runs on a session whose
+commits only release savepoints, and the response is stored before the single
+commit. A key is therefore never visible without its response, and a write
+that did not commit leaves no key behind, whatever point a process dies at.
+The write's post-commit effects (analytics rows, cache invalidation; see
+``app.db.post_commit``) run only after that commit.
+
+Duplicates arriving while the original is still running are coalesced: within
+one process they wait for the original's outcome; across processes the
+duplicate's insert of the key waits on the original's uncommitted row (for at
+most ``lock_timeout`` seconds, then 409) and replays its response once it
+commits.
+"""
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Row, select, update, delete, tuple_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, Request
+from starlette.status import HTTP_409_CONFLICT, HTTP_422_UNPROCESSABLE_ENTITY
+
+from app.core.config.settings import get_settings
+from app.core.utils.serialization import FastJSONResponse
+from app.db import post_commit
+from app.db.database import AsyncSessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PURGE_BATCH_SIZE = 10000
+# SQLSTATE of a lock wait that ran into lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+class IdempotentResponse(NamedTuple):
+    """A stored write response: HTTP status code and encoded JSON body."""
+    status_code: int
+    body: bytes
+
+Fingerprint = Callable[[], Awaitable[bytes]]
+
+def request_fingerprint(method: str, path: str, body: bytes = b"") -> bytes:
+    """
+    Hash a request so a reused key can be told apart from a genuine retry.
+
+    Args:
+        method: HTTP method
+        path: Request path
+        body: Canonical request body, if any
+
+    Returns:
+        SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(method.upper().encode("ascii"))
+    digest.update(b"\0")
+    digest.update(path.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.digest()
+
+class StreamFingerprint:
+    """
+    Fingerprint of a request whose body is streamed to the handler, not buffered.
+
+    The handler reads the body through ``stream``, which hashes it on the way;
+    awaiting the fingerprint hashes whatever the handler did not read and
+    returns the digest.
+    """
+
+    def __init__(self, method: str, path: str, chunks: AsyncIterator[bytes], prefix: bytes = b""):
+        self._digest = hashlib.sha256()
+        for part in (method.upper().encode("ascii"), path.encode("utf-8"), prefix):
+            self._digest.update(part)
+            self._digest.update(b"\0")
+        self._chunks = chunks
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """The request body, hashed as it is read."""
+        async for chunk in self._chunks:
+            self._digest.update(chunk)
+            yield chunk
+
+    async def __call__(self) -> bytes:
+        async for chunk in self._chunks:
+            self._digest.update(chunk)
+        return self._digest.digest()
+
+def _key_mismatch() -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key was already used for a different request"
+    )
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is already in progress",
+        headers={"Retry-After": "1"}
+    )
+
+def _replay(stored: Tuple[bytes, IdempotentResponse], request_hash: bytes) -> IdempotentResponse:
+    """The stored response, if it belongs to the same request."""
+    stored_hash, response = stored
+    if stored_hash != request_hash:
+        raise _key_mismatch()
+    return response
+
+class IdempotencyStore:
+    """
+    Executes keyed writes at most once and replays their responses.
+
+    The local tier holds up to ``local_max_entries`` completed responses for
+    at most ``ttl`` seconds. Responses are immutable once stored, so the local
+    tier never needs invalidating.
+    """
+
+    def __init__(self, ttl: int = 86400, lock_timeout: int = 60, local_max_entries: int = 10000):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.local_max_entries = local_max_entries
+
+        # Structure: {(user_id, key): (expires_at, request_hash, response)}
+        self._responses: "OrderedDict[Tuple[int, str], Tuple[float, bytes, IdempotentResponse]]" = OrderedDict()
+        # Structure: {(user_id, key): future of the original's (request_hash, response)}
+        self._in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "IdempotencyStore":
+        """Create a store configured from application settings."""
+        return cls(
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+            local_max_entries=settings.IDEMPOTENCY_LOCAL_MAX_ENTRIES
+        )
+
+    def _get_local(self, cache_key: Tuple[int, str]) -> Optional[Tuple[bytes, IdempotentResponse]]:
+        entry = self._responses.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, request_hash, response = entry
+        if expires_at <= time.time():
+            del self._responses[cache_key]
+            return None
+        self._responses.move_to_end(cache_key)
+        return request_hash, response
+
+    def _set_local(self, cache_key: Tuple[int, str], request_hash: bytes, response: IdempotentResponse, expires_at: float) -> None:
+        self._responses[cache_key] = (expires_at, request_hash, response)
+        self._responses.move_to_end(cache_key)
+        while len(self._responses) > self.local_max_entries:
+            self._responses.popitem(last=False)
+
+    async def _reserve(self, db: AsyncSession, user_id: int, key: str) -> Optional[Row]:
+        """
+        Insert the key in the session's transaction, or return the stored row's
+        hash, status, body and expiry (plain values, safe to use after a rollback).
+
+        Waits while another transaction holds an uncommitted row for the key.
+        An expired response is taken over in the same statement. The inserted
+        row's hash and expiry are placeholders until ``execute`` completes it.
+
+        Raises:
+            HTTPException: 409 if the wait exceeds ``lock_timeout``
+        """
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            request_hash=b"",
+            expires_at=now + timedelta(seconds=self.ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "response_body": None,
+                "created_at": now,
+                "expires_at": stmt.excluded.expires_at
+            },
+            where=IdempotencyKey.expires_at < now
+        ).returning(IdempotencyKey.user_id)
+
+        try:
+            await db.execute(
+                text("SELECT set_config('lock_timeout', :timeout, true)"),
+                {"timeout": f"{self.lock_timeout}s"}
+            )
+            result = await db.execute(stmt)
+            claimed = result.scalar_one_or_none() is not None
+            await db.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                raise
+            await db.rollback()
+            raise _in_progress()
+
+        if claimed:
+            return None
+
+        result = await db.execute(
+            select(
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body,
+                IdempotencyKey.expires_at
+            ).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key
+            )
+        )
+        return result.one()
+
+    async def _execute_once(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        key: str,
+        fingerprint: Fingerprint,
+        handler: Callable[[AsyncSession], Awaitable[IdempotentResponse]]
+    ) -> Tuple[bytes, IdempotentResponse, bool]:
+        """Reserve the key, run the write and store its response in one transaction."""
+        cache_key = (user_id, key)
+        try:
+            existing = await self._reserve(db, user_id, key)
+            if existing is not None:
+                await db.rollback()
+                if existing.status_code is None:
+                    # Only keys reserved before responses were committed with
+                    # their write lack one; they expire after lock_timeout
+                    raise _in_progress()
+                stored = (existing.request_hash, IdempotentResponse(existing.status_code, existing.response_body))
+                self._set_local(cache_key, *stored, existing.expires_at.timestamp())
+                return existing.request_hash, _replay(stored, await fingerprint()), True
+
+            # Commits and rollbacks inside the handler only release or roll back
+            # a savepoint; the key's transaction is committed once, below, and
+            # the handler's post-commit effects wait for that commit
+            connection = await db.connection()
+            async with AsyncSession(
+                bind=connection,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+                autoflush=False,
+                info=post_commit.deferred_info()
+            ) as write_db:
+                response = await handler(write_db)
+
+            request_hash = await fingerprint()
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                .values(
+                    request_hash=request_hash,
+                    status_code=response.status_code,
+                    response_body=response.body,
+                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+                )
+            )
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+        post_commit.run_deferred(write_db)
+        self._set_local(cache_key, request_hash, response, time.time() + self.ttl)
+        return request_hash, response, False
+
+    async def execute(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        key: Optional[str],
+        fingerprint: Fingerprint,
+        handler: Callable[[AsyncSession], Awaitable[IdempotentResponse]]
+    ) -> Tuple[IdempotentResponse, bool]:
+        """
+        Run a write at most once per (user, key).
+
+        Failed writes (any exception, including HTTPException) are not stored:
+        they roll back together with the key, so a retry runs the write again.
+
+        Args:
+            db: The request's database session; it must not be mid-write
+            user_id: ID of the user making the request
+            key: Idempotency-Key header value, None to run the handler unconditionally
+            fingerprint: Returns the request's fingerprint; called after the
+                handler, so it may hash a body the handler streamed
+            handler: Performs the write on the session it is given and returns its response
+
+        Returns:
+            Tuple of (response, whether it was replayed)
+
+        Raises:
+            HTTPException: 422 if the key was used for a different request,
+                409 if the original is still running in another process
+        """
+        if not key:
+            return await handler(db), False
+
+        cache_key = (user_id, key)
+
+        cached = self._get_local(cache_key)
+        if cached is not None:
+            return _replay(cached, await fingerprint()), True
+
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            # shield() so a cancelled duplicate doesn't cancel the original's future
+            original = await asyncio.shield(in_flight)
+            return _replay(original, await fingerprint()), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+        try:
+            request_hash, response, replayed = await self._execute_once(db, user_id, key, fingerprint, handler)
+            future.set_result((request_hash, response))
+            return response, replayed
+        except BaseException as e:
+            if not future.done():
+                if not isinstance(e, Exception):
+                    # The original was cancelled; waiting duplicates should retry
+                    e = HTTPException(
+                        status_code=HTTP_409_CONFLICT,
+                        detail="The original request with this Idempotency-Key was interrupted",
+                        headers={"Retry-After": "1"}
+                    )
+                future.set_exception(e)
+                # Mark the exception retrieved when no duplicate was waiting
+                future.exception()
+            raise
+        finally:
+            self._in_flight.pop(cache_key, None)
+
+async def purge_expired_keys(db: AsyncSession, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """
+    Delete expired idempotency keys in bounded batches via the expires_at index.
+
+    Args:
+        db: Database session
+        batch_size: Rows deleted per statement
+
+    Returns:
+        Number of keys deleted
+    """
+    total = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+            .limit(batch_size)
+        )
+        result = await db.execute(
+            delete(IdempotencyKey)
+            .where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+    logger.info(f"Purged {total} expired idempotency keys")
+    return total
+
+async def run_cleanup() -> int:
+    """Cleanup job entry point: run ``purge_expired_keys`` in its own session."""
+    async with AsyncSessionLocal() as db:
+        return await purge_expired_keys(db)
+
+# Global store instance
+idempotency_store = IdempotencyStore.from_settings(settings)
+
+async def run_idempotent(
+    db: AsyncSession,
+    request: Request,
+    idempotency_key: Optional[str],
+    user_id: int,
+    status_code: int,
+    handler: Callable[[AsyncSession], Awaitable[bytes]],
+    body: bytes = b"",
+    streamed_body: Optional[StreamFingerprint] = None
+) -> FastJSONResponse:
+    """
+    Run a ledger write under the request's Idempotency-Key and build its response.
+
+    Args:
+        db: The request's database session
+        request: Incoming request (method and path are fingerprinted)
+        idempotency_key: Idempotency-Key header value, if any
+        user_id: ID of the user making the request
+        status_code: Status code of a successful response
+        handler: Performs the write on the session it is given and returns
+            the encoded JSON body
+        body: Canonical request body to fingerprint
+        streamed_body: Fingerprint of a body the handler streams, instead of ``body``
+
+    Returns:
+        JSON response, with an ``Idempotent-Replayed`` header on replays
+    """
+    async def respond(session: AsyncSession):
+        return IdempotentResponse(status_code, await handler(session))
+
+    if streamed_body is None:
+        request_hash = request_fingerprint(request.method, request.url.path, body)
+
+        async def fingerprint():
+            return request_hash
+    else:
+        fingerprint = streamed_body
+
+    response, replayed = await idempotency_store.execute(
+        db=db,
+        user_id=user_id,
+        key=idempotency_key,
+        fingerprint=fingerprint,
+        handler=respond
+    )
+    return FastJSONResponse(
+        response.body,
+        status_code=response.status_code,
+        headers={"Idempotent-Replayed": "true"} if replayed else None
+    )
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_cleanup())
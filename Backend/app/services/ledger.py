@@ -0,0 +1,565 @@
+"""
+Ledger service: transaction writes and incrementally maintained balances.
+
+Every write that changes whether a transaction is outstanding (active and not
+settled) applies the matching delta to both parties' ``transaction_summary``
+rows, and the pair's ``pair_balances`` row, inside the same database
+transaction. Every mutation is also appended to the ``ledger_events`` log,
+and (de)activating a transaction from a closed day adjusts the spend rollups.
+Active transactions count towards the payer's budgets. Committed rows are
+handed to the analytics sink, if one is configured. A transaction where
+``payer_id`` paid for ``payee_id`` is a receivable for the payer and a
+borrowing for the payee; ``total_amount`` is receivables minus borrowings.
+"""
+import logging
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+from sqlalchemy import select, insert, update, and_, or_, func, cast, literal_column, text, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from app.models.transaction import Transaction
+from app.models.transaction_summary import TransactionSummary
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionRow
+from app.services.pair_balance import pair_deltas, apply_pair_deltas
+from app.services import ledger_events
+from app.services import spend_rollup
+from app.services import budget as budget_service
+from app.services import group as group_service
+from app.services import analytics_sink
+from app.services.dashboard import dashboard_cache
+from app.db.post_commit import after_commit
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+
+def _is_outstanding(is_active: Optional[bool], is_settled: Optional[bool]) -> bool:
+    """A transaction counts towards balances while it is active and unsettled."""
+    return bool(is_active) and not bool(is_settled)
+
+def summary_deltas(payer_id: int, payee_id: int, amount: Decimal) -> Dict[int, Tuple[Decimal, Decimal]]:
+    """
+    Compute the (borrowings, receivables) delta for each party of a transaction.
+
+    Args:
+        payer_id: User who paid
+        payee_id: User who was paid for
+        amount: Signed amount (negative to reverse a transaction)
+
+    Returns:
+        Mapping of user_id -> (borrowings delta, receivables delta)
+    """
+    deltas: Dict[int, Tuple[Decimal, Decimal]] = {}
+    borrowings, receivables = deltas.get(payer_id, (ZERO, ZERO))
+    deltas[payer_id] = (borrowings, receivables + amount)
+    borrowings, receivables = deltas.get(payee_id, (ZERO, ZERO))
+    deltas[payee_id] = (borrowings + amount, receivables)
+    return deltas
+
+def merge_deltas(
+    target: Dict[int, Tuple[Decimal, Decimal]],
+    source: Dict[int, Tuple[Decimal, Decimal]]
+) -> Dict[int, Tuple[Decimal, Decimal]]:
+    """Add the per-user deltas in ``source`` into ``target`` and return it."""
+    for user_id, (borrowings, receivables) in source.items():
+        current_borrowings, current_receivables = target.get(user_id, (ZERO, ZERO))
+        target[user_id] = (current_borrowings + borrowings, current_receivables + receivables)
+    return target
+
+async def apply_summary_deltas(db: AsyncSession, deltas: Dict[int, Tuple[Decimal, Decimal]]) -> None:
+    """
+    Atomically add balance deltas to users' summary rows.
+
+    Runs a single ``INSERT ... ON CONFLICT DO UPDATE`` with rows sorted by
+    user_id. Postgres takes the row locks in VALUES order, so concurrent
+    writers touching the same pair of users always lock them in the same
+    order and cannot deadlock. The caller owns the surrounding transaction.
+
+    Args:
+        db: Database session
+        deltas: Mapping of user_id -> (borrowings delta, receivables delta)
+    """
+    rows = [
+        {
+            "user_id": user_id,
+            "total_borrowings": borrowings,
+            "total_receivables": receivables,
+            "total_amount": receivables - borrowings,
+            "is_active": True
+        }
+        for user_id, (borrowings, receivables) in sorted(deltas.items())
+        if borrowings != ZERO or receivables != ZERO
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(TransactionSummary).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TransactionSummary.user_id],
+        set_={
+            "total_borrowings": TransactionSummary.total_borrowings + stmt.excluded.total_borrowings,
+            "total_receivables": TransactionSummary.total_receivables + stmt.excluded.total_receivables,
+            "total_amount": TransactionSummary.total_amount + stmt.excluded.total_amount,
+            "last_updated_at": func.now()
+        }
+    )
+    await db.execute(stmt)
+
+async def apply_transaction_effects(db: AsyncSession, payer_id: int, payee_id: int, amount: Decimal) -> None:
+    """
+    Apply every maintained balance effect of a transaction.
+
+    Args:
+        db: Database session
+        payer_id: User who paid
+        payee_id: User who was paid for
+        amount: Signed amount (negative to reverse a transaction)
+    """
+    await apply_summary_deltas(db, summary_deltas(payer_id, payee_id, amount))
+    await apply_pair_deltas(db, pair_deltas(payer_id, payee_id, amount))
+
+# Columns a set-based insert supplies, in order
+LEDGER_INSERT_COLUMNS = (
+    "payer_id",
+    "payee_id",
+    "group_id",
+    "transaction_amount",
+    "description",
+    "category",
+    "is_settled",
+    "is_group_transaction",
+    "is_active"
+)
+
+# Budget updates for the active rows of a bulk insert
+BUDGET_CTES = budget_service.budget_update_sql("""
+        SELECT payer_id, category, (date_trunc('month', created_at AT TIME ZONE 'UTC'))::date,
+               transaction_amount, 1
+        FROM inserted WHERE is_active
+""")
+
+def bulk_insert_sql(source: str, result: str, columns: Sequence[str] = LEDGER_INSERT_COLUMNS) -> str:
+    """
+    Build one statement that inserts many transactions with all ledger effects.
+
+    Data-modifying CTEs insert the rows, append their ``created`` events,
+    fold the summed deltas into ``transaction_summary`` and ``pair_balances``
+    (upserted in key order, as in ``apply_summary_deltas``) and add the
+    payers' spend to their budgets, so any number of rows costs a single
+    round-trip. Callers take the payers' ``budget.lock_budgets`` first.
+
+    Args:
+        source: SELECT producing ``columns`` in order
+        result: Final SELECT; may read the ``inserted`` CTE (``TransactionRow``
+            columns) and the ``summaries`` CTE (updated user_ids)
+        columns: Inserted columns; ``LEDGER_INSERT_COLUMNS``, plus ``created_at``
+            for rows that are not stamped with the time of the insert
+
+    Returns:
+        SQL text
+    """
+    return f"""
+    WITH inserted AS (
+        INSERT INTO transactions ({", ".join(columns)})
+        {source}
+        RETURNING {", ".join(TransactionRow._fields)}
+    ),
+    events AS (
+        INSERT INTO ledger_events (transaction_id, event_type, payer_id, payee_id, amount)
+        SELECT id, '{ledger_events.EVENT_CREATED}', payer_id, payee_id,
+               CASE WHEN is_active AND NOT is_settled THEN transaction_amount ELSE 0 END
+        FROM inserted ORDER BY id
+    ),
+    legs AS (
+        SELECT payer_id AS user_id, 0::numeric AS borrowings, transaction_amount AS receivables
+        FROM inserted WHERE is_active AND NOT is_settled
+        UNION ALL
+        SELECT payee_id AS user_id, transaction_amount AS borrowings, 0::numeric AS receivables
+        FROM inserted WHERE is_active AND NOT is_settled
+    ),
+    deltas AS (
+        SELECT user_id, SUM(borrowings) AS borrowings, SUM(receivables) AS receivables
+        FROM legs GROUP BY user_id
+    ),
+    summaries AS (
+        INSERT INTO transaction_summary (user_id, total_borrowings, total_receivables, total_amount, is_active)
+        SELECT user_id, borrowings, receivables, receivables - borrowings, TRUE
+        FROM deltas ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_borrowings = transaction_summary.total_borrowings + EXCLUDED.total_borrowings,
+            total_receivables = transaction_summary.total_receivables + EXCLUDED.total_receivables,
+            total_amount = transaction_summary.total_amount + EXCLUDED.total_amount,
+            last_updated_at = now()
+        RETURNING user_id
+    ),
+    pair_deltas AS (
+        SELECT LEAST(payer_id, payee_id) AS min_user_id,
+               GREATEST(payer_id, payee_id) AS max_user_id,
+               SUM(CASE WHEN payer_id < payee_id THEN transaction_amount ELSE -transaction_amount END) AS balance
+        FROM inserted WHERE is_active AND NOT is_settled
+        GROUP BY 1, 2
+    ),
+    pairs AS (
+        INSERT INTO pair_balances (min_user_id, max_user_id, balance)
+        SELECT min_user_id, max_user_id, balance
+        FROM pair_deltas WHERE balance <> 0 ORDER BY min_user_id, max_user_id
+        ON CONFLICT (min_user_id, max_user_id) DO UPDATE SET
+            balance = pair_balances.balance + EXCLUDED.balance,
+            last_updated_at = now()
+    ),
+    {BUDGET_CTES}
+    {result}
+"""
+
+def publish_committed(rows: Sequence) -> None:
+    """Hand committed transaction rows to the analytics sink and invalidate their parties' dashboards."""
+    analytics_sink.submit(rows)
+    dashboard_cache.invalidate_parties(rows)
+
+async def create_transaction(db: AsyncSession, transaction_data: TransactionCreate) -> Transaction:
+    """
+    Create a transaction and update both parties' balances in one DB transaction.
+
+    A group transaction's payer and payee must both be active members (or the
+    admin) of the group.
+
+    Args:
+        db: Database session
+        transaction_data: Transaction data from request
+
+    Returns:
+        Created Transaction object
+
+    Raises:
+        HTTPException: If the transaction is invalid or cannot be stored
+    """
+    if transaction_data.payer_id == transaction_data.payee_id:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Payer and payee must be different users"
+        )
+
+    if transaction_data.group_id is not None:
+        parties = {transaction_data.payer_id, transaction_data.payee_id}
+        members = await group_service.get_active_member_ids(db=db, group_id=transaction_data.group_id, user_ids=parties)
+        if members != parties:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="Payer and payee must be active members of the group"
+            )
+
+    try:
+        stmt = insert(Transaction).values(**transaction_data.model_dump()).returning(Transaction)
+        result = await db.execute(stmt)
+        db_transaction = result.scalar_one()
+
+        is_outstanding = _is_outstanding(db_transaction.is_active, db_transaction.is_settled)
+        if is_outstanding:
+            await apply_transaction_effects(
+                db,
+                db_transaction.payer_id,
+                db_transaction.payee_id,
+                db_transaction.transaction_amount
+            )
+
+        if db_transaction.is_active:
+            await budget_service.apply_budget_delta(
+                db,
+                db_transaction.payer_id,
+                db_transaction.category,
+                db_transaction.transaction_amount,
+                db_transaction.created_at,
+                1
+            )
+
+        await ledger_events.record_event(
+            db,
+            transaction_id=db_transaction.id,
+            event_type=ledger_events.EVENT_CREATED,
+            payer_id=db_transaction.payer_id,
+            payee_id=db_transaction.payee_id,
+            amount=db_transaction.transaction_amount if is_outstanding else ZERO
+        )
+
+        await db.commit()
+        after_commit(db, lambda: publish_committed([db_transaction]))
+        logger.info(f"Transaction created: {db_transaction.id} ({db_transaction.payer_id} -> {db_transaction.payee_id})")
+        return db_transaction
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Failed to create transaction: {str(e)}")
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Could not create transaction. Please check the payer and payee."
+        )
+
+async def get_transaction_by_id(db: AsyncSession, transaction_id: int) -> Optional[Transaction]:
+    """
+    Get a transaction by ID.
+
+    Args:
+        db: Database session
+        transaction_id: Transaction ID to lookup
+
+    Returns:
+        Transaction object if found, None otherwise
+    """
+    query = select(Transaction).where(Transaction.id == transaction_id)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def update_transaction(
+    db: AsyncSession,
+    transaction_id: int,
+    transaction_data: TransactionUpdate,
+    user_id: Optional[int] = None
+) -> Transaction:
+    """
+    Update a transaction, adjusting balances if its outstanding state changes.
+
+    The transaction row is locked with ``SELECT ... FOR UPDATE`` so concurrent
+    settle/deactivate calls cannot both apply the reversing delta.
+
+    Args:
+        db: Database session
+        transaction_id: ID of the transaction to update
+        transaction_data: New transaction data
+        user_id: If given, the update is only allowed for the payer or payee
+
+    Returns:
+        Updated Transaction object
+
+    Raises:
+        HTTPException: If the transaction doesn't exist or isn't visible to the user
+    """
+    query = select(Transaction).where(Transaction.id == transaction_id).with_for_update()
+    if user_id is not None:
+        query = query.where(or_(Transaction.payer_id == user_id, Transaction.payee_id == user_id))
+    result = await db.execute(query)
+    db_transaction = result.scalar_one_or_none()
+
+    if not db_transaction:
+        await db.rollback()
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Transaction not found"
+        )
+
+    update_data = transaction_data.model_dump(exclude_unset=True)
+    if not update_data:
+        await db.rollback()
+        return db_transaction
+
+    was_active, was_settled = db_transaction.is_active, db_transaction.is_settled
+    was_outstanding = _is_outstanding(was_active, was_settled)
+
+    # Stamped after the row lock rather than with now() (this transaction's start), so
+    # a transaction's versions are ordered like their commits (see analytics_sink)
+    stmt = (
+        update(Transaction)
+        .where(Transaction.id == transaction_id)
+        .values(**update_data, last_updated_at=func.clock_timestamp())
+        .returning(Transaction)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    db_transaction = result.scalar_one()
+
+    is_outstanding = _is_outstanding(db_transaction.is_active, db_transaction.is_settled)
+    amount = ZERO
+    if was_outstanding != is_outstanding:
+        amount = db_transaction.transaction_amount if is_outstanding else -db_transaction.transaction_amount
+        await apply_transaction_effects(
+            db,
+            db_transaction.payer_id,
+            db_transaction.payee_id,
+            amount
+        )
+
+    if bool(was_active) != bool(db_transaction.is_active):
+        await spend_rollup.apply_rollup_delta(
+            db,
+            db_transaction.payer_id,
+            db_transaction.payee_id,
+            db_transaction.transaction_amount,
+            db_transaction.created_at,
+            1 if db_transaction.is_active else -1
+        )
+        await budget_service.apply_budget_delta(
+            db,
+            db_transaction.payer_id,
+            db_transaction.category,
+            db_transaction.transaction_amount,
+            db_transaction.created_at,
+            1 if db_transaction.is_active else -1
+        )
+
+    await ledger_events.record_event(
+        db,
+        transaction_id=db_transaction.id,
+        event_type=ledger_events.update_event_type(
+            was_active, was_settled, db_transaction.is_active, db_transaction.is_settled
+        ),
+        payer_id=db_transaction.payer_id,
+        payee_id=db_transaction.payee_id,
+        amount=amount,
+        changes=update_data
+    )
+
+    await db.commit()
+    after_commit(db, lambda: publish_committed([db_transaction]))
+    logger.info(f"Transaction updated: {db_transaction.id} (outstanding: {was_outstanding} -> {is_outstanding})")
+    return db_transaction
+
+async def settle_transaction(db: AsyncSession, transaction_id: int, user_id: Optional[int] = None) -> Transaction:
+    """Mark a transaction as settled and release it from both parties' balances."""
+    return await update_transaction(db, transaction_id, TransactionUpdate(is_settled=True), user_id=user_id)
+
+async def deactivate_transaction(db: AsyncSession, transaction_id: int, user_id: Optional[int] = None) -> Transaction:
+    """Deactivate (soft delete) a transaction and release it from both parties' balances."""
+    return await update_transaction(db, transaction_id, TransactionUpdate(is_active=False), user_id=user_id)
+
+async def get_transaction_summary(db: AsyncSession, user_id: int) -> Optional[TransactionSummary]:
+    """
+    Get a user's maintained balance summary (a single indexed row lookup).
+
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+
+    Returns:
+        TransactionSummary object if the user has any ledger history, None otherwise
+    """
+    query = select(TransactionSummary).where(TransactionSummary.user_id == user_id)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+def _recomputed_summaries_query():
+    """Aggregate outstanding transactions into per-user (borrowings, receivables)."""
+    outstanding = and_(Transaction.is_active == True, Transaction.is_settled == False)
+    zero = cast(literal_column("0"), Numeric(12, 2))
+    legs = (
+        select(
+            Transaction.payer_id.label("user_id"),
+            zero.label("borrowings"),
+            Transaction.transaction_amount.label("receivables")
+        )
+        .where(outstanding)
+        .union_all(
+            select(
+                Transaction.payee_id.label("user_id"),
+                Transaction.transaction_amount.label("borrowings"),
+                zero.label("receivables")
+            )
+            .where(outstanding)
+        )
+        .subquery()
+    )
+    return (
+        select(
+            legs.c.user_id,
+            func.sum(legs.c.borrowings).label("total_borrowings"),
+            func.sum(legs.c.receivables).label("total_receivables")
+        )
+        .group_by(legs.c.user_id)
+    )
+
+async def reconcile_summaries(db: AsyncSession, repair: bool = False) -> List[Dict[str, Any]]:
+    """
+    Verify every summary row against a full recompute from ``transactions``.
+
+    With ``repair=True`` the summary table is locked against concurrent ledger
+    writes first, so the recompute and the overwrite see the same state;
+    writers simply wait and apply their deltas on top of the repaired rows.
+
+    Args:
+        db: Database session
+        repair: Overwrite mismatching summaries with the recomputed values
+
+    Returns:
+        List of mismatches, each with the user_id, stored and expected values
+    """
+    if repair:
+        await db.execute(text(f"LOCK TABLE {TransactionSummary.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+    result = await db.execute(_recomputed_summaries_query())
+    expected = {
+        row.user_id: (row.total_borrowings or ZERO, row.total_receivables or ZERO)
+        for row in result
+    }
+
+    result = await db.execute(select(
+        TransactionSummary.user_id,
+        TransactionSummary.total_borrowings,
+        TransactionSummary.total_receivables,
+        TransactionSummary.total_amount
+    ))
+    stored = {row.user_id: row for row in result}
+
+    mismatches = []
+    for user_id in sorted(set(expected) | set(stored)):
+        borrowings, receivables = expected.get(user_id, (ZERO, ZERO))
+        row = stored.get(user_id)
+        current = (
+            (row.total_borrowings, row.total_receivables, row.total_amount)
+            if row else (ZERO, ZERO, ZERO)
+        )
+        if current != (borrowings, receivables, receivables - borrowings):
+            mismatches.append({
+                "user_id": user_id,
+                "stored": {
+                    "total_borrowings": current[0],
+                    "total_receivables": current[1],
+                    "total_amount": current[2]
+                },
+                "expected": {
+                    "total_borrowings": borrowings,
+                    "total_receivables": receivables,
+                    "total_amount": receivables - borrowings
+                }
+            })
+
+    if mismatches:
+        logger.warning(f"Transaction summary reconciliation found {len(mismatches)} mismatched users")
+    else:
+        logger.info("Transaction summary reconciliation found no mismatches")
+
+    if repair and mismatches:
+        rows = [
+            {
+                "user_id": mismatch["user_id"],
+                "is_active": True,
+                **mismatch["expected"]
+            }
+            for mismatch in mismatches
+        ]
+        stmt = pg_insert(TransactionSummary).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TransactionSummary.user_id],
+            set_={
+                "total_borrowings": stmt.excluded.total_borrowings,
+                "total_receivables": stmt.excluded.total_receivables,
+                "total_amount": stmt.excluded.total_amount,
+                "last_updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+        logger.info(f"Repaired {len(rows)} transaction summaries")
+
+    if repair:
+        await db.commit()
+
+    return mismatches
+
+async def run_reconciliation(repair: bool = False) -> List[Dict[str, Any]]:
+    """Reconciliation job entry point: run ``reconcile_summaries`` in its own session."""
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await reconcile_summaries(db, repair=repair)
@@ -0,0 +1,323 @@
+"""
+Append-only ledger event log with per-user balance snapshots.
+
+Every transaction mutation appends a ``ledger_events`` row in the same
+database transaction as the write. An event's ``amount`` is the signed change
+to the outstanding amount: the payer's receivable and the payee's borrowing.
+Edits that don't change balances (e.g. a new description) are recorded with
+an amount of zero so the log stays a complete audit trail.
+
+A periodic job folds new events into ``ledger_snapshots``. A balance at time
+``t`` is the newest snapshot taken no later than ``t`` plus the user's events
+after it, so only a short tail of the log is ever replayed. The same replay
+rebuilds ``transaction_summary`` after data loss or drift.
+
+Snapshots only advance past an event ID once no event at or below it can
+still commit: an ID is allocated at insert but the event becomes visible at
+commit, possibly after higher IDs. Each run records the last allocated ID
+and the time it read it (``ledger_snapshot_state``); a later run folds up to
+that ID once every transaction open at that time has ended.
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, insert, update, and_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ledger_event import LedgerEvent
+from app.models.ledger_snapshot import LedgerSnapshot
+from app.models.ledger_snapshot_state import LedgerSnapshotState
+from app.models.transaction_summary import TransactionSummary
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+
+EVENT_CREATED = "created"
+EVENT_UPDATED = "updated"
+EVENT_SETTLED = "settled"
+EVENT_UNSETTLED = "unsettled"
+EVENT_DEACTIVATED = "deactivated"
+EVENT_REACTIVATED = "reactivated"
+
+def update_event_type(was_active: bool, was_settled: bool, is_active: bool, is_settled: bool) -> str:
+    """Classify a transaction update by the state flag it changed."""
+    if bool(was_active) != bool(is_active):
+        return EVENT_REACTIVATED if is_active else EVENT_DEACTIVATED
+    if bool(was_settled) != bool(is_settled):
+        return EVENT_SETTLED if is_settled else EVENT_UNSETTLED
+    return EVENT_UPDATED
+
+async def record_event(
+    db: AsyncSession,
+    transaction_id: int,
+    event_type: str,
+    payer_id: int,
+    payee_id: int,
+    amount: Decimal = ZERO,
+    changes: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Append an event to the ledger log. The caller owns the surrounding transaction.
+
+    Args:
+        db: Database session
+        transaction_id: Transaction the event belongs to
+        event_type: One of the EVENT_* constants
+        payer_id: Transaction payer
+        payee_id: Transaction payee
+        amount: Signed change to the outstanding amount
+        changes: Fields changed by the mutation
+    """
+    await db.execute(insert(LedgerEvent).values(
+        transaction_id=transaction_id,
+        event_type=event_type,
+        payer_id=payer_id,
+        payee_id=payee_id,
+        amount=amount,
+        changes=changes
+    ))
+
+def _event_sum(side_column, user_id: int, after_event_id: int, at: datetime):
+    """Sum of a user's event amounts on one side, served by the (side, id) index."""
+    return (
+        select(func.coalesce(func.sum(LedgerEvent.amount), ZERO))
+        .where(and_(
+            side_column == user_id,
+            LedgerEvent.id > after_event_id,
+            LedgerEvent.created_at <= at
+        ))
+        .scalar_subquery()
+    )
+
+async def get_balance_at(db: AsyncSession, user_id: int, at: datetime) -> Tuple[Decimal, Decimal]:
+    """
+    Get a user's balances as of a point in time.
+
+    Args:
+        db: Database session
+        user_id: User whose balances to compute
+        at: Point in time (timezone-aware)
+
+    Returns:
+        Tuple of (total borrowings, total receivables)
+    """
+    result = await db.execute(
+        select(LedgerSnapshot.last_event_id, LedgerSnapshot.total_borrowings, LedgerSnapshot.total_receivables)
+        .where(and_(LedgerSnapshot.user_id == user_id, LedgerSnapshot.as_of <= at))
+        .order_by(LedgerSnapshot.last_event_id.desc())
+        .limit(1)
+    )
+    snapshot = result.first()
+    after_event_id, borrowings, receivables = snapshot if snapshot else (0, ZERO, ZERO)
+
+    result = await db.execute(select(
+        _event_sum(LedgerEvent.payee_id, user_id, after_event_id, at),
+        _event_sum(LedgerEvent.payer_id, user_id, after_event_id, at)
+    ))
+    borrowings_delta, receivables_delta = result.one()
+
+    return borrowings + borrowings_delta, receivables + receivables_delta
+
+# Last event ID allocated, committed or not
+LAST_EVENT_ID_SQL = """
+    SELECT COALESCE(pg_sequence_last_value(pg_get_serial_sequence('ledger_events', 'id')::regclass), 0)
+"""
+
+# Start of the oldest transaction open in the database, this one included
+OPEN_TRANSACTIONS_START_SQL = """
+    SELECT min(xact_start) FROM pg_stat_activity WHERE datname = current_database()
+"""
+
+# Snapshot every user with events between the previous run's watermark and
+# the horizon, starting from their own latest snapshot
+TAKE_SNAPSHOTS_SQL = """
+    WITH horizon AS (
+        SELECT CAST(:horizon AS BIGINT) AS event_id
+    ),
+    watermark AS (
+        SELECT COALESCE(MAX(last_event_id), 0) AS event_id FROM ledger_snapshots
+    ),
+    touched AS (
+        SELECT payer_id AS user_id FROM ledger_events
+        WHERE id > (SELECT event_id FROM watermark) AND id <= (SELECT event_id FROM horizon)
+        UNION
+        SELECT payee_id AS user_id FROM ledger_events
+        WHERE id > (SELECT event_id FROM watermark) AND id <= (SELECT event_id FROM horizon)
+    ),
+    latest AS (
+        SELECT t.user_id,
+               COALESCE(s.last_event_id, 0) AS last_event_id,
+               s.as_of,
+               COALESCE(s.total_borrowings, 0) AS total_borrowings,
+               COALESCE(s.total_receivables, 0) AS total_receivables
+        FROM touched t
+        LEFT JOIN LATERAL (
+            SELECT last_event_id, as_of, total_borrowings, total_receivables
+            FROM ledger_snapshots
+            WHERE ledger_snapshots.user_id = t.user_id
+            ORDER BY last_event_id DESC LIMIT 1
+        ) s ON TRUE
+    ),
+    legs AS (
+        SELECT l.user_id, e.id, e.created_at, 0::numeric AS borrowings, e.amount AS receivables
+        FROM latest l JOIN ledger_events e
+            ON e.payer_id = l.user_id AND e.id > l.last_event_id AND e.id <= (SELECT event_id FROM horizon)
+        UNION ALL
+        SELECT l.user_id, e.id, e.created_at, e.amount AS borrowings, 0::numeric AS receivables
+        FROM latest l JOIN ledger_events e
+            ON e.payee_id = l.user_id AND e.id > l.last_event_id AND e.id <= (SELECT event_id FROM horizon)
+    )
+    INSERT INTO ledger_snapshots (user_id, last_event_id, as_of, total_borrowings, total_receivables)
+    SELECT l.user_id,
+           MAX(g.id),
+           GREATEST(l.as_of, MAX(g.created_at)),
+           l.total_borrowings + SUM(g.borrowings),
+           l.total_receivables + SUM(g.receivables)
+    FROM latest l JOIN legs g ON g.user_id = l.user_id
+    GROUP BY l.user_id, l.as_of, l.total_borrowings, l.total_receivables
+"""
+
+# Replay the latest snapshot plus every later event into transaction_summary
+RECOVER_SUMMARIES_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (user_id) user_id, last_event_id, total_borrowings, total_receivables
+        FROM ledger_snapshots
+        ORDER BY user_id, last_event_id DESC
+    ),
+    legs AS (
+        SELECT user_id, total_borrowings AS borrowings, total_receivables AS receivables FROM latest
+        UNION ALL
+        SELECT e.payer_id, 0::numeric, e.amount
+        FROM ledger_events e LEFT JOIN latest s ON s.user_id = e.payer_id
+        WHERE e.id > COALESCE(s.last_event_id, 0)
+        UNION ALL
+        SELECT e.payee_id, e.amount, 0::numeric
+        FROM ledger_events e LEFT JOIN latest s ON s.user_id = e.payee_id
+        WHERE e.id > COALESCE(s.last_event_id, 0)
+    ),
+    totals AS (
+        SELECT user_id, SUM(borrowings) AS borrowings, SUM(receivables) AS receivables
+        FROM legs GROUP BY user_id
+    )
+    INSERT INTO transaction_summary (user_id, total_borrowings, total_receivables, total_amount, is_active)
+    SELECT user_id, borrowings, receivables, receivables - borrowings, TRUE
+    FROM totals ORDER BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_borrowings = EXCLUDED.total_borrowings,
+        total_receivables = EXCLUDED.total_receivables,
+        total_amount = EXCLUDED.total_amount,
+        last_updated_at = now()
+"""
+
+# Seed the log with one opening event per transaction written before it existed
+BACKFILL_EVENTS_SQL = """
+    INSERT INTO ledger_events (transaction_id, event_type, payer_id, payee_id, amount, created_at)
+    SELECT t.id, :event_type, t.payer_id, t.payee_id,
+           CASE WHEN t.is_active AND NOT t.is_settled THEN t.transaction_amount ELSE 0 END,
+           COALESCE(t.created_at, now())
+    FROM transactions t
+    WHERE NOT EXISTS (SELECT 1 FROM ledger_events e WHERE e.transaction_id = t.id)
+    ORDER BY t.id
+"""
+
+async def _lock_state(db: AsyncSession) -> LedgerSnapshotState:
+    """Get the snapshot state row, creating it if needed, locked against concurrent runs."""
+    await db.execute(pg_insert(LedgerSnapshotState).values(id=1).on_conflict_do_nothing())
+    result = await db.execute(
+        select(LedgerSnapshotState).where(LedgerSnapshotState.id == 1).with_for_update()
+    )
+    return result.scalar_one()
+
+async def take_snapshots(db: AsyncSession) -> int:
+    """
+    Snapshot the balances of every user with new events since the last run.
+
+    Folds events up to the ID the previous run recorded, if every transaction
+    open when it was recorded has ended (otherwise this run writes nothing),
+    then records the current one for the next run.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of snapshots written
+    """
+    state = await _lock_state(db)
+    open_since = (await db.execute(text(OPEN_TRANSACTIONS_START_SQL))).scalar()
+
+    written = 0
+    settled = state.pending_at is not None and open_since > state.pending_at
+    if settled:
+        result = await db.execute(text(TAKE_SNAPSHOTS_SQL), {"horizon": state.pending_event_id})
+        written = result.rowcount
+
+    if settled or state.pending_at is None:
+        last_event_id = (await db.execute(text(LAST_EVENT_ID_SQL))).scalar()
+        # Read the clock after the ID: a transaction holding an ID up to it started before then
+        await db.execute(
+            update(LedgerSnapshotState)
+            .where(LedgerSnapshotState.id == 1)
+            .values(pending_event_id=last_event_id, pending_at=func.clock_timestamp())
+        )
+    else:
+        logger.info(f"Ledger snapshots waiting for transactions open since before {state.pending_at}")
+
+    await db.commit()
+    logger.info(f"Took {written} ledger snapshots")
+    return written
+
+async def backfill_events(db: AsyncSession) -> int:
+    """
+    Record an opening event for every transaction that has none.
+
+    Run once after enabling the event log on an existing database; the
+    opening event carries the transaction's current outstanding amount.
+
+    Returns:
+        Number of events written
+    """
+    result = await db.execute(text(BACKFILL_EVENTS_SQL), {"event_type": EVENT_CREATED})
+    await db.commit()
+    logger.info(f"Backfilled {result.rowcount} ledger events")
+    return result.rowcount
+
+async def recover_summaries(db: AsyncSession) -> int:
+    """
+    Rebuild ``transaction_summary`` from snapshots and the event tail.
+
+    The summary table is locked against concurrent ledger writes first; a
+    writer blocked on the lock has not committed its event yet, so it is not
+    replayed here and its delta lands on top of the recovered row.
+
+    Returns:
+        Number of summary rows written
+    """
+    await db.execute(text(f"LOCK TABLE {TransactionSummary.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    result = await db.execute(text(RECOVER_SUMMARIES_SQL))
+    await db.commit()
+    logger.info(f"Recovered {result.rowcount} transaction summaries from the ledger log")
+    return result.rowcount
+
+async def run_job(job: str) -> int:
+    """Job entry point: run ``snapshot``, ``backfill`` or ``recover`` in its own session."""
+    from app.db.database import AsyncSessionLocal
+
+    jobs = {
+        "snapshot": take_snapshots,
+        "backfill": backfill_events,
+        "recover": recover_summaries,
+    }
+    async with AsyncSessionLocal() as db:
+        return await jobs[job](db)
+
+if __name__ == "__main__":
+    import sys
+    import asyncio
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_job(sys.argv[1] if len(sys.argv) > 1 else "snapshot"))
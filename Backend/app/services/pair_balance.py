@@ -0,0 +1,163 @@
+"""
+Pairwise balances between users.
+
+``pair_balances`` holds one row per unordered pair of users who share
+outstanding transactions, keyed by ``(min_user_id, max_user_id)``. The ledger
+applies signed deltas to it in the same database transaction as every write,
+so a user's per-friend balances are read from the primary key (as
+``min_user_id``) and the ``max_user_id`` index instead of scanning
+``transactions`` in both directions.
+"""
+import logging
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, delete, insert, and_, case, func, union_all, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pair_balance import PairBalance
+from app.models.transaction import Transaction
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+
+def pair_key(user_id: int, other_user_id: int) -> Tuple[int, int]:
+    """Get the ``(min_user_id, max_user_id)`` key for a pair of users."""
+    return (user_id, other_user_id) if user_id < other_user_id else (other_user_id, user_id)
+
+def pair_deltas(payer_id: int, payee_id: int, amount: Decimal) -> Dict[Tuple[int, int], Decimal]:
+    """
+    Compute the pair balance delta for a transaction.
+
+    The stored balance is what ``max_user_id`` owes ``min_user_id``, so a
+    payment by the lower ID adds to it and a payment by the higher ID
+    subtracts from it.
+
+    Args:
+        payer_id: User who paid
+        payee_id: User who was paid for
+        amount: Signed amount (negative to reverse a transaction)
+
+    Returns:
+        Mapping of (min_user_id, max_user_id) -> balance delta
+    """
+    return {pair_key(payer_id, payee_id): amount if payer_id < payee_id else -amount}
+
+async def apply_pair_deltas(db: AsyncSession, deltas: Dict[Tuple[int, int], Decimal]) -> None:
+    """
+    Atomically add balance deltas to pair rows.
+
+    Like ``ledger.apply_summary_deltas``, rows are upserted in key order so
+    concurrent writers lock them in the same order. The caller owns the
+    surrounding transaction.
+
+    Args:
+        db: Database session
+        deltas: Mapping of (min_user_id, max_user_id) -> balance delta
+    """
+    rows = [
+        {"min_user_id": min_user_id, "max_user_id": max_user_id, "balance": balance}
+        for (min_user_id, max_user_id), balance in sorted(deltas.items())
+        if balance != ZERO
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(PairBalance).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PairBalance.min_user_id, PairBalance.max_user_id],
+        set_={
+            "balance": PairBalance.balance + stmt.excluded.balance,
+            "last_updated_at": func.now()
+        }
+    )
+    await db.execute(stmt)
+
+async def get_counterparty_balances(db: AsyncSession, user_id: int) -> List[Tuple[int, Decimal]]:
+    """
+    Get a user's non-zero balance with every counterparty.
+
+    Args:
+        db: Database session
+        user_id: User whose balances to read
+
+    Returns:
+        List of (counterparty_id, balance) where a positive balance means the
+        counterparty owes the user, ordered by counterparty_id
+    """
+    as_min = (
+        select(PairBalance.max_user_id.label("counterparty_id"), PairBalance.balance.label("balance"))
+        .where(and_(PairBalance.min_user_id == user_id, PairBalance.balance != 0))
+    )
+    as_max = (
+        select(PairBalance.min_user_id.label("counterparty_id"), (-PairBalance.balance).label("balance"))
+        .where(and_(PairBalance.max_user_id == user_id, PairBalance.balance != 0))
+    )
+    balances = union_all(as_min, as_max).subquery()
+
+    result = await db.execute(
+        select(balances.c.counterparty_id, balances.c.balance).order_by(balances.c.counterparty_id)
+    )
+    return [(row.counterparty_id, row.balance) for row in result]
+
+def _recomputed_pair_balances_query():
+    """Aggregate outstanding transactions into per-pair balances."""
+    min_user_id = func.least(Transaction.payer_id, Transaction.payee_id)
+    max_user_id = func.greatest(Transaction.payer_id, Transaction.payee_id)
+    signed_amount = case(
+        (Transaction.payer_id < Transaction.payee_id, Transaction.transaction_amount),
+        else_=-Transaction.transaction_amount
+    )
+    return (
+        select(
+            min_user_id.label("min_user_id"),
+            max_user_id.label("max_user_id"),
+            func.sum(signed_amount).label("balance")
+        )
+        .where(and_(Transaction.is_active == True, Transaction.is_settled == False))
+        .group_by(min_user_id, max_user_id)
+    )
+
+async def rebuild_pair_balances(db: AsyncSession) -> int:
+    """
+    Rebuild ``pair_balances`` from ``transactions`` in one set-based pass.
+
+    The table is locked against concurrent ledger writes for the duration,
+    so writers wait and apply their deltas on top of the rebuilt rows.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of pair rows written
+    """
+    await db.execute(text(f"LOCK TABLE {PairBalance.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    await db.execute(delete(PairBalance))
+
+    recomputed = _recomputed_pair_balances_query().subquery()
+    stmt = insert(PairBalance).from_select(
+        ["min_user_id", "max_user_id", "balance"],
+        select(recomputed.c.min_user_id, recomputed.c.max_user_id, recomputed.c.balance)
+        .where(recomputed.c.balance != 0)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+
+    logger.info(f"Rebuilt {result.rowcount} pair balances")
+    return result.rowcount
+
+async def run_rebuild() -> int:
+    """Rebuild job entry point: run ``rebuild_pair_balances`` in its own session."""
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await rebuild_pair_balances(db)
+
+if __name__ == "__main__":
+    import asyncio
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_rebuild())
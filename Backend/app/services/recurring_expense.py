@@ -0,0 +1,488 @@
+"""
+Recurring expenses (bills and subscriptions) and their scheduler.
+
+A recurring expense is a transaction template plus a schedule. The
+scheduler materializes due occurrences as ordinary transactions:
+
+- Due schedules are found through the index on ``next_due_at``; finished
+  and deleted schedules have it NULL, so the due scan only ever touches
+  rows that are actually due.
+- A batch of schedules is claimed with ``SELECT ... FOR UPDATE SKIP
+  LOCKED``, so any number of workers can run concurrently without
+  claiming the same schedule twice or waiting on each other.
+- All transactions of a batch are inserted with one ``bulk_insert_sql``
+  statement (so balances, events and budgets follow), and the schedules are
+  advanced in the same database transaction. An occurrence is therefore
+  materialized exactly once, even if a worker dies mid-batch.
+- Each transaction is created at its occurrence's due time, so a caught-up
+  occurrence counts towards the day and month it was due in.
+- A schedule whose payer or payee is no longer active (or no longer in the
+  schedule's group) is stopped instead of run.
+
+Missed occurrences (e.g. after downtime) are caught up, at most
+``RECURRING_MAX_CATCH_UP`` per schedule per batch. ``RecurringScheduler``
+runs batches in-process on an asyncio task; ``python -m
+app.services.recurring_expense`` runs it as a standalone worker.
+"""
+import asyncio
+import calendar
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select, and_, or_, func, text, exists
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from app.core.config.settings import get_settings
+from app.models.group import Group
+from app.models.group_member import GroupMember
+from app.models.recurring_expense import RecurringExpense
+from app.models.user import User
+from app.schemas.recurring_expense import RecurringExpenseCreate, RecurringExpenseUpdate
+from app.schemas.transaction import TransactionRow
+from app.services.ledger import LEDGER_INSERT_COLUMNS, bulk_insert_sql, publish_committed
+from app.services import budget as budget_service
+from app.services import group as group_service
+from app.services import spend_rollup
+from app.services import analytics_sink
+from app.db.post_commit import after_commit
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+MATERIALIZE_SOURCE_SQL = """
+        SELECT d.payer_id, d.payee_id, d.group_id, d.amount, d.description, d.category,
+               FALSE, d.group_id IS NOT NULL, TRUE, d.due_at
+        FROM unnest(
+            CAST(:payer_ids AS BIGINT[]), CAST(:payee_ids AS BIGINT[]), CAST(:group_ids AS BIGINT[]),
+            CAST(:amounts AS NUMERIC(12, 2)[]), CAST(:descriptions AS TEXT[]), CAST(:categories AS VARCHAR(50)[]),
+            CAST(:due_ats AS TIMESTAMPTZ[])
+        ) WITH ORDINALITY AS d(payer_id, payee_id, group_id, amount, description, category, due_at, position)
+        ORDER BY d.position
+"""
+
+MATERIALIZE_SQL = bulk_insert_sql(
+    MATERIALIZE_SOURCE_SQL,
+    f"SELECT {', '.join(TransactionRow._fields)} FROM inserted ORDER BY id",
+    columns=LEDGER_INSERT_COLUMNS + ("created_at",)
+)
+
+def occurrence_at(start_at: datetime, interval: str, interval_count: int, n: int) -> datetime:
+    """
+    When occurrence ``n`` (0-based) of a schedule is due.
+
+    Computed from ``start_at`` rather than from the previous occurrence, so
+    a monthly schedule starting on the 31st falls on the last day of
+    shorter months and returns to the 31st afterwards.
+    """
+    steps = n * interval_count
+    if interval == "daily":
+        return start_at + timedelta(days=steps)
+    if interval == "weekly":
+        return start_at + timedelta(weeks=steps)
+
+    months = steps * 12 if interval == "yearly" else steps
+    year, month = divmod(start_at.year * 12 + start_at.month - 1 + months, 12)
+    month += 1
+    return start_at.replace(year=year, month=month, day=min(start_at.day, calendar.monthrange(year, month)[1]))
+
+def first_occurrence_from(start_at: datetime, interval: str, interval_count: int, moment: datetime) -> int:
+    """Index of the first occurrence due at or after ``moment``."""
+    if moment <= start_at:
+        return 0
+    if interval in ("daily", "weekly"):
+        step = timedelta(days=interval_count * (7 if interval == "weekly" else 1))
+        return -((start_at - moment) // step)
+
+    step_months = interval_count * (12 if interval == "yearly" else 1)
+    elapsed_months = (moment.year - start_at.year) * 12 + moment.month - start_at.month
+    n = max(elapsed_months // step_months - 1, 0)
+    while occurrence_at(start_at, interval, interval_count, n) < moment:
+        n += 1
+    return n
+
+def next_due(expense: RecurringExpense) -> Optional[datetime]:
+    """When the schedule's next occurrence is due, or None if it is past ``end_at``."""
+    due_at = occurrence_at(expense.start_at, expense.interval, expense.interval_count, expense.occurrences)
+    if expense.end_at is not None and due_at > expense.end_at:
+        return None
+    return due_at
+
+# Management
+
+async def create_recurring_expense(
+    db: AsyncSession,
+    user_id: int,
+    expense_data: RecurringExpenseCreate
+) -> RecurringExpense:
+    """
+    Create a recurring expense, due from its first occurrence at or after now.
+
+    Args:
+        db: Database session
+        user_id: ID of the creating user, who must be the payer or the payee
+        expense_data: Recurring expense data from request
+
+    Returns:
+        Created RecurringExpense object
+
+    Raises:
+        HTTPException: If the user isn't a party, a party is inactive, or a
+            party isn't an active member of the group
+    """
+    parties = {expense_data.payer_id, expense_data.payee_id}
+    if user_id not in parties:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="You can only create recurring expenses you are part of"
+        )
+
+    active = await db.execute(
+        select(func.count()).select_from(User).where(and_(User.id.in_(parties), User.is_active == True))
+    )
+    if active.scalar_one() != len(parties):
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="User not found or inactive"
+        )
+
+    if expense_data.group_id is not None:
+        members = await group_service.get_active_member_ids(db=db, group_id=expense_data.group_id, user_ids=parties)
+        if members != parties:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="Payer and payee must be active members of the group"
+            )
+
+    # Occurrences before the schedule was created are not backfilled
+    occurrences = first_occurrence_from(
+        expense_data.start_at,
+        expense_data.interval,
+        expense_data.interval_count,
+        datetime.now(timezone.utc)
+    )
+    expense = RecurringExpense(**expense_data.model_dump(), created_by=user_id, occurrences=occurrences, is_active=True)
+    expense.next_due_at = next_due(expense)
+    db.add(expense)
+    await db.commit()
+    await db.refresh(expense)
+
+    logger.info(f"Recurring expense {expense.id} created by user {user_id}: {expense.amount} every {expense.interval_count} {expense.interval}")
+    return expense
+
+async def get_recurring_expenses(db: AsyncSession, user_id: int) -> List[RecurringExpense]:
+    """
+    Get the active recurring expenses a user is a party to.
+
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+
+    Returns:
+        List of RecurringExpense objects, next due first (finished ones last)
+    """
+    result = await db.execute(
+        select(RecurringExpense)
+        .where(and_(
+            or_(RecurringExpense.payer_id == user_id, RecurringExpense.payee_id == user_id),
+            RecurringExpense.is_active == True
+        ))
+        .order_by(RecurringExpense.next_due_at.asc().nulls_last(), RecurringExpense.id)
+    )
+    return list(result.scalars())
+
+async def _get_locked_expense(db: AsyncSession, expense_id: int, user_id: int) -> RecurringExpense:
+    result = await db.execute(
+        select(RecurringExpense)
+        .where(and_(
+            RecurringExpense.id == expense_id,
+            or_(RecurringExpense.payer_id == user_id, RecurringExpense.payee_id == user_id),
+            RecurringExpense.is_active == True
+        ))
+        .with_for_update()
+    )
+    expense = result.scalar_one_or_none()
+    if not expense:
+        await db.rollback()
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Recurring expense not found"
+        )
+    return expense
+
+async def update_recurring_expense(
+    db: AsyncSession,
+    expense_id: int,
+    user_id: int,
+    expense_data: RecurringExpenseUpdate
+) -> RecurringExpense:
+    """
+    Update a recurring expense; changes apply to occurrences not yet materialized.
+
+    Args:
+        db: Database session
+        expense_id: ID of the recurring expense
+        user_id: ID of the updating user (payer or payee)
+        expense_data: New recurring expense data
+
+    Returns:
+        Updated RecurringExpense object
+
+    Raises:
+        HTTPException: If the recurring expense doesn't exist or isn't visible to the user
+    """
+    expense = await _get_locked_expense(db, expense_id, user_id)
+
+    update_data = expense_data.model_dump(exclude_unset=True)
+    if update_data.get("end_at") is not None and update_data["end_at"] < expense.start_at:
+        await db.rollback()
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="end_at cannot be before start_at"
+        )
+    for field, value in update_data.items():
+        setattr(expense, field, value)
+    expense.next_due_at = next_due(expense)
+
+    await db.commit()
+    await db.refresh(expense)
+    return expense
+
+async def delete_recurring_expense(db: AsyncSession, expense_id: int, user_id: int) -> None:
+    """
+    Stop a recurring expense. Transactions already materialized are kept.
+
+    Args:
+        db: Database session
+        expense_id: ID of the recurring expense
+        user_id: ID of the deleting user (payer or payee)
+
+    Raises:
+        HTTPException: If the recurring expense doesn't exist or isn't visible to the user
+    """
+    expense = await _get_locked_expense(db, expense_id, user_id)
+    expense.is_active = False
+    expense.next_due_at = None
+    await db.commit()
+    logger.info(f"Recurring expense {expense_id} stopped by user {user_id}")
+
+# Scheduler
+
+def _is_group_member(group_id_column, user_id_column):
+    """Whether a user is an active member or the admin of a group (see ``group.get_active_member_ids``)."""
+    return or_(
+        exists().where(and_(
+            GroupMember.group_id == group_id_column,
+            GroupMember.user_id == user_id_column,
+            GroupMember.is_active == True
+        )),
+        exists().where(and_(Group.id == group_id_column, Group.admin_id == user_id_column))
+    )
+
+async def _runnable_expense_ids(db: AsyncSession, expense_ids: List[int]) -> Set[int]:
+    """
+    Which schedules may still run, in one query: both parties are active
+    users and, for group schedules, members of the group.
+    """
+    payer, payee = aliased(User), aliased(User)
+    result = await db.execute(
+        select(RecurringExpense.id)
+        .join(payer, and_(payer.id == RecurringExpense.payer_id, payer.is_active == True))
+        .join(payee, and_(payee.id == RecurringExpense.payee_id, payee.is_active == True))
+        .where(and_(
+            RecurringExpense.id.in_(expense_ids),
+            or_(
+                RecurringExpense.group_id.is_(None),
+                and_(
+                    _is_group_member(RecurringExpense.group_id, RecurringExpense.payer_id),
+                    _is_group_member(RecurringExpense.group_id, RecurringExpense.payee_id)
+                )
+            )
+        ))
+    )
+    return set(result.scalars())
+
+async def _apply_closed_day_rollups(db: AsyncSession, rows: List[TransactionRow]) -> None:
+    """Add occurrences due on days the spend rollups have already closed to the rollups."""
+    watermark = await spend_rollup.lock_watermark(db)
+    if watermark is None:
+        return
+    for row in rows:
+        if spend_rollup.utc_day(row.created_at) < watermark:
+            await spend_rollup.apply_rollup_delta(
+                db, row.payer_id, row.payee_id, row.transaction_amount, row.created_at, 1
+            )
+
+async def process_due_batch(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    batch_size: int = 100,
+    max_catch_up: int = 31
+) -> Tuple[int, int]:
+    """
+    Claim up to ``batch_size`` due schedules and materialize their due occurrences.
+
+    Schedules locked by another worker are skipped, not waited for.
+    Schedules that can no longer run (see ``_runnable_expense_ids``) are
+    stopped.
+
+    Args:
+        db: Database session
+        now: Materialize occurrences due at or before this time (defaults to now)
+        batch_size: Maximum number of schedules to claim
+        max_catch_up: Maximum occurrences materialized per schedule
+
+    Returns:
+        Tuple of (schedules claimed, transactions created)
+    """
+    now = now or datetime.now(timezone.utc)
+    result = await db.execute(
+        select(RecurringExpense)
+        .where(RecurringExpense.next_due_at <= now)
+        .order_by(RecurringExpense.next_due_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    expenses = result.scalars().all()
+    if not expenses:
+        await db.rollback()
+        return 0, 0
+
+    runnable = await _runnable_expense_ids(db, [expense.id for expense in expenses])
+    params = {
+        "payer_ids": [], "payee_ids": [], "group_ids": [], "amounts": [],
+        "descriptions": [], "categories": [], "due_ats": []
+    }
+    for expense in expenses:
+        if expense.id not in runnable:
+            expense.is_active = False
+            expense.next_due_at = None
+            logger.warning(f"Recurring expense {expense.id} stopped: a party is inactive or has left the group")
+            continue
+
+        due = 0
+        while expense.next_due_at is not None and expense.next_due_at <= now and due < max_catch_up:
+            params["payer_ids"].append(expense.payer_id)
+            params["payee_ids"].append(expense.payee_id)
+            params["group_ids"].append(expense.group_id)
+            params["amounts"].append(expense.amount)
+            params["descriptions"].append(expense.description)
+            params["categories"].append(expense.category)
+            params["due_ats"].append(expense.next_due_at)
+            expense.occurrences += 1
+            expense.next_due_at = next_due(expense)
+            due += 1
+        expense.last_run_at = now
+
+    rows: List[TransactionRow] = []
+    if params["due_ats"]:
+        await budget_service.lock_budgets(db, params["payer_ids"])
+        result = await db.execute(text(MATERIALIZE_SQL), params)
+        rows = [TransactionRow._make(row) for row in result]
+        await _apply_closed_day_rollups(db, rows)
+    await db.commit()
+
+    after_commit(db, lambda: publish_committed(rows))
+    logger.info(f"Recurring expenses: {len(expenses)} schedules run, {len(rows)} transactions created")
+    return len(expenses), len(rows)
+
+class RecurringScheduler:
+    """
+    Runs due schedules on an asyncio task, every ``poll_seconds``.
+
+    Each round claims batches until no full batch is left. Several
+    schedulers (processes or hosts) can run against one database.
+    """
+
+    def __init__(self, enabled: bool = True, poll_seconds: int = 30, batch_size: int = 100, max_catch_up: int = 31):
+        self.enabled = enabled
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.max_catch_up = max_catch_up
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "RecurringScheduler":
+        """Create a scheduler configured from application settings."""
+        return cls(
+            enabled=settings.RECURRING_SCHEDULER_ENABLED,
+            poll_seconds=settings.RECURRING_POLL_SECONDS,
+            batch_size=settings.RECURRING_BATCH_SIZE,
+            max_catch_up=settings.RECURRING_MAX_CATCH_UP
+        )
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Materialize everything due, one batch per database transaction.
+
+        Returns:
+            Number of transactions created
+        """
+        from app.db.database import AsyncSessionLocal
+
+        created = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                claimed, transactions = await process_due_batch(
+                    db,
+                    now=now,
+                    batch_size=self.batch_size,
+                    max_catch_up=self.max_catch_up
+                )
+            created += transactions
+            if claimed < self.batch_size:
+                return created
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Recurring expense scheduler round failed: {str(e)}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        """Start the scheduler task if enabled and not running."""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Recurring expense scheduler started (every {self.poll_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the scheduler task; a batch in flight is rolled back."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+# Global scheduler instance
+recurring_scheduler = RecurringScheduler.from_settings(settings)
+
+async def run_job(job: str):
+    """Job entry point: run ``once`` (everything currently due) or as a ``worker``."""
+    try:
+        if job == "once":
+            return await recurring_scheduler.run_once()
+
+        recurring_scheduler.enabled = True
+        recurring_scheduler.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await recurring_scheduler.stop()
+    finally:
+        await analytics_sink.analytics_batcher.stop()
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_job(sys.argv[1] if len(sys.argv) > 1 else "worker"))
@@ -0,0 +1,366 @@
+"""
+Debt reminders.
+
+Users who owe money get a single digest of everything they owe, instead of
+one reminder per debt:
+
+- Due debts are selected in bulk: one query per batch of recipients walks the
+  partial index on unsettled transactions in debtor order, groups them per
+  (debtor, creditor) pair and keeps the pairs where the debtor still owes the
+  creditor on the netted ``pair_balances`` (a debt cancelled out by money
+  owed the other way is not worth a reminder).
+- A debt is due once it is ``REMINDER_MIN_AGE_DAYS`` old, and a user is
+  reminded at most once every ``REMINDER_INTERVAL_DAYS`` (``reminder_states``).
+- Digests are delivered through a pluggable ``Notifier`` with at most
+  ``REMINDER_CONCURRENCY`` deliveries in flight; failed deliveries are
+  retried with exponential backoff. Only delivered recipients are marked as
+  reminded, so the rest are picked up again by the next run.
+
+``python -m app.services.reminder`` runs the pipeline once; schedule it
+(e.g. daily with cron) next to the other jobs.
+"""
+import json
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.models.reminder_state import ReminderState
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# One row per (recipient, creditor) with a net debt, and one row with NULL creditor
+# columns for a selected recipient who turns out to owe nothing net. The recipient
+# keyset cursor therefore advances past every selected recipient.
+DUE_REMINDERS_SQL = """
+    WITH recipients AS (
+        SELECT DISTINCT t.payee_id AS user_id
+        FROM transactions t
+        LEFT JOIN reminder_states s ON s.user_id = t.payee_id
+        WHERE t.is_active AND NOT t.is_settled
+          AND t.payee_id > :after_user_id
+          AND t.created_at < :due_before
+          AND (s.last_reminded_at IS NULL OR s.last_reminded_at < :remind_before)
+        ORDER BY t.payee_id
+        LIMIT :batch_size
+    ),
+    debts AS (
+        SELECT t.payee_id AS recipient_id, t.payer_id AS creditor_id,
+               COUNT(*) AS transaction_count, MIN(t.created_at) AS oldest_at
+        FROM transactions t
+        JOIN recipients r ON r.user_id = t.payee_id
+        WHERE t.is_active AND NOT t.is_settled AND t.created_at < :due_before
+        GROUP BY t.payee_id, t.payer_id
+    ),
+    owed AS (
+        SELECT d.recipient_id, d.creditor_id, d.transaction_count, d.oldest_at,
+               CASE WHEN d.creditor_id < d.recipient_id THEN p.balance ELSE -p.balance END AS amount
+        FROM debts d
+        JOIN pair_balances p
+          ON p.min_user_id = LEAST(d.recipient_id, d.creditor_id)
+         AND p.max_user_id = GREATEST(d.recipient_id, d.creditor_id)
+    )
+    SELECT r.user_id AS recipient_id, u.username, u.email, u.is_active,
+           o.creditor_id, c.username AS creditor_username, o.amount, o.transaction_count, o.oldest_at
+    FROM recipients r
+    JOIN users u ON u.id = r.user_id
+    LEFT JOIN owed o ON o.recipient_id = r.user_id AND o.amount > 0
+    LEFT JOIN users c ON c.id = o.creditor_id
+    ORDER BY r.user_id, o.amount DESC, o.creditor_id
+"""
+
+class ReminderItem(NamedTuple):
+    """What a recipient owes one creditor"""
+    creditor_id: int
+    creditor_username: str
+    amount: Decimal
+    transaction_count: int
+    oldest_at: datetime
+
+class ReminderDigest(NamedTuple):
+    """Everything one recipient owes, largest debt first"""
+    recipient_id: int
+    username: str
+    email: str
+    total: Decimal
+    items: List[ReminderItem]
+
+    @property
+    def reminder_count(self) -> int:
+        """Number of unsettled transactions the digest reminds of."""
+        return sum(item.transaction_count for item in self.items)
+
+def overdue_days(item: ReminderItem, now: datetime) -> int:
+    """Whole days since the oldest unsettled transaction of a debt."""
+    return max((now - item.oldest_at).days, 0)
+
+def render_digest(digest: ReminderDigest, now: datetime) -> str:
+    """Plain-text reminder message for a digest."""
+    lines = [f"Hi {digest.username}, a friendly reminder that you have {digest.total} outstanding:"]
+    for item in digest.items:
+        lines.append(f"- {item.amount} to {item.creditor_username} ({overdue_days(item, now)} days overdue)")
+    return "\n".join(lines)
+
+def build_digests(rows: Sequence) -> Tuple[List[ReminderDigest], Optional[int], int]:
+    """
+    Group the rows of ``DUE_REMINDERS_SQL`` into one digest per recipient.
+
+    Recipients who owe nothing net, or who are no longer active, get no digest.
+
+    Returns:
+        Tuple of (digests, last recipient ID selected, recipients selected)
+    """
+    digests: List[ReminderDigest] = []
+    last_recipient_id = None
+    recipients = 0
+    for row in rows:
+        if row.recipient_id != last_recipient_id:
+            last_recipient_id = row.recipient_id
+            recipients += 1
+            if row.creditor_id is not None and row.is_active:
+                digests.append(ReminderDigest(row.recipient_id, row.username, row.email, Decimal("0.00"), []))
+        if row.creditor_id is None or not row.is_active:
+            continue
+        digests[-1].items.append(ReminderItem(
+            row.creditor_id, row.creditor_username, row.amount, row.transaction_count, row.oldest_at
+        ))
+
+    digests = [digest._replace(total=sum((item.amount for item in digest.items), Decimal("0.00"))) for digest in digests]
+    return digests, last_recipient_id, recipients
+
+# Notifiers
+
+class Notifier(ABC):
+    """
+    Delivers reminder digests.
+
+    ``send`` raises to signal a failed delivery; the dispatcher retries it.
+    """
+
+    @abstractmethod
+    async def send(self, digest: ReminderDigest, now: datetime) -> None:
+        """Deliver one digest."""
+
+    async def close(self) -> None:
+        """Release the notifier's resources."""
+
+class LogNotifier(Notifier):
+    """Writes each reminder to the log; for development and tests."""
+
+    async def send(self, digest: ReminderDigest, now: datetime) -> None:
+        logger.info(f"Reminder to user {digest.recipient_id} <{digest.email}>:\n{render_digest(digest, now)}")
+
+class FileNotifier(Notifier):
+    """Appends each digest as one JSON line to a local file; for development and tests."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    async def send(self, digest: ReminderDigest, now: datetime) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = {
+            "sent_at": now.isoformat(),
+            "recipient_id": digest.recipient_id,
+            "email": digest.email,
+            "total": str(digest.total),
+            "items": [
+                {
+                    "creditor_id": item.creditor_id,
+                    "amount": str(item.amount),
+                    "transaction_count": item.transaction_count,
+                    "overdue_days": overdue_days(item, now)
+                }
+                for item in digest.items
+            ],
+            "message": render_digest(digest, now)
+        }
+        # One short write per line; lines from concurrent sends never interleave
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def notifier_from_settings(settings) -> Notifier:
+    """Create the notifier configured in application settings."""
+    if settings.REMINDER_NOTIFIER == "file":
+        return FileNotifier(settings.REMINDER_FILE_PATH)
+    return LogNotifier()
+
+# Dispatch
+
+async def deliver(
+    notifier: Notifier,
+    digest: ReminderDigest,
+    now: datetime,
+    semaphore: asyncio.Semaphore,
+    max_attempts: int = 4,
+    backoff_seconds: float = 0.5
+) -> bool:
+    """
+    Deliver a digest, retrying with exponential backoff.
+
+    The semaphore is only held while a delivery is in flight, not while
+    backing off, so one failing recipient does not hold up the others.
+
+    Returns:
+        True if the digest was delivered
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            async with semaphore:
+                await notifier.send(digest, now)
+            return True
+        except Exception as e:
+            if attempt == max_attempts:
+                logger.error(f"Reminder to user {digest.recipient_id} failed after {attempt} attempts: {str(e)}")
+                return False
+            await asyncio.sleep(backoff_seconds * 2 ** (attempt - 1))
+    return False
+
+async def dispatch(
+    notifier: Notifier,
+    digests: Sequence[ReminderDigest],
+    now: datetime,
+    concurrency: int = 20,
+    max_attempts: int = 4,
+    backoff_seconds: float = 0.5
+) -> List[ReminderDigest]:
+    """
+    Deliver digests with at most ``concurrency`` deliveries in flight.
+
+    Returns:
+        The digests that were delivered
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    delivered = await asyncio.gather(*(
+        deliver(notifier, digest, now, semaphore, max_attempts, backoff_seconds) for digest in digests
+    ))
+    return [digest for digest, ok in zip(digests, delivered) if ok]
+
+async def mark_reminded(db: AsyncSession, user_ids: Sequence[int], now: datetime) -> None:
+    """Record a reminder sent to each user, in one statement."""
+    if not user_ids:
+        return
+    statement = pg_insert(ReminderState).values([
+        {"user_id": user_id, "last_reminded_at": now, "reminders_sent": 1} for user_id in sorted(user_ids)
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[ReminderState.user_id],
+        set_={
+            "last_reminded_at": statement.excluded.last_reminded_at,
+            "reminders_sent": ReminderState.reminders_sent + 1
+        }
+    ))
+
+class ReminderRun(NamedTuple):
+    """Outcome of a reminder run"""
+    recipients: int
+    digests: int
+    delivered: int
+    reminders: int
+
+async def send_due_reminders(
+    db: AsyncSession,
+    notifier: Notifier,
+    now: Optional[datetime] = None,
+    min_age_days: int = 3,
+    interval_days: int = 7,
+    batch_size: int = 500,
+    concurrency: int = 20,
+    max_attempts: int = 4,
+    backoff_seconds: float = 0.5
+) -> ReminderRun:
+    """
+    Send a digest to every user with debts due for a reminder.
+
+    Recipients are processed ``batch_size`` at a time: one query selects the
+    batch and everything it owes, the digests are delivered concurrently and
+    the delivered recipients are marked in one statement before the next batch.
+
+    Args:
+        db: Database session
+        notifier: Notifier that delivers the digests
+        now: Current time (defaults to now)
+        min_age_days: Debts younger than this are not reminded of yet
+        interval_days: Minimum days between two reminders to the same user
+        batch_size: Recipients selected per query
+        concurrency: Maximum deliveries in flight
+        max_attempts: Delivery attempts per digest
+        backoff_seconds: Delay before the first retry, doubled on each further retry
+
+    Returns:
+        ReminderRun with the run's counts
+    """
+    now = now or datetime.now(timezone.utc)
+    params = {
+        "due_before": now - timedelta(days=min_age_days),
+        "remind_before": now - timedelta(days=interval_days),
+        "batch_size": batch_size,
+        "after_user_id": 0
+    }
+    totals = ReminderRun(0, 0, 0, 0)
+
+    while True:
+        result = await db.execute(text(DUE_REMINDERS_SQL), params)
+        digests, last_recipient_id, recipients = build_digests(result.all())
+        # Do not hold a snapshot open while notifying
+        await db.rollback()
+
+        delivered = await dispatch(notifier, digests, now, concurrency, max_attempts, backoff_seconds)
+        await mark_reminded(db, [digest.recipient_id for digest in delivered], now)
+        await db.commit()
+
+        totals = ReminderRun(
+            totals.recipients + recipients,
+            totals.digests + len(digests),
+            totals.delivered + len(delivered),
+            totals.reminders + sum(digest.reminder_count for digest in delivered)
+        )
+        if recipients < batch_size:
+            break
+        params["after_user_id"] = last_recipient_id
+
+    logger.info(
+        f"Reminders: {totals.delivered}/{totals.digests} digests delivered "
+        f"({totals.reminders} transactions, {totals.recipients} recipients checked)"
+    )
+    return totals
+
+async def run_job(notifier: Optional[Notifier] = None) -> ReminderRun:
+    """Job entry point: send every reminder currently due."""
+    from app.db.database import AsyncSessionLocal
+
+    notifier = notifier or notifier_from_settings(settings)
+    try:
+        async with AsyncSessionLocal() as db:
+            return await send_due_reminders(
+                db,
+                notifier,
+                min_age_days=settings.REMINDER_MIN_AGE_DAYS,
+                interval_days=settings.REMINDER_INTERVAL_DAYS,
+                batch_size=settings.REMINDER_BATCH_SIZE,
+                concurrency=settings.REMINDER_CONCURRENCY,
+                max_attempts=settings.REMINDER_MAX_ATTEMPTS,
+                backoff_seconds=settings.REMINDER_BACKOFF_SECONDS
+            )
+    finally:
+        await notifier.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_job())
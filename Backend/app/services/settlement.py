@@ -0,0 +1,235 @@
+"""
+Debt-simplification engine for group settlement.
+
+Net balances are worked in integer cents so every plan is exact. The solver
+is picked by the number of members with a non-zero balance:
+
+- up to ``EXACT_SOLVER_LIMIT``: exact minimum number of transfers via a
+  bitmask DP over zero-sum subsets
+- up to ``VECTORIZE_THRESHOLD``: greedy max-heap matching of the largest
+  debtor with the largest creditor
+- above that: a vectorized NumPy sweep over sorted cumulative balances
+
+Both heuristics produce at most ``n - 1`` transfers for ``n`` non-zero members.
+"""
+import heapq
+import logging
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy import select, and_, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+EXACT_SOLVER_LIMIT = 12
+VECTORIZE_THRESHOLD = 256
+CENTS = Decimal("0.01")
+
+class Transfer(NamedTuple):
+    """A single payment from a debtor to a creditor, in cents."""
+    from_user_id: int
+    to_user_id: int
+    amount_cents: int
+
+def to_cents(amount: Decimal) -> int:
+    """Convert a currency amount to integer cents."""
+    return int((amount / CENTS).to_integral_value())
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents back to a two-decimal currency amount."""
+    return (Decimal(cents) * CENTS).quantize(CENTS)
+
+def _settle_greedy(members: List[int], cents: List[int]) -> List[Transfer]:
+    """Match the largest debtor with the largest creditor until all balances are zero."""
+    creditors = [(-amount, user_id) for user_id, amount in zip(members, cents) if amount > 0]
+    debtors = [(amount, user_id) for user_id, amount in zip(members, cents) if amount < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append(Transfer(debtor, creditor, amount))
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+
+    return transfers
+
+def _settle_exact(members: List[int], cents: List[int]) -> List[Transfer]:
+    """
+    Minimum-transfer plan for small groups.
+
+    The optimum is ``n - k`` transfers where ``k`` is the largest number of
+    disjoint zero-sum subsets the balances split into. ``best[mask]`` is that
+    count for the members in ``mask``; following its argmax chain back from
+    the full set yields the subsets, each of which is then settled greedily
+    in ``size - 1`` transfers.
+    """
+    n = len(members)
+    full = (1 << n) - 1
+    subset_sum = [0] * (full + 1)
+    best = [0] * (full + 1)
+
+    for mask in range(1, full + 1):
+        low_bit = mask & -mask
+        subset_sum[mask] = subset_sum[mask ^ low_bit] + cents[low_bit.bit_length() - 1]
+
+        top = 0
+        remaining = mask
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            if best[mask ^ bit] > top:
+                top = best[mask ^ bit]
+        best[mask] = top + (1 if subset_sum[mask] == 0 else 0)
+
+    # Walk the argmax chain, cutting a group at every zero-sum mask
+    groups = []
+    current_group = 0
+    mask = full
+    while mask:
+        if subset_sum[mask] == 0 and current_group:
+            groups.append(current_group)
+            current_group = 0
+
+        chosen = 0
+        remaining = mask
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            if not chosen or best[mask ^ bit] > best[mask ^ chosen]:
+                chosen = bit
+        current_group |= chosen
+        mask ^= chosen
+    if current_group:
+        groups.append(current_group)
+
+    transfers = []
+    for group in groups:
+        indices = [i for i in range(n) if group >> i & 1]
+        transfers.extend(_settle_greedy(
+            [members[i] for i in indices],
+            [cents[i] for i in indices]
+        ))
+    return transfers
+
+def _settle_vectorized(members: List[int], cents: List[int]) -> List[Transfer]:
+    """
+    Vectorized sweep for large groups.
+
+    Creditors and debtors are each sorted by size and laid end to end on the
+    same [0, total] axis via cumulative sums. Every interval between adjacent
+    breakpoints of the two axes is one transfer between the debtor and the
+    creditor covering it, so the plan has at most ``n - 1`` transfers.
+    """
+    ids = np.asarray(members, dtype=np.int64)
+    amounts = np.asarray(cents, dtype=np.int64)
+
+    credit_mask = amounts > 0
+    debit_mask = amounts < 0
+    credit_ids = ids[credit_mask]
+    credit_amounts = amounts[credit_mask]
+    debit_ids = ids[debit_mask]
+    debit_amounts = -amounts[debit_mask]
+
+    credit_order = np.argsort(-credit_amounts, kind="stable")
+    debit_order = np.argsort(-debit_amounts, kind="stable")
+    credit_ids = credit_ids[credit_order]
+    debit_ids = debit_ids[debit_order]
+    credit_edges = np.cumsum(credit_amounts[credit_order])
+    debit_edges = np.cumsum(debit_amounts[debit_order])
+
+    edges = np.union1d(credit_edges, debit_edges)
+    starts = np.concatenate(([0], edges[:-1]))
+    sizes = edges - starts
+
+    creditor_index = np.searchsorted(credit_edges, starts, side="right")
+    debtor_index = np.searchsorted(debit_edges, starts, side="right")
+
+    return [
+        Transfer(int(debtor), int(creditor), int(amount))
+        for debtor, creditor, amount in zip(
+            debit_ids[debtor_index].tolist(),
+            credit_ids[creditor_index].tolist(),
+            sizes.tolist()
+        )
+    ]
+
+def simplify_debts(balances: Dict[int, int]) -> Tuple[List[Transfer], bool]:
+    """
+    Produce a small set of transfers that settles every balance.
+
+    Args:
+        balances: Mapping of user_id -> net balance in cents (positive means
+            the user is owed money); must sum to zero
+
+    Returns:
+        Tuple of (transfers, True if the plan is provably minimal)
+
+    Raises:
+        ValueError: If the balances do not sum to zero
+    """
+    members = [user_id for user_id, amount in sorted(balances.items()) if amount != 0]
+    cents = [balances[user_id] for user_id in members]
+
+    if sum(cents) != 0:
+        raise ValueError("Balances must sum to zero")
+
+    if len(members) <= EXACT_SOLVER_LIMIT:
+        return _settle_exact(members, cents), True
+    if len(members) <= VECTORIZE_THRESHOLD:
+        return _settle_greedy(members, cents), False
+    return _settle_vectorized(members, cents), False
+
+async def get_group_net_balances(db: AsyncSession, group_id: int) -> Dict[int, int]:
+    """
+    Compute each participant's net outstanding balance within a group.
+
+    Args:
+        db: Database session
+        group_id: Group to compute balances for
+
+    Returns:
+        Mapping of user_id -> net balance in cents (positive means owed money)
+    """
+    outstanding = and_(
+        Transaction.group_id == group_id,
+        Transaction.is_active == True,
+        Transaction.is_settled == False
+    )
+    legs = union_all(
+        select(Transaction.payer_id.label("user_id"), Transaction.transaction_amount.label("amount"))
+        .where(outstanding),
+        select(Transaction.payee_id.label("user_id"), (-Transaction.transaction_amount).label("amount"))
+        .where(outstanding)
+    ).subquery()
+
+    query = select(legs.c.user_id, func.sum(legs.c.amount)).group_by(legs.c.user_id)
+    result = await db.execute(query)
+    return {user_id: to_cents(amount) for user_id, amount in result if amount}
+
+async def get_settlement_plan(db: AsyncSession, group_id: int) -> Tuple[Dict[int, int], List[Transfer], bool]:
+    """
+    Build a settlement plan for a group from its outstanding transactions.
+
+    Args:
+        db: Database session
+        group_id: Group to settle
+
+    Returns:
+        Tuple of (net balances in cents, transfers, plan is minimal)
+    """
+    balances = await get_group_net_balances(db, group_id)
+    transfers, is_optimal = simplify_debts(balances)
+    logger.info(f"Settlement plan for group {group_id}: {len(balances)} members, {len(transfers)} transfers")
+    return balances, transfers, is_optimal
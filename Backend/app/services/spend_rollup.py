@@ -0,0 +1,403 @@
+"""
+Daily and monthly spend rollups per user and counterparty.
+
+``spend_daily_rollups`` and ``spend_monthly_rollups`` hold, for every user,
+bucket and counterparty, the active transactions the user paid and was paid
+for. Buckets are UTC calendar days and months of ``created_at``.
+
+The rollups cover every day before the watermark in ``spend_rollup_state``;
+later days (normally yesterday and today) are read live from ``transactions``
+and merged in, so new transactions never touch a rollup row. A periodic job
+folds closed days into the rollups and advances the watermark; its first
+run backfills all history. The only writes that touch closed days are
+deactivations and reactivations of older transactions, which apply their
+delta to the rollups in the write path.
+
+Writers and the job are serialized on the state row: a writer that needs
+the watermark locks it ``FOR SHARE`` after changing the transaction, and the
+job locks it ``FOR UPDATE`` before reading transactions. Either the job sees
+the writer's committed change, or the writer sees the advanced watermark and
+applies its delta itself. Plain inserts don't take the lock: they are
+stamped with ``now()``, their transaction's start, so the job only closes
+days that ended ``CLOSE_DELAY`` ago, by when every insert stamped with them
+has committed. Inserts with an explicit past ``created_at`` go through
+``apply_rollup_delta`` like the other writers.
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.partitions import add_months
+from app.models.spend_daily_rollup import SpendDailyRollup
+from app.models.spend_monthly_rollup import SpendMonthlyRollup
+from app.models.spend_rollup_state import SpendRollupState
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+class SpendTotals(NamedTuple):
+    """Spend in one bucket or with one counterparty."""
+    key: object
+    paid_amount: Decimal
+    paid_count: int
+    borrowed_amount: Decimal
+    borrowed_count: int
+
+def utc_day(moment: datetime) -> date:
+    return moment.astimezone(timezone.utc).date()
+
+def bucket_range(granularity: str, from_day: date, to_day: date) -> Tuple[date, date]:
+    """
+    Widen an inclusive day range to whole buckets.
+
+    Returns:
+        Tuple of (first bucket start, end of the last bucket, exclusive)
+    """
+    if granularity == "month":
+        return from_day.replace(day=1), add_months(to_day.replace(day=1), 1)
+    if granularity == "week":
+        return from_day - timedelta(days=from_day.weekday()), to_day + timedelta(days=7 - to_day.weekday())
+    return from_day, to_day + timedelta(days=1)
+
+# Write path
+
+async def lock_watermark(db: AsyncSession) -> Optional[date]:
+    """Get the rollup watermark, holding it against the rollup job until commit."""
+    result = await db.execute(
+        select(SpendRollupState.rolled_up_until).where(SpendRollupState.id == 1).with_for_update(read=True)
+    )
+    return result.scalar_one_or_none()
+
+async def apply_rollup_delta(
+    db: AsyncSession,
+    payer_id: int,
+    payee_id: int,
+    amount: Decimal,
+    created_at: datetime,
+    sign: int
+) -> bool:
+    """
+    Add (sign=1) or remove (sign=-1) a transaction from the rollups if its day is closed.
+
+    Call after the transaction row itself has been changed; the caller owns
+    the surrounding transaction.
+
+    Returns:
+        True if rollup rows were changed
+    """
+    day = utc_day(created_at)
+    watermark = await lock_watermark(db)
+    if watermark is None or day >= watermark:
+        return False
+
+    amount = amount * sign
+    legs = sorted([
+        (payer_id, payee_id, amount, sign, Decimal("0.00"), 0),
+        (payee_id, payer_id, Decimal("0.00"), 0, amount, sign),
+    ])
+    for model, bucket_column, bucket in (
+        (SpendDailyRollup, "day", day),
+        (SpendMonthlyRollup, "month", day.replace(day=1)),
+    ):
+        stmt = pg_insert(model).values([
+            {
+                "user_id": user_id,
+                bucket_column: bucket,
+                "counterparty_id": counterparty_id,
+                "paid_amount": paid_amount,
+                "paid_count": paid_count,
+                "borrowed_amount": borrowed_amount,
+                "borrowed_count": borrowed_count
+            }
+            for user_id, counterparty_id, paid_amount, paid_count, borrowed_amount, borrowed_count in legs
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.user_id, getattr(model, bucket_column), model.counterparty_id],
+            set_={
+                "paid_amount": model.paid_amount + stmt.excluded.paid_amount,
+                "paid_count": model.paid_count + stmt.excluded.paid_count,
+                "borrowed_amount": model.borrowed_amount + stmt.excluded.borrowed_amount,
+                "borrowed_count": model.borrowed_count + stmt.excluded.borrowed_count,
+                "last_updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+    return True
+
+# Rollup job
+
+# Per-user legs of every active transaction created in [from_day, to_day)
+LEGS_SQL = """
+    legs AS (
+        SELECT payer_id AS user_id, payee_id AS counterparty_id,
+               (created_at AT TIME ZONE 'UTC')::date AS day,
+               transaction_amount AS paid_amount, 1 AS paid_count,
+               0::numeric AS borrowed_amount, 0 AS borrowed_count
+        FROM transactions
+        WHERE is_active
+          AND created_at >= CAST(:from_day AS DATE)::timestamp AT TIME ZONE 'UTC'
+          AND created_at < CAST(:to_day AS DATE)::timestamp AT TIME ZONE 'UTC'
+        UNION ALL
+        SELECT payee_id, payer_id,
+               (created_at AT TIME ZONE 'UTC')::date,
+               0::numeric, 0,
+               transaction_amount, 1
+        FROM transactions
+        WHERE is_active
+          AND created_at >= CAST(:from_day AS DATE)::timestamp AT TIME ZONE 'UTC'
+          AND created_at < CAST(:to_day AS DATE)::timestamp AT TIME ZONE 'UTC'
+    )
+"""
+
+ROLLUP_SQL = f"""
+    WITH {LEGS_SQL},
+    daily AS (
+        INSERT INTO spend_daily_rollups
+            (user_id, day, counterparty_id, paid_amount, paid_count, borrowed_amount, borrowed_count)
+        SELECT user_id, day, counterparty_id,
+               SUM(paid_amount), SUM(paid_count), SUM(borrowed_amount), SUM(borrowed_count)
+        FROM legs
+        GROUP BY user_id, day, counterparty_id
+        ORDER BY user_id, day, counterparty_id
+        ON CONFLICT (user_id, day, counterparty_id) DO UPDATE SET
+            paid_amount = spend_daily_rollups.paid_amount + EXCLUDED.paid_amount,
+            paid_count = spend_daily_rollups.paid_count + EXCLUDED.paid_count,
+            borrowed_amount = spend_daily_rollups.borrowed_amount + EXCLUDED.borrowed_amount,
+            borrowed_count = spend_daily_rollups.borrowed_count + EXCLUDED.borrowed_count,
+            last_updated_at = now()
+    )
+    INSERT INTO spend_monthly_rollups
+        (user_id, month, counterparty_id, paid_amount, paid_count, borrowed_amount, borrowed_count)
+    SELECT user_id, date_trunc('month', day::timestamp)::date, counterparty_id,
+           SUM(paid_amount), SUM(paid_count), SUM(borrowed_amount), SUM(borrowed_count)
+    FROM legs
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (user_id, month, counterparty_id) DO UPDATE SET
+        paid_amount = spend_monthly_rollups.paid_amount + EXCLUDED.paid_amount,
+        paid_count = spend_monthly_rollups.paid_count + EXCLUDED.paid_count,
+        borrowed_amount = spend_monthly_rollups.borrowed_amount + EXCLUDED.borrowed_amount,
+        borrowed_count = spend_monthly_rollups.borrowed_count + EXCLUDED.borrowed_count,
+        last_updated_at = now()
+"""
+
+# Oldest day any rollup run considers; the first run backfills from here
+EPOCH = date(1970, 1, 1)
+
+# A day is closed this long after it ends, longer than any transaction that
+# started on it can stay open
+CLOSE_DELAY = timedelta(days=1)
+
+def closable_until(now: Optional[datetime] = None) -> date:
+    """Latest watermark the rollup job may set: the end of the last day ended ``CLOSE_DELAY`` ago."""
+    return utc_day((now or datetime.now(timezone.utc)) - CLOSE_DELAY)
+
+async def roll_up(db: AsyncSession, until: Optional[date] = None) -> Tuple[Optional[date], date]:
+    """
+    Fold every closed day since the watermark into the rollups and advance it.
+
+    The first run (no watermark yet) backfills all history.
+
+    Args:
+        db: Database session
+        until: New watermark, exclusive (defaults to, and capped at, ``closable_until()``)
+
+    Returns:
+        Tuple of (previous watermark, new watermark)
+    """
+    until = min(until, closable_until()) if until else closable_until()
+
+    # Make sure the state row exists before locking it. Only on the very first
+    # run can a writer have skipped the rollups for lack of a row; ``rebuild``
+    # repairs that if it ever matters.
+    await db.execute(
+        pg_insert(SpendRollupState).values(id=1, rolled_up_until=None).on_conflict_do_nothing()
+    )
+    await db.commit()
+
+    result = await db.execute(
+        select(SpendRollupState.rolled_up_until).where(SpendRollupState.id == 1).with_for_update()
+    )
+    watermark = result.scalar_one()
+    if watermark is not None and watermark >= until:
+        await db.rollback()
+        return watermark, watermark
+
+    await db.execute(text(ROLLUP_SQL), {"from_day": watermark or EPOCH, "to_day": until})
+    await db.execute(
+        update(SpendRollupState)
+        .where(SpendRollupState.id == 1)
+        .values(rolled_up_until=until, last_updated_at=func.now())
+    )
+    await db.commit()
+    logger.info(f"Spend rollups advanced from {watermark} to {until}")
+    return watermark, until
+
+async def rebuild_rollups(db: AsyncSession) -> Optional[date]:
+    """
+    Recompute every rollup row up to the current watermark from ``transactions``.
+
+    Use after a data repair or drift. Holding the state row keeps writers
+    that need the watermark waiting until the rebuild commits.
+
+    Returns:
+        The watermark the rollups were rebuilt to
+    """
+    result = await db.execute(
+        select(SpendRollupState.rolled_up_until).where(SpendRollupState.id == 1).with_for_update()
+    )
+    watermark = result.scalar_one_or_none()
+    if watermark is None:
+        await db.rollback()
+        return None
+
+    await db.execute(delete(SpendDailyRollup))
+    await db.execute(delete(SpendMonthlyRollup))
+    await db.execute(text(ROLLUP_SQL), {"from_day": EPOCH, "to_day": watermark})
+    await db.commit()
+    logger.info(f"Spend rollups rebuilt up to {watermark}")
+    return watermark
+
+async def run_job(job: str):
+    """Job entry point: run ``rollup`` or ``rebuild`` in its own session."""
+    from app.db.database import AsyncSessionLocal
+
+    jobs = {
+        "rollup": roll_up,
+        "rebuild": rebuild_rollups,
+    }
+    async with AsyncSessionLocal() as db:
+        return await jobs[job](db)
+
+# Reads
+
+def _spend_query(rolled_table: str, rolled_bucket: str, key_expression: str, counterparty_filter: bool) -> str:
+    """
+    Rollup rows in range plus live legs since the watermark, summed per ``key_expression``.
+
+    ``key_expression`` may use the ``bucket`` (day or month start) and
+    ``counterparty_id`` columns of the combined rows.
+    """
+    counterparty = "AND counterparty_id = :counterparty_id" if counterparty_filter else ""
+    live_range = """
+          AND created_at >= GREATEST((SELECT day FROM watermark), CAST(:from_day AS DATE))::timestamp AT TIME ZONE 'UTC'
+          AND created_at < CAST(:to_day AS DATE)::timestamp AT TIME ZONE 'UTC'"""
+    return f"""
+    WITH watermark AS (
+        SELECT COALESCE(MAX(rolled_up_until), CAST(:epoch AS DATE)) AS day FROM spend_rollup_state
+    ),
+    live_legs AS (
+        SELECT payee_id AS counterparty_id, created_at,
+               transaction_amount AS paid_amount, 1 AS paid_count,
+               0::numeric AS borrowed_amount, 0 AS borrowed_count
+        FROM transactions
+        WHERE payer_id = :user_id AND is_active{live_range}
+        UNION ALL
+        SELECT payer_id, created_at,
+               0::numeric, 0,
+               transaction_amount, 1
+        FROM transactions
+        WHERE payee_id = :user_id AND is_active{live_range}
+    ),
+    combined AS (
+        SELECT {rolled_bucket} AS bucket, counterparty_id,
+               paid_amount, paid_count, borrowed_amount, borrowed_count
+        FROM {rolled_table}
+        WHERE user_id = :user_id
+          AND {rolled_bucket} >= CAST(:from_day AS DATE) AND {rolled_bucket} < CAST(:to_day AS DATE)
+          {counterparty}
+        UNION ALL
+        SELECT (created_at AT TIME ZONE 'UTC')::date, counterparty_id,
+               paid_amount, paid_count, borrowed_amount, borrowed_count
+        FROM live_legs
+        WHERE TRUE {counterparty}
+    )
+    SELECT {key_expression} AS key,
+           SUM(paid_amount), SUM(paid_count), SUM(borrowed_amount), SUM(borrowed_count)
+    FROM combined
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+def _rollup_source(from_day: date, to_day: date) -> Tuple[str, str]:
+    """Read the monthly table when the range is whole months, else the daily one."""
+    if from_day.day == 1 and to_day.day == 1:
+        return SpendMonthlyRollup.__tablename__, "month"
+    return SpendDailyRollup.__tablename__, "day"
+
+def _totals(rows) -> List[SpendTotals]:
+    return [
+        SpendTotals(key, paid_amount, int(paid_count), borrowed_amount, int(borrowed_count))
+        for key, paid_amount, paid_count, borrowed_amount, borrowed_count in rows
+    ]
+
+async def get_spend_series(
+    db: AsyncSession,
+    user_id: int,
+    granularity: str,
+    from_day: date,
+    to_day: date,
+    counterparty_id: Optional[int] = None
+) -> List[SpendTotals]:
+    """
+    Get a user's spend per day, week or month.
+
+    Args:
+        db: Database session
+        user_id: User whose spend to read
+        granularity: "day", "week" or "month"
+        from_day: First bucket start (see ``bucket_range``)
+        to_day: End of the last bucket, exclusive
+        counterparty_id: Only count transactions with this other user
+
+    Returns:
+        Non-empty buckets in order, keyed by bucket start date
+    """
+    if granularity == "month":
+        table, bucket = _rollup_source(from_day, to_day)
+    else:
+        table, bucket = SpendDailyRollup.__tablename__, "day"
+    period = "bucket" if granularity == "day" else f"date_trunc('{granularity}', bucket::timestamp)::date"
+    query = _spend_query(table, bucket, period, counterparty_id is not None)
+
+    params = {"epoch": EPOCH, "user_id": user_id, "from_day": from_day, "to_day": to_day}
+    if counterparty_id is not None:
+        params["counterparty_id"] = counterparty_id
+    result = await db.execute(text(query), params)
+    return _totals(result)
+
+async def get_counterparty_spend(db: AsyncSession, user_id: int, from_day: date, to_day: date) -> List[SpendTotals]:
+    """
+    Get a user's spend with each counterparty over a range of days.
+
+    Args:
+        db: Database session
+        user_id: User whose spend to read
+        from_day: First day, inclusive
+        to_day: Last day, exclusive
+
+    Returns:
+        Per-counterparty totals ordered by counterparty_id, keyed by counterparty_id
+    """
+    table, bucket = _rollup_source(from_day, to_day)
+    query = _spend_query(table, bucket, "counterparty_id", False)
+
+    result = await db.execute(text(query), {
+        "epoch": EPOCH,
+        "user_id": user_id,
+        "from_day": from_day,
+        "to_day": to_day
+    })
+    return _totals(result)
+
+if __name__ == "__main__":
+    import sys
+    import asyncio
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_job(sys.argv[1] if len(sys.argv) > 1 else "rollup"))
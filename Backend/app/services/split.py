@@ -0,0 +1,194 @@
+"""
+Group expense splitting.
+
+One expense paid by a group member is divided between participants and
+expanded into one ``Transaction`` per participant other than the payer.
+Amounts are worked in integer cents: each participant gets the floor of
+their exact share, and the leftover cents go one each to the largest
+fractional remainders, ties broken by user_id, so the shares always sum to
+the total and the same input always produces the same split.
+
+All rows, their ledger events and the balance deltas are written by a single
+statement (see ``ledger.bulk_insert_sql``), so a split costs one round-trip
+however many people take part.
+"""
+import math
+import logging
+from decimal import Decimal
+from fractions import Fraction
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.schemas.split import GroupExpenseCreate, SplitParticipant
+from app.schemas.transaction import TransactionRow
+from app.services.ledger import bulk_insert_sql, publish_committed
+from app.services.settlement import to_cents, from_cents
+from app.services import budget as budget_service
+from app.services import group as group_service
+from app.db.post_commit import after_commit
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+HUNDRED = Decimal("100")
+
+SPLIT_SOURCE_SQL = """
+        SELECT CAST(:payer_id AS BIGINT), share.payee_id, CAST(:group_id AS BIGINT), share.amount,
+               CAST(:description AS TEXT), CAST(:category AS VARCHAR(50)), FALSE, TRUE, TRUE
+        FROM unnest(CAST(:payee_ids AS BIGINT[]), CAST(:amounts AS NUMERIC(12, 2)[])) AS share(payee_id, amount)
+        ORDER BY share.payee_id
+"""
+
+INSERT_SPLIT_SQL = bulk_insert_sql(
+    SPLIT_SOURCE_SQL,
+    f"SELECT {', '.join(TransactionRow._fields)} FROM inserted ORDER BY id"
+)
+
+def allocate_cents(total_cents: int, weights: Sequence[Fraction]) -> List[int]:
+    """
+    Divide ``total_cents`` in proportion to ``weights`` using largest remainders.
+
+    Args:
+        total_cents: Amount to divide
+        weights: Non-negative weights with a positive sum
+
+    Returns:
+        Cents per weight, summing exactly to ``total_cents``
+    """
+    weight_sum = sum(weights)
+    exact = [total_cents * weight / weight_sum for weight in weights]
+    cents = [math.floor(share) for share in exact]
+    leftover = total_cents - sum(cents)
+    # Stable sort: equal remainders keep participant order
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - cents[i], reverse=True)
+    for i in by_remainder[:leftover]:
+        cents[i] += 1
+    return cents
+
+def _values(participants: Sequence[SplitParticipant], mode: str) -> List[Decimal]:
+    values = [participant.value for participant in participants]
+    if any(value is None for value in values):
+        raise ValueError(f"Every participant needs a value for a {mode} split")
+    if any(value < 0 for value in values):
+        raise ValueError("Split values cannot be negative")
+    return values
+
+def compute_split(total_amount: Decimal, mode: str, participants: Sequence[SplitParticipant]) -> List[Tuple[int, int]]:
+    """
+    Compute each participant's share of an expense.
+
+    Args:
+        total_amount: Expense total (at most two decimal places)
+        mode: "equal", "shares", "percentage" or "exact"
+        participants: Participants; ``value`` holds the share count,
+            percentage or exact amount for the non-equal modes
+
+    Returns:
+        List of (user_id, share in cents) ordered by user_id
+
+    Raises:
+        ValueError: If the amounts or values are inconsistent
+    """
+    total_cents = to_cents(total_amount)
+    if from_cents(total_cents) != total_amount:
+        raise ValueError("Total amount cannot have more than two decimal places")
+
+    participants = sorted(participants, key=lambda participant: participant.user_id)
+    user_ids = [participant.user_id for participant in participants]
+
+    if mode == "equal":
+        cents = allocate_cents(total_cents, [Fraction(1)] * len(participants))
+    elif mode == "shares":
+        values = _values(participants, mode)
+        if sum(values) <= 0:
+            raise ValueError("Total shares must be positive")
+        cents = allocate_cents(total_cents, [Fraction(value) for value in values])
+    elif mode == "percentage":
+        values = _values(participants, mode)
+        if sum(values) != HUNDRED:
+            raise ValueError("Percentages must add up to 100")
+        cents = allocate_cents(total_cents, [Fraction(value) for value in values])
+    elif mode == "exact":
+        values = _values(participants, mode)
+        cents = [to_cents(value) for value in values]
+        if any(from_cents(c) != value for c, value in zip(cents, values)):
+            raise ValueError("Exact amounts cannot have more than two decimal places")
+        if sum(cents) != total_cents:
+            raise ValueError("Exact amounts must add up to the total amount")
+    else:
+        raise ValueError(f"Unsupported split mode: {mode}")
+
+    return list(zip(user_ids, cents))
+
+async def create_group_expense(
+    db: AsyncSession,
+    group_id: int,
+    expense: GroupExpenseCreate
+) -> Tuple[List[Tuple[int, int]], List[TransactionRow]]:
+    """
+    Split a group expense and record a transaction for every other participant.
+
+    The payer and all participants must be active members (or the admin) of
+    the group; that is checked with one query.
+
+    Args:
+        db: Database session
+        group_id: Group the expense belongs to
+        expense: Expense data from request
+
+    Returns:
+        Tuple of (shares as (user_id, cents), created transaction rows)
+
+    Raises:
+        HTTPException: If the split is invalid or cannot be stored
+    """
+    try:
+        shares = compute_split(expense.total_amount, expense.mode, expense.participants)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    user_ids = {user_id for user_id, _ in shares} | {expense.payer_id}
+    members = await group_service.get_active_member_ids(db=db, group_id=group_id, user_ids=user_ids)
+    non_members = sorted(user_ids - members)
+    if non_members:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Users are not active members of this group: {', '.join(map(str, non_members))}"
+        )
+
+    # The payer's own share and zero shares don't create a debt
+    owed = [(user_id, cents) for user_id, cents in shares if user_id != expense.payer_id and cents > 0]
+    if not owed:
+        return shares, []
+
+    try:
+        await budget_service.lock_budgets(db, [expense.payer_id])
+        result = await db.execute(text(INSERT_SPLIT_SQL), {
+            "payer_id": expense.payer_id,
+            "group_id": group_id,
+            "description": expense.description,
+            "category": expense.category,
+            "payee_ids": [user_id for user_id, _ in owed],
+            "amounts": [from_cents(cents) for _, cents in owed]
+        })
+        rows = [TransactionRow._make(row) for row in result]
+        await db.commit()
+        after_commit(db, lambda: publish_committed(rows))
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Failed to split expense in group {group_id}: {str(e)}")
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Could not record the expense. Please check the participants."
+        )
+
+    logger.info(f"Group {group_id} expense split {expense.mode} between {len(shares)} users: {len(rows)} transactions")
+    return shares, rows
@@ -0,0 +1,204 @@
+"""
+Read paths over a user's transactions.
+"""
+import base64
+import heapq
+import logging
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from sqlalchemy import select, and_, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionRow
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Columns selected by transaction projections, in TransactionRow field order
+TRANSACTION_ROW_COLUMNS = tuple(getattr(Transaction, name) for name in TransactionRow._fields)
+
+def encode_cursor(row: TransactionRow) -> str:
+    """
+    Encode the keyset position after a row as an opaque cursor.
+
+    Args:
+        row: Last row of the current page
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        Tuple of (created_at, id) of the last row already returned
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _history_branch(
+    side_column,
+    other_column,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]],
+    conditions: list,
+    counterparty_id: Optional[int]
+):
+    """
+    One side (payer or payee) of a user's history.
+
+    Filters on ``side_column`` and orders by ``(created_at, id)``, so it is
+    served by a backward range scan on the matching composite index.
+    """
+    branch_conditions = [side_column == user_id, *conditions]
+    if counterparty_id is not None:
+        branch_conditions.append(other_column == counterparty_id)
+    if after is not None:
+        branch_conditions.append(tuple_(Transaction.created_at, Transaction.id) < after)
+
+    return (
+        select(*TRANSACTION_ROW_COLUMNS)
+        .where(and_(*branch_conditions))
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        .limit(limit)
+    )
+
+async def get_transaction_history(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    is_settled: Optional[bool] = None,
+    is_group_transaction: Optional[bool] = None,
+    counterparty_id: Optional[int] = None
+) -> Tuple[List[TransactionRow], Optional[str]]:
+    """
+    Get a page of a user's active transactions, newest first.
+
+    The payer and payee sides are fetched as two index range scans of at most
+    ``limit + 1`` rows each and merged, so a page costs the same no matter how
+    deep the cursor is.
+
+    Args:
+        db: Database session
+        user_id: User whose history to read
+        limit: Maximum number of transactions to return
+        cursor: Cursor from the previous page, None for the first page
+        is_settled: Only return settled (True) or unsettled (False) transactions
+        is_group_transaction: Only return group (True) or direct (False) transactions
+        counterparty_id: Only return transactions with this other user
+
+    Returns:
+        Tuple of (transaction rows, cursor for the next page or None)
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    conditions = [Transaction.is_active == True]
+    if is_settled is not None:
+        conditions.append(Transaction.is_settled == is_settled)
+    if is_group_transaction is not None:
+        conditions.append(Transaction.is_group_transaction == is_group_transaction)
+
+    fetch = limit + 1
+    history = union_all(
+        _history_branch(Transaction.payer_id, Transaction.payee_id, user_id, fetch, after, conditions, counterparty_id),
+        _history_branch(Transaction.payee_id, Transaction.payer_id, user_id, fetch, after, conditions, counterparty_id)
+    ).subquery()
+
+    query = (
+        select(*(history.c[name] for name in TransactionRow._fields))
+        .order_by(history.c.created_at.desc(), history.c.id.desc())
+        .limit(fetch)
+    )
+    result = await db.execute(query)
+    rows = [TransactionRow._make(row) for row in result]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    return rows, next_cursor
+
+def _top_branch(side_column, user_id: int, k: int, from_time: datetime, to_time: datetime):
+    """
+    The ``k`` largest active transactions on one side of a user's history in a window.
+
+    Reads only the window's range of the side's covering index (and only
+    the window's partitions), selecting with a bounded top-N sort.
+    """
+    return (
+        select(Transaction.transaction_amount, Transaction.id, Transaction.created_at)
+        .where(and_(
+            side_column == user_id,
+            Transaction.created_at >= from_time,
+            Transaction.created_at < to_time,
+            Transaction.is_active == True
+        ))
+        .order_by(Transaction.transaction_amount.desc(), Transaction.id.desc())
+        .limit(k)
+    )
+
+async def get_top_transactions(
+    db: AsyncSession,
+    user_id: int,
+    k: int,
+    from_time: datetime,
+    to_time: datetime
+) -> List[TransactionRow]:
+    """
+    Get a user's ``k`` largest active transactions created in [from_time, to_time).
+
+    Each side (payer and payee) yields at most ``k`` candidates as
+    (amount, id, created_at) from its covering index; a bounded heap picks
+    the overall top ``k`` and only those rows are then fetched by primary
+    key. The cost depends on the window and ``k``, not on the length of the
+    user's history.
+
+    Args:
+        db: Database session
+        user_id: User whose transactions to rank
+        k: Number of transactions to return
+        from_time: Start of the window, inclusive
+        to_time: End of the window, exclusive
+
+    Returns:
+        Transaction rows by amount descending, ties broken by newest ID
+    """
+    candidates = await db.execute(union_all(
+        _top_branch(Transaction.payer_id, user_id, k, from_time, to_time),
+        _top_branch(Transaction.payee_id, user_id, k, from_time, to_time)
+    ))
+    top = heapq.nlargest(k, candidates.all(), key=lambda candidate: (candidate[0], candidate[1]))
+    if not top:
+        return []
+
+    result = await db.execute(
+        select(*TRANSACTION_ROW_COLUMNS)
+        .where(tuple_(Transaction.id, Transaction.created_at).in_([(row_id, created_at) for _, row_id, created_at in top]))
+    )
+    rows = {row.id: TransactionRow._make(row) for row in result}
+    return [rows[row_id] for _, row_id, _ in top if row_id in rows]
+
@@ -0,0 +1,176 @@
+"""
+Streaming export of transaction ledgers.
+
+Rows are read through a server-side cursor (``AsyncSession.stream`` with a
+fixed ``yield_per``), encoded to CSV or NDJSON in small buffered chunks and
+optionally compressed with zstd or gzip on the fly, so memory use is constant
+regardless of how long the history is.
+"""
+import io
+import csv
+import zlib
+import logging
+from typing import AsyncIterator, Optional
+
+import pydantic_core
+from sqlalchemy import select, and_, union_all
+
+from app.db.database import AsyncSessionLocal
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionRow
+from app.services.transaction import TRANSACTION_ROW_COLUMNS
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+YIELD_PER = 1000
+FLUSH_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+COMPRESSIONS = {
+    "gzip": ("application/gzip", "gz"),
+    "zstd": ("application/zstd", "zst"),
+}
+
+def user_ledger_query(user_id: int):
+    """
+    All of a user's active transactions, oldest first.
+
+    Each side is ordered by ``(created_at, id)`` on its own, which lets it
+    be read in order from the side's composite index; the two ordered
+    streams are then merged, so the first chunk streams without sorting the
+    user's whole history.
+    """
+    def branch(side_column):
+        return (
+            select(*TRANSACTION_ROW_COLUMNS)
+            .where(and_(side_column == user_id, Transaction.is_active == True))
+            .order_by(Transaction.created_at, Transaction.id)
+        )
+
+    ledger = union_all(branch(Transaction.payer_id), branch(Transaction.payee_id)).subquery()
+    return (
+        select(*(ledger.c[name] for name in TransactionRow._fields))
+        .order_by(ledger.c.created_at, ledger.c.id)
+    )
+
+def group_ledger_query(group_id: int):
+    """All of a group's active transactions, oldest first."""
+    return (
+        select(*TRANSACTION_ROW_COLUMNS)
+        .where(
+            and_(
+                Transaction.group_id == group_id,
+                Transaction.is_active == True
+            )
+        )
+        .order_by(Transaction.created_at, Transaction.id)
+    )
+
+async def stream_rows(query, yield_per: int = YIELD_PER) -> AsyncIterator[TransactionRow]:
+    """
+    Stream rows of a transaction projection through a server-side cursor.
+
+    The export outlives the request's dependency-managed session, so it opens
+    its own session for the duration of the stream.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=yield_per))
+        async for row in result:
+            yield TransactionRow._make(row)
+
+async def encode_csv(rows: AsyncIterator[TransactionRow]) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with a header, yielding roughly FLUSH_BYTES at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TransactionRow._fields)
+
+    async for row in rows:
+        writer.writerow([
+            "" if value is None else value.isoformat() if hasattr(value, "isoformat") else value
+            for value in row
+        ])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+async def encode_ndjson(rows: AsyncIterator[TransactionRow]) -> AsyncIterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding roughly FLUSH_BYTES at a time."""
+    buffer = bytearray()
+    async for row in rows:
+        buffer += pydantic_core.to_json(row._asdict())
+        buffer += b"\n"
+        if len(buffer) >= FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
+def _get_compressor(compression: str):
+    if compression == "gzip":
+        # wbits=31 writes a gzip header and trailer
+        return zlib.compressobj(wbits=31)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+async def compress(chunks: AsyncIterator[bytes], compression: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Optionally compress a byte stream incrementally.
+
+    Args:
+        chunks: Encoded export chunks
+        compression: "gzip", "zstd" or None for passthrough
+    """
+    if not compression:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    compressor = _get_compressor(compression)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    tail = compressor.flush()
+    if tail:
+        yield tail
+
+def export_stream(query, export_format: str, compression: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Build the full export pipeline for a transaction query.
+
+    Args:
+        query: Transaction projection query (see ``user_ledger_query``)
+        export_format: "csv" or "ndjson"
+        compression: "gzip", "zstd" or None
+
+    Returns:
+        Async iterator of response body chunks
+    """
+    encoder = encode_csv if export_format == "csv" else encode_ndjson
+    return compress(encoder(stream_rows(query)), compression)
+
+def export_media_type_and_filename(name: str, export_format: str, compression: Optional[str] = None):
+    """
+    Get the response media type and download filename for an export.
+
+    Returns:
+        Tuple of (media type, filename)
+    """
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"{name}.{extension}"
+    if compression:
+        media_type, compressed_extension = COMPRESSIONS[compression]
+        filename = f"{filename}.{compressed_extension}"
+    return media_type, filename
@@ -0,0 +1,296 @@
+"""
+Bulk transaction ingestion.
+
+Request bodies are stream-parsed as NDJSON or CSV, validated against
+``TransactionCreate`` in chunks, and COPYed into a per-transaction staging
+table with asyncpg's ``copy_records_to_table``. A single set-based statement
+then moves the staged rows into ``transactions``, applies the summed balance
+deltas to ``transaction_summary`` and ``pair_balances``, and appends a
+``created`` event per row to ``ledger_events``. Nothing is visible until the
+final commit, so an import either lands completely or not at all. With an
+analytics sink configured, the merge also returns the inserted rows so they
+can be handed to it after the commit.
+"""
+import csv
+import json
+import codecs
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.schemas.transaction import TransactionCreate, TransactionRow
+from app.services.ledger import LEDGER_INSERT_COLUMNS, bulk_insert_sql, publish_committed
+from app.services import analytics_sink
+from app.services import budget as budget_service
+from app.services import group as group_service
+from app.services.dashboard import dashboard_cache
+from app.db.post_commit import after_commit
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+STAGING_TABLE = "transaction_import_staging"
+
+# Staged columns, in COPY order
+STAGING_COLUMNS = LEDGER_INSERT_COLUMNS
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        payer_id BIGINT NOT NULL,
+        payee_id BIGINT NOT NULL,
+        group_id BIGINT,
+        transaction_amount NUMERIC(12, 2) NOT NULL,
+        description TEXT NOT NULL,
+        category VARCHAR(50),
+        is_settled BOOLEAN NOT NULL,
+        is_group_transaction BOOLEAN NOT NULL,
+        is_active BOOLEAN NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# Move staged rows into transactions and apply all of their ledger effects
+MERGE_SQL = bulk_insert_sql(
+    f"SELECT {', '.join(STAGING_COLUMNS)} FROM {STAGING_TABLE}",
+    "SELECT (SELECT COUNT(*) FROM inserted) AS inserted, (SELECT COUNT(*) FROM summaries) AS users_updated, "
+    "(SELECT array_agg(DISTINCT party) FROM inserted CROSS JOIN LATERAL (VALUES (payer_id), (payee_id)) AS parties(party)) AS parties"
+)
+
+# Same merge, returning the inserted rows (each followed by the users_updated count)
+MERGE_RETURNING_SQL = bulk_insert_sql(
+    f"SELECT {', '.join(STAGING_COLUMNS)} FROM {STAGING_TABLE}",
+    f"SELECT {', '.join(TransactionRow._fields)}, (SELECT COUNT(*) FROM summaries) AS users_updated FROM inserted"
+)
+
+@dataclass
+class ImportResult:
+    """Outcome of a bulk import."""
+    inserted: int = 0
+    users_updated: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into decoded lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Stream-parse newline-delimited JSON.
+
+    Yields:
+        (line number, parsed object); unparseable lines yield the JSONDecodeError
+    """
+    line_number = 0
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Stream-parse CSV with a header row.
+
+    Quoted fields may span lines: a record is only parsed once its quotes
+    balance, which holds for RFC 4180 escaping (``""``).
+
+    Yields:
+        (line number of the record's first line, dict of column -> value)
+    """
+    header: Optional[List[str]] = None
+    record = ""
+    record_start = 0
+    line_number = 0
+
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not record:
+            if not line.strip():
+                continue
+            record_start = line_number
+            record = line
+        else:
+            record += "\n" + line
+
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells mean "not provided" so schema defaults apply
+        yield record_start, {
+            name: value for name, value in zip(header, values) if value != ""
+        }
+
+    if record:
+        yield record_start, ValueError("Unterminated quoted field")
+
+def _to_record(transaction: TransactionCreate) -> tuple:
+    return tuple(getattr(transaction, column) for column in STAGING_COLUMNS)
+
+async def _get_asyncpg_connection(db: AsyncSession):
+    """Get the raw asyncpg connection backing the session's current transaction."""
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+async def import_transactions(
+    db: AsyncSession,
+    rows: AsyncIterator[Tuple[int, Any]],
+    user_id: int,
+    chunk_size: int = CHUNK_SIZE
+) -> ImportResult:
+    """
+    Validate, stage and merge a stream of transaction rows.
+
+    Every row must pass ``TransactionCreate`` validation, have distinct payer
+    and payee, and involve ``user_id``; the payer and payee of a group row must
+    be active members (or the admin) of the group. Valid chunks are COPYed as they fill;
+    if any row fails, the import is rolled back and the errors are returned
+    without touching ``transactions``.
+
+    Args:
+        db: Database session
+        rows: (line number, row) pairs from ``parse_ndjson`` or ``parse_csv``
+        user_id: ID of the importing user
+        chunk_size: Rows validated and COPYed per batch
+
+    Returns:
+        ImportResult with counts, or with errors if nothing was imported
+
+    Raises:
+        HTTPException: If the merge violates a constraint (e.g. unknown user)
+    """
+    result = ImportResult()
+    error_count = 0
+    staged = 0
+    chunk: List[tuple] = []
+    # group ID -> party -> first line the party appears on in that group
+    group_parties: Dict[int, Dict[int, int]] = {}
+    payer_ids: Set[int] = set()
+
+    await db.execute(text(CREATE_STAGING_SQL))
+    pg_connection = await _get_asyncpg_connection(db)
+
+    async def flush():
+        nonlocal staged
+        if chunk and not error_count:
+            await pg_connection.copy_records_to_table(
+                STAGING_TABLE,
+                records=chunk,
+                columns=list(STAGING_COLUMNS)
+            )
+            staged += len(chunk)
+        chunk.clear()
+
+    async for line_number, row in rows:
+        error = None
+        if isinstance(row, Exception):
+            error = str(row)
+        elif not isinstance(row, dict):
+            error = "Row must be an object"
+        else:
+            try:
+                transaction = TransactionCreate.model_validate(row)
+                if transaction.payer_id == transaction.payee_id:
+                    error = "Payer and payee must be different users"
+                elif user_id not in (transaction.payer_id, transaction.payee_id):
+                    error = "You can only import transactions you are part of"
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+
+        if error:
+            error_count += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append({"line": line_number, "error": error})
+            continue
+
+        if transaction.group_id is not None:
+            parties = group_parties.setdefault(transaction.group_id, {})
+            parties.setdefault(transaction.payer_id, line_number)
+            parties.setdefault(transaction.payee_id, line_number)
+
+        if transaction.is_active:
+            payer_ids.add(transaction.payer_id)
+        if not error_count:
+            chunk.append(_to_record(transaction))
+            if len(chunk) >= chunk_size:
+                await flush()
+
+    await flush()
+
+    for group_id, parties in group_parties.items():
+        members = await group_service.get_active_member_ids(db=db, group_id=group_id, user_ids=parties)
+        for party, line_number in sorted(parties.items(), key=lambda item: item[1]):
+            if party not in members:
+                error_count += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append({
+                        "line": line_number,
+                        "error": f"User {party} is not an active member of group {group_id}"
+                    })
+
+    if error_count:
+        await db.rollback()
+        logger.warning(f"Bulk import by user {user_id} rejected: {error_count} invalid rows")
+        return result
+
+    if not staged:
+        await db.rollback()
+        return result
+
+    imported: List[TransactionRow] = []
+    parties: Optional[List[int]] = None
+    try:
+        await budget_service.lock_budgets(db, payer_ids)
+        if analytics_sink.analytics_batcher.enabled:
+            merge_result = await db.execute(text(MERGE_RETURNING_SQL))
+            merged = merge_result.all()
+            imported = [TransactionRow._make(row[:-1]) for row in merged]
+            inserted, users_updated = len(merged), merged[0][-1] if merged else 0
+        else:
+            merge_result = await db.execute(text(MERGE_SQL))
+            inserted, users_updated, parties = merge_result.one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Bulk import by user {user_id} failed: {str(e)}")
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Could not import transactions. Please check that all payers, payees and groups exist."
+        )
+
+    def publish():
+        publish_committed(imported)
+        dashboard_cache.invalidate(*(parties or ()))
+
+    after_commit(db, publish)
+    result.inserted = inserted
+    result.users_updated = users_updated
+    logger.info(f"Bulk import by user {user_id}: {inserted} transactions, {users_updated} summaries updated")
+    return result
@@ -1,7 +1,7 @@
 import logging
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple
 from datetime import datetime
-from sqlalchemy import select, update, delete, and_, or_, func, not_
+from sqlalchemy import select, insert, update, delete, and_, or_, func, not_, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
@@ -10,11 +10,15 @@ from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_409_
 from app.core.config.security import get_password_hash, verify_password
 from app.models.user import User
 from app.models.user_session import UserSession
-from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
+from app.schemas.user import UserCreate, UserUpdate, User as UserSchema, UserProfileRow
+from app.services.user_cache import user_profile_cache
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Columns selected by profile projections, in UserProfileRow field order
+_USER_PROFILE_COLUMNS = tuple(getattr(User, name) for name in UserProfileRow._fields)
+
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """
     Get a user by email.
@@ -123,6 +127,93 @@ async def get_active_verified_user_by_username(db: AsyncSession, username: str)
     result = await db.execute(query)
     return result.scalar_one_or_none()
 
+def _active_session_exists(user_id_column):
+    """
+    Build a correlated EXISTS clause for an unexpired session of a user.
+    
+    Args:
+        user_id_column: Column (or value) holding the user ID to correlate on
+        
+    Returns:
+        SQLAlchemy EXISTS expression labelled ``has_active_session``
+    """
+    return (
+        exists()
+        .where(
+            and_(
+                UserSession.user_id == user_id_column,
+                UserSession.expires_at > func.now()
+            )
+        )
+        .label("has_active_session")
+    )
+
+async def _get_active_verified_user_with_session(db: AsyncSession, condition) -> Tuple[Optional[UserProfileRow], bool]:
+    """
+    Fetch an active, verified user profile and their active-session flag in one statement.
+    
+    Only the profile columns are selected, so no ORM instance is built and the
+    password hash never leaves the database.
+    
+    Args:
+        db: Database session
+        condition: Extra filter identifying the user
+        
+    Returns:
+        Tuple of (UserProfileRow or None, True if the user has an active session)
+    """
+    query = select(*_USER_PROFILE_COLUMNS, _active_session_exists(User.id)).where(
+        and_(
+            condition,
+            User.is_active == True,
+            User.is_user_verified == True
+        )
+    )
+    result = await db.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        return None, False
+    return UserProfileRow._make(row[:-1]), bool(row[-1])
+
+async def get_active_verified_user_with_session_by_id(db: AsyncSession, user_id: int) -> Tuple[Optional[UserProfileRow], bool]:
+    """
+    Get an active, verified user by ID along with whether they have an active session.
+    
+    Args:
+        db: Database session
+        user_id: User ID to lookup
+        
+    Returns:
+        Tuple of (UserProfileRow or None, active session flag)
+    """
+    return await _get_active_verified_user_with_session(db, User.id == user_id)
+
+async def get_active_verified_user_with_session_by_email(db: AsyncSession, email: str) -> Tuple[Optional[UserProfileRow], bool]:
+    """
+    Get an active, verified user by email along with whether they have an active session.
+    
+    Args:
+        db: Database session
+        email: Email to lookup
+        
+    Returns:
+        Tuple of (UserProfileRow or None, active session flag)
+    """
+    return await _get_active_verified_user_with_session(db, User.email == email)
+
+async def get_active_verified_user_with_session_by_username(db: AsyncSession, username: str) -> Tuple[Optional[UserProfileRow], bool]:
+    """
+    Get an active, verified user by username along with whether they have an active session.
+    
+    Args:
+        db: Database session
+        username: Username to lookup
+        
+    Returns:
+        Tuple of (UserProfileRow or None, active session flag)
+    """
+    return await _get_active_verified_user_with_session(db, User.username == username)
+
 async def get_user_by_mobile(db: AsyncSession, mobile_number: str) -> Optional[User]:
     """
     Get a user by mobile number.
@@ -149,18 +240,9 @@ async def has_active_session(db: AsyncSession, user_id: int) -> bool:
     Returns:
         True if the user has an active session, False otherwise
     """
-    query = (
-        select(func.count(UserSession.session_id))
-        .where(
-            and_(
-                UserSession.user_id == user_id,
-                UserSession.expires_at > func.now()
-            )
-        )
-    )
+    query = select(_active_session_exists(user_id))
     result = await db.execute(query)
-    count = result.scalar_one()
-    return count > 0
+    return bool(result.scalar_one())
 
 async def has_active_session_from_ip(db: AsyncSession, user_id: int, ip_address: str) -> bool:
     """
@@ -229,10 +311,10 @@ async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
             detail="Mobile number already registered"
         )
     
-    # Create user object
+    # Build the row to insert
     hashed_password = get_password_hash(user_data.password)
     
-    db_user = User(
+    user_values = dict(
         name=user_data.name,
         other_name=user_data.other_name,
         username=user_data.username,
@@ -251,10 +333,11 @@ async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     )
     
     try:
-        # Add and commit the new user
-        db.add(db_user)
+        # Insert and read back server-generated columns in a single round-trip
+        stmt = insert(User).values(**user_values).returning(User)
+        result = await db.execute(stmt)
+        db_user = result.scalar_one()
         await db.commit()
-        await db.refresh(db_user)
         logger.info(f"User created: {db_user.username} (ID: {db_user.id})")
         return db_user
     except IntegrityError as e:
@@ -303,47 +386,59 @@ async def update_user(
     Raises:
         HTTPException: If the user doesn't exist or if there's a conflict
     """
-    # Get existing user
-    db_user = await get_user_by_id(db, user_id)
-    if not db_user:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Check if mobile number is changing and already exists
-    if user_data.mobile_number and user_data.mobile_number != db_user.mobile_number:
-        existing_mobile = await get_user_by_mobile(db, user_data.mobile_number)
-        if existing_mobile:
-            raise HTTPException(
-                status_code=HTTP_409_CONFLICT,
-                detail="Mobile number already registered"
-            )
-    
     # Prepare update data dictionary
     update_data = user_data.model_dump(exclude_unset=True)
     
     if not update_data:
         # No fields to update
+        db_user = await get_user_by_id(db, user_id)
+        if not db_user:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         return db_user
     
+    # Check if the new mobile number is already registered to another user
+    if user_data.mobile_number:
+        query = select(User.id).where(
+            and_(
+                User.mobile_number == user_data.mobile_number,
+                User.id != user_id
+            )
+        )
+        result = await db.execute(query)
+        if result.first() is not None:
+            raise HTTPException(
+                status_code=HTTP_409_CONFLICT,
+                detail="Mobile number already registered"
+            )
+    
     try:
-        # Update the user
+        # Update the user and return the new row in the same statement
         stmt = (
             update(User)
             .where(User.id == user_id)
             .values(**update_data)
-            .execution_options(synchronize_session="fetch")
+            .returning(User)
+            .execution_options(populate_existing=True)
         )
         
-        await db.execute(stmt)
+        result = await db.execute(stmt)
+        db_user = result.scalar_one_or_none()
+        if not db_user:
+            await db.rollback()
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         await db.commit()
-        
-        # Refresh user object
-        await db.refresh(db_user)
+        await user_profile_cache.invalidate(user_id)
         
         logger.info(f"User updated: {db_user.username} (ID: {db_user.id})")
         return db_user
+    except HTTPException:
+        raise
     except IntegrityError as e:
         await db.rollback()
         logger.error(f"Failed to update user: {str(e)}")
@@ -375,11 +470,12 @@ async def update_user_login_timestamp(db: AsyncSession, user_id: int) -> bool:
             update(User)
             .where(User.id == user_id)
             .values(last_login=func.now())
-            .execution_options(synchronize_session="fetch")
+            .execution_options(synchronize_session=False)
         )
         
         await db.execute(stmt)
         await db.commit()
+        await user_profile_cache.invalidate(user_id)
         
         logger.info(f"Updated last login for user ID: {user_id}")
         return True
@@ -402,24 +498,25 @@ async def deactivate_user(db: AsyncSession, user_id: int) -> bool:
     Raises:
         HTTPException: If there's a database error
     """
-    # Check if user exists
-    db_user = await get_user_by_id(db, user_id)
-    if not db_user:
-        return False
-    
     try:
-        # Set is_active to False
+        # Set is_active to False, returning the username to detect a missing user
         stmt = (
             update(User)
             .where(User.id == user_id)
             .values(is_active=False)
-            .execution_options(synchronize_session="fetch")
+            .returning(User.username)
+            .execution_options(synchronize_session=False)
         )
         
-        await db.execute(stmt)
+        result = await db.execute(stmt)
+        username = result.scalar_one_or_none()
+        if username is None:
+            await db.rollback()
+            return False
         await db.commit()
+        await user_profile_cache.invalidate(user_id)
         
-        logger.info(f"User deactivated: {db_user.username} (ID: {db_user.id})")
+        logger.info(f"User deactivated: {username} (ID: {user_id})")
         return True
     except Exception as e:
         await db.rollback()
@@ -434,10 +531,14 @@ async def search_public_users(
     search_term: Optional[str] = None,
     limit: int = 5,
     exclude_user_id: Optional[int] = None
-) -> List[User]:
+) -> List[UserProfileRow]:
     """
     Search for verified, public users by name, username, or email.
     
+    Returns lightweight profile rows rather than ORM instances: only the
+    columns the response needs are selected and nothing enters the session's
+    identity map.
+    
     Args:
         db: Database session
         search_term: Term to search for (optional)
@@ -445,7 +546,7 @@ async def search_public_users(
         exclude_user_id: User ID to exclude from results (typically the current user)
         
     Returns:
-        List of matching verified users
+        List of matching verified user profile rows
     """
     # Base conditions: active, verified users who are not private
     conditions = [
@@ -459,7 +560,7 @@ async def search_public_users(
         conditions.append(User.id != exclude_user_id)
     
     query = (
-        select(User)
+        select(*_USER_PROFILE_COLUMNS)
         .where(and_(*conditions))
         .limit(limit)
     )
@@ -478,4 +579,4 @@ async def search_public_users(
     # Execute query with optimization for faster results
     # Using LIMIT directly in the query for better performance
     result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+    return [UserProfileRow._make(row) for row in result]
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+Read-through cache of serialized user profiles.
+
+Profiles are stored as pre-encoded JSON bytes keyed by user ID, with username
+and email aliases pointing at the ID. A bounded in-process LRU tier is always
+used; when REDIS_URL is configured a shared Redis tier sits behind it.
+
+Loads race with invalidations: a reader can load a row, a writer commit and
+invalidate, and the reader then store the stale profile. Readers take a
+``token()`` before querying the database and pass it to ``set``, which drops
+the profile if an invalidation happened in between: in-process through a
+generation counter (as in ``group_membership``), in Redis through version
+keys that ``invalidate`` bumps and ``set`` compares under WATCH.
+"""
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, NamedTuple, Union
+
+from app.core.config.settings import get_settings
+from app.models.user import User
+from app.schemas.user import UserProfileRow, user_serializer
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class CacheToken(NamedTuple):
+    """Invalidation state read before loading a profile from the database."""
+    generation: int
+    # Redis version key and its value; None when there is no Redis tier to write
+    version_key: Optional[str]
+    version: Optional[bytes]
+
+class CachedProfile(NamedTuple):
+    """A cached user profile: the user ID and its encoded JSON body."""
+    user_id: int
+    payload: bytes
+
+def encode_user_profile(user: Union[User, UserProfileRow]) -> bytes:
+    """
+    Serialize a user to the JSON body returned by the profile endpoints.
+
+    Args:
+        user: User ORM object or profile row
+
+    Returns:
+        UTF-8 encoded JSON bytes
+    """
+    return user_serializer.dump_one(user)
+
+class UserProfileCache:
+    """
+    Two-tier cache for serialized user profiles.
+
+    The local tier keeps at most ``local_max_entries`` profiles for
+    ``local_ttl`` seconds; since other workers cannot invalidate it, the TTL
+    bounds cross-process staleness. The Redis tier, if configured, is shared
+    and explicitly invalidated on every write.
+
+    A load by ID is checked against that user's version key; a load by
+    username or email, whose user ID is not known up front, against a version
+    key bumped by every invalidation.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        local_ttl: int = 30,
+        local_max_entries: int = 10000,
+        redis_url: Optional[str] = None,
+        redis_ttl: int = 300,
+        key_prefix: str = "equipay"
+    ):
+        self.enabled = enabled
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self.key_prefix = f"{key_prefix}:user"
+
+        # Structure: {user_id: (expires_at, payload, (alias1, alias2))}
+        self._profiles: "OrderedDict[int, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        # Structure: {"username:<name>" | "email:<email>": user_id}
+        self._aliases: Dict[str, int] = {}
+        self._generation = 0
+        self._redis = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "UserProfileCache":
+        """Create a cache configured from application settings."""
+        return cls(
+            enabled=settings.USER_CACHE_ENABLED,
+            local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+            local_max_entries=settings.USER_CACHE_LOCAL_MAX_ENTRIES,
+            redis_url=settings.REDIS_URL,
+            redis_ttl=settings.USER_CACHE_REDIS_TTL_SECONDS,
+            key_prefix=settings.CACHE_KEY_PREFIX
+        )
+
+    def _get_redis(self):
+        """Lazily create the Redis client, or return None if no Redis tier is configured."""
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(self.redis_url)
+            except ImportError:
+                logger.warning("redis package not installed; user profile cache is in-process only")
+                self.redis_url = None
+                return None
+        return self._redis
+
+    def _version_key(self, user_id: Optional[int]) -> str:
+        if user_id is None:
+            return f"{self.key_prefix}:version"
+        return f"{self.key_prefix}:version:{user_id}"
+
+    # Local tier
+
+    def _local_get(self, user_id: int) -> Optional[bytes]:
+        entry = self._profiles.get(user_id)
+        if entry is None:
+            return None
+        expires_at, payload, _ = entry
+        if expires_at <= time.monotonic():
+            self._local_drop(user_id)
+            return None
+        self._profiles.move_to_end(user_id)
+        return payload
+
+    def _local_set(self, user_id: int, payload: bytes, aliases: Tuple[str, ...]) -> None:
+        self._local_drop(user_id)
+        self._profiles[user_id] = (time.monotonic() + self.local_ttl, payload, aliases)
+        for alias in aliases:
+            self._aliases[alias] = user_id
+
+        while len(self._profiles) > self.local_max_entries:
+            oldest_id = next(iter(self._profiles))
+            self._local_drop(oldest_id)
+
+    def _local_drop(self, user_id: int) -> None:
+        entry = self._profiles.pop(user_id, None)
+        if entry is None:
+            return
+        for alias in entry[2]:
+            if self._aliases.get(alias) == user_id:
+                del self._aliases[alias]
+
+    # Public API
+
+    async def get_by_id(self, user_id: int) -> Optional[CachedProfile]:
+        """
+        Get a cached profile by user ID.
+
+        Args:
+            user_id: User ID to lookup
+
+        Returns:
+            CachedProfile if present in any tier, None otherwise
+        """
+        if not self.enabled:
+            return None
+
+        payload = self._local_get(user_id)
+        if payload is not None:
+            return CachedProfile(user_id, payload)
+
+        redis = self._get_redis()
+        if redis is None:
+            return None
+
+        try:
+            payload = await redis.get(f"{self.key_prefix}:id:{user_id}")
+        except Exception as e:
+            logger.warning(f"User cache Redis read failed: {str(e)}")
+            return None
+
+        if payload is None:
+            return None
+
+        self._local_set(user_id, payload, ())
+        return CachedProfile(user_id, payload)
+
+    async def _get_by_alias(self, alias: str) -> Optional[CachedProfile]:
+        if not self.enabled:
+            return None
+
+        user_id = self._aliases.get(alias)
+        if user_id is not None:
+            return await self.get_by_id(user_id)
+
+        redis = self._get_redis()
+        if redis is None:
+            return None
+
+        try:
+            raw_id = await redis.get(f"{self.key_prefix}:{alias}")
+        except Exception as e:
+            logger.warning(f"User cache Redis read failed: {str(e)}")
+            return None
+
+        if raw_id is None:
+            return None
+        return await self.get_by_id(int(raw_id))
+
+    async def get_by_username(self, username: str) -> Optional[CachedProfile]:
+        """Get a cached profile by username."""
+        return await self._get_by_alias(f"username:{username}")
+
+    async def get_by_email(self, email: str) -> Optional[CachedProfile]:
+        """Get a cached profile by email."""
+        return await self._get_by_alias(f"email:{email}")
+
+    async def token(self, user_id: Optional[int] = None) -> CacheToken:
+        """
+        Get the invalidation state to pass to ``set``; take it before loading the user.
+
+        Args:
+            user_id: ID of the user about to be loaded, None for a load by username or email
+        """
+        token = CacheToken(self._generation, None, None)
+        redis = self._get_redis() if self.enabled else None
+        if redis is None:
+            return token
+
+        version_key = self._version_key(user_id)
+        try:
+            return token._replace(version_key=version_key, version=await redis.get(version_key))
+        except Exception as e:
+            logger.warning(f"User cache Redis read failed: {str(e)}")
+            return token
+
+    async def set(self, user: Union[User, UserProfileRow], token: CacheToken) -> bytes:
+        """
+        Serialize a user and store it in every tier, unless it was invalidated since ``token``.
+
+        Args:
+            user: User ORM object or profile row loaded from the database
+            token: ``token()`` taken before the user was loaded
+
+        Returns:
+            The encoded JSON payload, so callers can respond with it directly
+        """
+        payload = encode_user_profile(user)
+        if not self.enabled or token.generation != self._generation:
+            return payload
+
+        aliases = (f"username:{user.username}", f"email:{user.email}")
+        redis = self._get_redis()
+        if redis is not None and token.version_key is not None:
+            from redis.exceptions import WatchError
+
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    await pipe.watch(token.version_key)
+                    if await pipe.get(token.version_key) != token.version:
+                        return payload
+                    pipe.multi()
+                    pipe.set(f"{self.key_prefix}:id:{user.id}", payload, ex=self.redis_ttl)
+                    for alias in aliases:
+                        pipe.set(f"{self.key_prefix}:{alias}", user.id, ex=self.redis_ttl)
+                    await pipe.execute()
+            except WatchError:
+                # Invalidated between the version check and the write
+                return payload
+            except Exception as e:
+                logger.warning(f"User cache Redis write failed: {str(e)}")
+
+        # The invalidation may have happened while Redis was checked
+        if token.generation == self._generation:
+            self._local_set(user.id, payload, aliases)
+        return payload
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Drop a user's profile from every tier.
+
+        Alias keys are left in place: they only map to the user ID, and a
+        lookup through a stale alias misses on the profile key. Bumps the
+        versions that loads in flight were started under, so they are not
+        stored.
+
+        Args:
+            user_id: ID of the user whose profile changed
+        """
+        self._generation += 1
+        self._local_drop(user_id)
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        version_key = self._version_key(user_id)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.incr(version_key)
+                pipe.expire(version_key, self.redis_ttl)
+                pipe.incr(self._version_key(None))
+                pipe.delete(f"{self.key_prefix}:id:{user_id}")
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"User cache Redis invalidation failed for user {user_id}: {str(e)}")
+
+    def clear_local(self) -> None:
+        """Drop every profile from the in-process tier."""
+        self._generation += 1
+        self._profiles.clear()
+        self._aliases.clear()
+
+user_profile_cache = UserProfileCache.from_settings(settings)
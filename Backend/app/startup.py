@@ -4,6 +4,9 @@ import sys
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.utils.function_execution import safe_execute
+from app.services.analytics_sink import analytics_batcher
+from app.services.recurring_expense import recurring_scheduler
+from app.db.partitions import partition_maintainer
 from app.db.initializer import (
     check_database_connection,
     check_async_database_connection,
@@ -48,9 +51,24 @@ async def startup_event(engine, async_engine, settings):
     else:
         logger.info("✅ Async database connection verified successfully")
     
+    # Open the analytics sink, if configured; the app still serves without it
+    try:
+        await analytics_batcher.start()
+    except Exception as e:
+        logger.error(f"❌ Analytics sink unavailable, long-range analytics stay on Postgres: {e}")
+    
+    # Materialize due recurring expenses in the background
+    recurring_scheduler.start()
+    
+    # Keep monthly partitions created ahead while the process runs
+    partition_maintainer.start()
+    
     logger.info("✅ All startup checks passed. Application is ready.")
 
 async def shutdown_event():
     """Run tasks when the application shuts down"""
     logger.info("Running shutdown tasks...")
-    # Add any shutdown cleanup here if needed
\ No newline at end of file
+    # Stop background jobs, then write out pending analytics rows
+    await recurring_scheduler.stop()
+    await partition_maintainer.stop()
+    await analytics_batcher.stop()
\ No newline at end of file
@@ -0,0 +1,90 @@
+# benchmarks/bench_connection_graph.py
+"""
+Connection graph on a synthetic graph of 1M random directed edges over 100k users.
+
+Times the CSR build and the per-request operations (neighbours, mutual
+count, top-10 suggestions, applying an edge change), and checks the
+answers for a sample of users against plain Python sets.
+
+    python -m benchmarks.bench_connection_graph [edges] [users]
+"""
+import sys
+import random
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from app.services.connection_graph import ConnectionGraph
+from benchmarks.common import best_of, format_duration, print_table
+
+EDGES = 1_000_000
+USERS = 100_000
+SAMPLE = 200
+
+def make_edges(edges: int, users: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, users + 1, edges, dtype=np.int64), rng.integers(1, users + 1, edges, dtype=np.int64)
+
+def reference_adjacency(sources: np.ndarray, targets: np.ndarray):
+    adjacency = defaultdict(set)
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        if source != target:
+            adjacency[source].add(target)
+            adjacency[target].add(source)
+    return adjacency
+
+def check(graph: ConnectionGraph, adjacency, user_ids) -> None:
+    for user_id in user_ids:
+        friends = adjacency.get(user_id, set())
+        assert graph.neighbours(user_id).tolist() == sorted(friends)
+
+        counts = Counter(other for friend in friends for other in adjacency[friend] if other != user_id and other not in friends)
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+        candidates, mutual = graph.friends_of_friends(user_id, 10)
+        assert list(zip(candidates.tolist(), mutual.tolist())) == expected
+
+def main() -> None:
+    edges = int(sys.argv[1]) if len(sys.argv) > 1 else EDGES
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else USERS
+    sources, targets = make_edges(edges, users)
+
+    graph = ConnectionGraph()
+    start = time.perf_counter()
+    graph.build(sources, targets)
+    build = time.perf_counter() - start
+    memory = sum(array.nbytes for array in (graph.user_ids, graph.indptr, graph.indices, graph.directions))
+
+    rng = random.Random(0)
+    sample = [rng.randint(1, users) for _ in range(SAMPLE)]
+    pairs = [(rng.randint(1, users), rng.randint(1, users)) for _ in range(SAMPLE)]
+    check(graph, reference_adjacency(sources, targets), sample[:50])
+
+    def each(fn, items):
+        return lambda: [fn(*item) for item in items]
+
+    per_call = lambda seconds: format_duration(seconds / SAMPLE)
+    neighbours = best_of(each(graph.neighbours, [(u,) for u in sample]))
+    mutual = best_of(each(graph.mutual_count, pairs))
+    suggestions = best_of(each(lambda u: graph.friends_of_friends(u, 10), [(u,) for u in sample]))
+
+    # Connect then disconnect the same pairs, so every round starts from the same graph
+    def changes():
+        for u, v in pairs:
+            graph.apply_change(u, v, True)
+        for u, v in pairs:
+            graph.apply_change(u, v, False)
+    change = best_of(changes) / 2
+
+    print(f"{edges:,} directed edges over {users:,} users: {graph.edge_count:,} connections\n")
+    print_table(("operation", "time"), [
+        ("build", format_duration(build)),
+        ("CSR arrays", f"{memory / 2**20:.0f} MB"),
+        ("neighbours", per_call(neighbours)),
+        ("mutual count", per_call(mutual)),
+        ("top-10 suggestions", per_call(suggestions)),
+        ("edge change", per_call(change))
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/bench_reminders.py
+"""
+Reminder digest building and delivery throughput on synthetic data.
+
+Generates rows shaped like ``DUE_REMINDERS_SQL`` output for 16,000
+recipients (1 to 5 creditors each, a few with nothing owed net or no longer
+active), times ``build_digests`` on them, then delivers the digests with
+``dispatch`` through:
+
+- ``FileNotifier`` writing to a temporary file,
+- a notifier that takes 20 ms per send, at concurrency 20 and 100,
+- a notifier failing 30% of sends, with 4 attempts per digest.
+
+Checks that deliveries in flight never exceed the concurrency limit and
+that every digest delivered by a reliable notifier is delivered once.
+
+    python -m benchmarks.bench_reminders
+"""
+import os
+import random
+import asyncio
+import logging
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+
+from app.services.reminder import FileNotifier, Notifier, ReminderDigest, build_digests, dispatch
+from benchmarks.common import best_of, format_duration, print_table
+
+RECIPIENTS = 16_000
+LATENCY_SAMPLE = 2_000
+LATENCY_SECONDS = 0.02
+FAILURE_RATE = 0.3
+MAX_ATTEMPTS = 4
+
+class Row(NamedTuple):
+    """One row of ``DUE_REMINDERS_SQL``"""
+    recipient_id: int
+    username: str
+    email: str
+    is_active: bool
+    creditor_id: Optional[int]
+    creditor_username: Optional[str]
+    amount: Optional[Decimal]
+    transaction_count: Optional[int]
+    oldest_at: Optional[datetime]
+
+def make_rows(recipients: int, now: datetime, seed: int = 0) -> List[Row]:
+    rng = random.Random(seed)
+    rows = []
+    for recipient_id in range(1, recipients + 1):
+        username, email = f"user{recipient_id}", f"user{recipient_id}@example.com"
+        is_active = rng.random() >= 0.005
+        if rng.random() < 0.015:
+            # Owes nothing net: a single row with NULL creditor columns
+            rows.append(Row(recipient_id, username, email, is_active, None, None, None, None, None))
+            continue
+        creditors = rng.sample(range(recipients + 1, recipients + 5000), rng.randint(1, 5))
+        items = [
+            (Decimal(rng.randint(100, 50000)) / 100, creditor_id)
+            for creditor_id in creditors
+        ]
+        for amount, creditor_id in sorted(items, key=lambda item: (-item[0], item[1])):
+            rows.append(Row(
+                recipient_id, username, email, is_active, creditor_id, f"user{creditor_id}", amount,
+                rng.randint(1, 5), now - timedelta(days=rng.randint(3, 90))
+            ))
+    return rows
+
+class SlowNotifier(Notifier):
+    """Takes a fixed time per send, failing a share of them; tracks deliveries in flight."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.sent = Counter()
+
+    async def send(self, digest: ReminderDigest, now: datetime) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.rng.random() < self.failure_rate:
+                raise ConnectionError("transient failure")
+            self.sent[digest.recipient_id] += 1
+        finally:
+            self.in_flight -= 1
+
+async def timed_dispatch(notifier: Notifier, digests: List[ReminderDigest], now: datetime, concurrency: int, **kwargs):
+    start = time.perf_counter()
+    delivered = await dispatch(notifier, digests, now, concurrency, **kwargs)
+    return delivered, time.perf_counter() - start
+
+def throughput_row(case: str, digests: List[ReminderDigest], delivered: List[ReminderDigest], elapsed: float, peak: object):
+    reminders = sum(digest.reminder_count for digest in delivered)
+    return (
+        case,
+        f"{len(delivered):,}/{len(digests):,}",
+        format_duration(elapsed),
+        f"{len(delivered) / elapsed:,.0f}",
+        f"{reminders / elapsed:,.0f}",
+        peak
+    )
+
+async def main() -> None:
+    now = datetime.now(timezone.utc)
+    rows = make_rows(RECIPIENTS, now)
+    digests, last_recipient_id, recipients = build_digests(rows)
+    assert (last_recipient_id, recipients) == (RECIPIENTS, RECIPIENTS)
+    assert all(digest.items and digest.total == sum(item.amount for item in digest.items) for digest in digests)
+    build = best_of(lambda: build_digests(rows))
+
+    table = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "reminders.ndjson")
+        notifier = FileNotifier(path)
+        try:
+            delivered, elapsed = await timed_dispatch(notifier, digests, now, 20)
+        finally:
+            await notifier.close()
+        with open(path, encoding="utf-8") as file:
+            assert sum(1 for _ in file) == len(digests)
+        table.append(throughput_row("FileNotifier, concurrency 20", digests, delivered, elapsed, "-"))
+
+    sample = digests[:LATENCY_SAMPLE]
+    for concurrency in (20, 100):
+        notifier = SlowNotifier(latency=LATENCY_SECONDS)
+        delivered, elapsed = await timed_dispatch(notifier, sample, now, concurrency)
+        assert len(delivered) == len(sample) and set(notifier.sent.values()) == {1}
+        assert notifier.peak_in_flight == concurrency
+        table.append(throughput_row(
+            f"{LATENCY_SECONDS * 1000:.0f} ms notifier, concurrency {concurrency}",
+            sample, delivered, elapsed, notifier.peak_in_flight
+        ))
+
+    # Digests failing every attempt are expected here; keep their errors out of the output
+    logging.getLogger("app.services.reminder").setLevel(logging.CRITICAL)
+    notifier = SlowNotifier(latency=LATENCY_SECONDS, failure_rate=FAILURE_RATE)
+    delivered, elapsed = await timed_dispatch(
+        notifier, sample, now, 100, max_attempts=MAX_ATTEMPTS, backoff_seconds=0.01
+    )
+    assert notifier.peak_in_flight <= 100
+    table.append(throughput_row(
+        f"{FAILURE_RATE:.0%} failures, {MAX_ATTEMPTS} attempts, concurrency 100",
+        sample, delivered, elapsed, notifier.peak_in_flight
+    ))
+
+    reminders = sum(digest.reminder_count for digest in digests)
+    print(f"{len(rows):,} rows, {recipients:,} recipients: {len(digests):,} digests of {reminders:,} transactions")
+    print(f"build_digests: {format_duration(build)}\n")
+    print_table(("delivery", "delivered", "time", "digests/s", "reminders/s", "peak in flight"), table)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+# benchmarks/bench_serialization.py
+"""
+Old vs new response serialization for user lists (``/users/search``).
+
+Old: ORM ``User`` objects validated against ``response_model=List[User]``
+(``from_attributes``) by FastAPI, then encoded by the stdlib ``JSONResponse``.
+New: ``UserProfileRow`` projections encoded by ``user_serializer.dump_many``
+(``model_construct``, no validation) and sent by ``FastJSONResponse``.
+
+Both paths must produce the same JSON document; the script checks that
+before timing.
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.utils.serialization import FastJSONResponse
+from app.models.user import User
+from app.schemas.user import User as UserSchema, UserProfileRow, user_serializer
+from benchmarks.common import best_of, best_of_async, format_duration, print_table
+
+SIZES = (5, 20, 100, 1000)
+
+def make_profiles(count: int) -> List[UserProfileRow]:
+    """Synthetic user rows, as the search projection returns them."""
+    rng = random.Random(count)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        UserProfileRow(
+            name=f"User {i}",
+            other_name=None if i % 3 else f"Alias {i}",
+            username=f"user_{i}",
+            email=f"user_{i}@example.com",
+            is_social_account=False,
+            mobile_number=f"+91{rng.randrange(10**9, 10**10)}",
+            is_password_random=False,
+            is_user_dummy=False,
+            is_user_verified=True,
+            is_mobile_verified=bool(i % 2),
+            is_private_user=False,
+            auth_provider=None,
+            is_active=True,
+            max_session=1,
+            id=i + 1,
+            last_login=now - timedelta(minutes=i),
+            created_at=now - timedelta(days=i),
+            last_updated_at=now
+        )
+        for i in range(count)
+    ]
+
+def to_orm(profile: UserProfileRow) -> User:
+    """The ORM object the old path serialized, with a password it must not leak."""
+    return User(password="$2b$12$not-a-real-hash", **profile._asdict())
+
+async def main() -> None:
+    response_field = create_model_field(name="Response", type_=List[UserSchema], mode="serialization")
+
+    async def old_path(users: List[User]) -> bytes:
+        content = await serialize_response(field=response_field, response_content=users, is_coroutine=True)
+        return JSONResponse(content).body
+
+    def new_path(rows: List[UserProfileRow]) -> bytes:
+        return FastJSONResponse(user_serializer.dump_many(rows)).body
+
+    table = []
+    for size in SIZES:
+        rows = make_profiles(size)
+        users = [to_orm(row) for row in rows]
+
+        old_body, new_body = await old_path(users), new_path(rows)
+        assert json.loads(old_body) == json.loads(new_body), "old and new paths disagree"
+        assert b"not-a-real-hash" not in new_body
+
+        number = max(1, 2000 // size)
+        old = await best_of_async(lambda: old_path(users), number=number)
+        new = best_of(lambda: new_path(rows), number=number)
+        table.append((size, format_duration(old), format_duration(new), f"{old / new:.1f}x", f"{len(new_body):,}"))
+
+    print_table(("users", "old (validate + json)", "new (trusted dump)", "speedup", "bytes"), table)
+
+if __name__ == "__main__":
+    asyncio.run(main())
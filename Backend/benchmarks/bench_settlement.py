@@ -0,0 +1,66 @@
+# benchmarks/bench_settlement.py
+"""
+Settlement planning time for groups of 10 to 10,000 members.
+
+Each group gets random zero-sum balances in cents (about half the members
+owe, half are owed). The script times ``simplify_debts`` (which picks the
+solver by group size) and, for comparison, each heuristic on its own, and
+checks every plan settles all balances in at most ``n - 1`` transfers.
+
+    python -m benchmarks.bench_settlement
+"""
+import random
+from collections import defaultdict
+from typing import Dict, List
+
+from app.services import settlement
+from app.services.settlement import Transfer, simplify_debts
+from benchmarks.common import best_of, format_duration, print_table
+
+SIZES = (10, 100, 1000, 10000)
+
+def make_balances(members: int, seed: int = 0) -> Dict[int, int]:
+    """Random zero-sum balances in cents."""
+    rng = random.Random(seed)
+    balances = {user_id: rng.randint(-50000, 50000) for user_id in range(1, members)}
+    balances[members] = -sum(balances.values())
+    return balances
+
+def check_plan(balances: Dict[int, int], transfers: List[Transfer]) -> None:
+    remaining = defaultdict(int, balances)
+    for transfer in transfers:
+        assert transfer.amount_cents > 0
+        remaining[transfer.from_user_id] += transfer.amount_cents
+        remaining[transfer.to_user_id] -= transfer.amount_cents
+    assert not any(remaining.values()), "plan does not settle every balance"
+    assert len(transfers) <= max(len([b for b in balances.values() if b]) - 1, 0)
+
+def main() -> None:
+    table = []
+    for size in SIZES:
+        balances = make_balances(size, seed=size)
+        members = [user_id for user_id, amount in sorted(balances.items()) if amount]
+        cents = [balances[user_id] for user_id in members]
+
+        transfers, is_optimal = simplify_debts(balances)
+        check_plan(balances, transfers)
+        check_plan(balances, settlement._settle_greedy(members, cents))
+        check_plan(balances, settlement._settle_vectorized(members, cents))
+
+        number = max(1, 1000 // size)
+        planned = best_of(lambda: simplify_debts(balances), number=number)
+        greedy = best_of(lambda: settlement._settle_greedy(members, cents), number=number)
+        vectorized = best_of(lambda: settlement._settle_vectorized(members, cents), number=number)
+        table.append((
+            f"{size:,}",
+            "exact" if is_optimal else ("greedy" if len(members) <= settlement.VECTORIZE_THRESHOLD else "vectorized"),
+            len(transfers),
+            format_duration(planned),
+            format_duration(greedy),
+            format_duration(vectorized)
+        ))
+
+    print_table(("members", "solver", "transfers", "simplify_debts", "greedy", "vectorized"), table)
+
+if __name__ == "__main__":
+    main()
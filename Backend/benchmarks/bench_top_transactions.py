@@ -0,0 +1,167 @@
+# benchmarks/bench_top_transactions.py
+"""
+Top-k transactions (``/transactions/top``) against Postgres as a user's history grows.
+
+A synthetic user gets 100 transactions a day (alternately paying and being
+paid) among ten times as many between other users, and history is extended
+backwards in steps while the queried window stays the last 30 days. Each step times ``get_top_transactions`` and checks
+the candidate query's plan: every branch must read the window's
+partitions by index-only scans, with a top-N sort per side. Monthly
+partitions are created for the whole history first, as a deployment that
+has been running that long would have. Rows, users and partitions created
+by the script are dropped at the end.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_top_transactions
+"""
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import delete, text, union_all
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db import partitions
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services import transaction as transaction_service
+from app.services import user as user_service
+from benchmarks.common import best_of_async, format_duration, print_table, require_database_url
+
+PER_DAY = 100
+# Transactions between other users per transaction of the benchmarked user
+BACKGROUND_RATIO = 10
+WINDOW_DAYS = 30
+HISTORY_DAYS = (30, 120, 480, 1920)
+K = 5
+DESCRIPTION = "bench_top_transactions"
+
+# Rows g of the user's history, each followed by BACKGROUND_RATIO rows between the others
+INSERT_HISTORY_SQL = f"""
+    INSERT INTO transactions (payer_id, payee_id, transaction_amount, description,
+                              is_settled, is_group_transaction, is_active, created_at)
+    SELECT CASE WHEN b = 0 AND g % 2 = 0 THEN CAST(:user_id AS bigint) ELSE others[1 + (g + b) % 3] END,
+           CASE WHEN b = 0 AND g % 2 = 1 THEN CAST(:user_id AS bigint)
+                WHEN b = 0 THEN others[1 + g % 3] ELSE others[1 + (g + b + 1) % 3] END,
+           round((random() * 500 + 1)::numeric, 2), :description,
+           FALSE, FALSE, g % 20 <> 0,
+           CAST(:newest AS timestamptz) - (g + b / {BACKGROUND_RATIO + 1}.0)::float8 * (interval '1 day' / CAST(:per_day AS integer))
+    FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS g,
+         generate_series(0, {BACKGROUND_RATIO}) AS b,
+         (SELECT CAST(:others AS bigint[]) AS others) AS counterparties
+"""
+
+def plan_nodes(plan: dict) -> List[dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes += plan_nodes(child)
+    return nodes
+
+async def explain_candidates(db: AsyncSession, user_id: int, from_time: datetime, to_time: datetime) -> dict:
+    """EXPLAIN ANALYZE of the per-side candidate query, summarized."""
+    query = union_all(
+        transaction_service._top_branch(Transaction.payer_id, user_id, K, from_time, to_time),
+        transaction_service._top_branch(Transaction.payee_id, user_id, K, from_time, to_time)
+    )
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    result = await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+    nodes = plan_nodes(plan)
+    scans = [node for node in nodes if "Scan" in node["Node Type"] and node["Node Type"] != "Subquery Scan"]
+    sorts = [node for node in nodes if node["Node Type"] == "Sort"]
+    assert scans and all(node["Node Type"] == "Index Only Scan" for node in scans), \
+        f"expected only index-only scans, got {[(node['Node Type'], node['Relation Name'], node['Actual Rows']) for node in scans]}"
+    assert len(sorts) == 2 and all(node.get("Sort Method") == "top-N heapsort" for node in sorts), \
+        f"expected a top-N sort per side, got {[node.get('Sort Method') for node in sorts]}"
+    return {
+        "scans": len(scans),
+        "partitions": len({node["Relation Name"] for node in scans}),
+        "rows_read": sum(node["Actual Rows"] * node.get("Actual Loops", 1) for node in scans),
+        "heap_fetches": sum(node.get("Heap Fetches", 0) for node in scans),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    }
+
+async def main() -> None:
+    engine = create_async_engine(require_database_url())
+    maintenance = engine.execution_options(isolation_level="AUTOCOMMIT")
+    user_ids: List[int] = []
+    created_partitions: List[str] = []
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            for index in range(4):
+                db_user = await user_service.create_user(db, UserCreate(
+                    name="Bench Top",
+                    username=f"bench_top_{index}_{int(datetime.now().timestamp())}",
+                    email=f"bench_top_{index}_{int(datetime.now().timestamp())}@example.com",
+                    mobile_number=f"+1555{int(datetime.now().timestamp()) % 10**6:06d}{index}",
+                    password="Password123"
+                ))
+                user_ids.append(db_user.id)
+        user_id, others = user_ids[0], user_ids[1:]
+
+        now = datetime.now(timezone.utc)
+        to_time, from_time = now, now - timedelta(days=WINDOW_DAYS)
+        oldest = (now - timedelta(days=HISTORY_DAYS[-1] + 1)).date()
+        months = (now.year - oldest.year) * 12 + now.month - oldest.month
+        async with engine.begin() as conn:
+            created_partitions = await conn.run_sync(
+                lambda sync_conn: partitions.ensure_monthly_partitions(sync_conn, Transaction.__tablename__, months, today=oldest)
+            )
+        table, inserted = [], 0
+        for days in HISTORY_DAYS:
+            async with AsyncSession(engine) as db:
+                await db.execute(text(INSERT_HISTORY_SQL), {
+                    "user_id": user_id,
+                    "others": others,
+                    "description": DESCRIPTION,
+                    "newest": now - timedelta(seconds=1),
+                    "per_day": PER_DAY,
+                    "first": inserted,
+                    "last": days * PER_DAY - 1
+                })
+                await db.commit()
+            inserted = days * PER_DAY
+            async with maintenance.connect() as conn:
+                await conn.execute(text("VACUUM ANALYZE transactions"))
+
+            async with AsyncSession(engine) as db:
+                top = await transaction_service.get_top_transactions(db, user_id, K, from_time, to_time)
+                assert len(top) == K and all(from_time <= row.created_at < to_time and row.is_active for row in top)
+                assert [row.transaction_amount for row in top] == sorted((row.transaction_amount for row in top), reverse=True)
+
+                plan = await explain_candidates(db, user_id, from_time, to_time)
+                elapsed = await best_of_async(
+                    lambda: transaction_service.get_top_transactions(db, user_id, K, from_time, to_time),
+                    repeat=5, number=20
+                )
+            table.append((
+                f"{inserted:,}",
+                f"{WINDOW_DAYS * PER_DAY:,}",
+                format_duration(elapsed),
+                f"{plan['scans']} over {plan['partitions']}",
+                f"{plan['rows_read']:,}",
+                plan["heap_fetches"],
+                plan["buffers"]
+            ))
+
+        print(f"top {K} of a {WINDOW_DAYS}-day window, {PER_DAY} transactions/day\n")
+        print_table(
+            ("history rows", "window rows", "get_top_transactions", "index-only scans", "index rows read", "heap fetches", "buffers"),
+            table
+        )
+    finally:
+        if user_ids:
+            async with AsyncSession(engine) as db:
+                await db.execute(delete(Transaction).where(Transaction.description == DESCRIPTION))
+                await db.execute(delete(User).where(User.id.in_(user_ids)))
+                for name in created_partitions:
+                    await db.execute(text(f"DROP TABLE {name}"))
+                await db.commit()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
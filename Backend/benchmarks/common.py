@@ -0,0 +1,59 @@
+# benchmarks/common.py
+"""
+Helpers shared by the benchmark scripts.
+
+Run a benchmark from the Backend directory, e.g.::
+
+    python -m benchmarks.bench_serialization
+
+Benchmarks that need Postgres read ``BENCH_DATABASE_URL`` (an asyncpg URL of a
+scratch database; they create and drop their own tables' rows in it).
+"""
+import os
+import time
+from typing import Callable, List, Sequence
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL")
+
+def best_of(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Best wall time of ``repeat`` rounds of ``number`` calls, in seconds per call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+async def best_of_async(fn, repeat: int = 5, number: int = 1) -> float:
+    """``best_of`` for a coroutine function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+def format_duration(seconds: float) -> str:
+    """Human-readable duration with a fitting unit."""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+def print_table(headers: Sequence[str], rows: List[Sequence[object]]) -> None:
+    """Print rows as a plain aligned table."""
+    cells = [[str(header) for header in headers]] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
+def require_database_url() -> str:
+    """The benchmark database URL; exits with a message when it is not set."""
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("Set BENCH_DATABASE_URL to an asyncpg URL of a scratch database to run this benchmark")
+    return BENCH_DATABASE_URL
@@ -0,0 +1,72 @@
+# tests/test_budget.py
+"""
+A budget created while a transaction is in flight counts the transaction
+once it commits.
+"""
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.budget import Budget
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.budget import BudgetCreate
+from app.schemas.user import UserCreate
+from app.services import budget as budget_service
+from app.services import user as user_service
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+async def _create_budget(engine, user_id: int):
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        return await budget_service.create_budget(db, user_id, BudgetCreate(amount_limit=Decimal("100.00")))
+
+@requires_database
+def test_recount_waits_for_writer_that_missed_the_new_budget():
+    async def test():
+        engine = create_test_engine()
+        user_ids = []
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for _ in range(2):
+                    suffix = unique_suffix()
+                    db_user = await user_service.create_user(db, UserCreate(
+                        name="Budget",
+                        username=f"budget_{suffix}",
+                        email=f"budget_{suffix}@example.com",
+                        mobile_number=random_mobile_number(),
+                        password="Password123"
+                    ))
+                    user_ids.append(db_user.id)
+            payer, payee = user_ids
+
+            async with AsyncSession(engine) as writer:
+                # The writer applies its budget delta while the payer has no budget
+                result = await writer.execute(
+                    insert(Transaction)
+                    .values(payer_id=payer, payee_id=payee, transaction_amount=Decimal("40.00"), description="Budget")
+                    .returning(Transaction.created_at)
+                )
+                created_at = result.scalar_one()
+                await budget_service.apply_budget_delta(writer, payer, None, Decimal("40.00"), created_at, 1)
+
+                # The recount cannot count the transaction until the writer commits
+                creating = asyncio.create_task(_create_budget(engine, payer))
+                await asyncio.sleep(0.5)
+                assert not creating.done()
+                await writer.commit()
+
+            status = await creating
+            assert status.spent == Decimal("40.00")
+            assert status.transaction_count == 1
+        finally:
+            async with AsyncSession(engine) as db:
+                if user_ids:
+                    await db.execute(delete(Budget).where(Budget.user_id.in_(user_ids)))
+                    await db.execute(delete(Transaction).where(Transaction.payer_id.in_(user_ids)))
+                    await db.execute(delete(User).where(User.id.in_(user_ids)))
+                    await db.commit()
+            await engine.dispose()
+
+    asyncio.run(test())
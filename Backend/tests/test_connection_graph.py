@@ -0,0 +1,168 @@
+# tests/test_connection_graph.py
+"""
+Connection graph queries agree with a plain set model through overlay
+changes and compactions, and refreshes pick up writes that commit after a
+later write was already read.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Set, Tuple
+
+import numpy as np
+
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import Base
+from app.models.user import User
+from app.models.user_connection import UserConnection
+from app.schemas.user import UserCreate
+from app.services import user as user_service
+from app.services.connection_graph import EMPTY, ConnectionGraph
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+def _adjacency(rows: Set[Tuple[int, int]], user_ids) -> Dict[int, Set[int]]:
+    """Undirected neighbours from active directed rows."""
+    adjacency = {user_id: set() for user_id in user_ids}
+    for user_id, connected_user_id in rows:
+        if user_id != connected_user_id:
+            adjacency[user_id].add(connected_user_id)
+            adjacency[connected_user_id].add(user_id)
+    return adjacency
+
+def _friends_of_friends(adjacency: Dict[int, Set[int]], user_id: int, limit: int):
+    friends = adjacency[user_id]
+    counts = {}
+    for friend in friends:
+        for candidate in adjacency[friend] - friends - {user_id}:
+            counts[candidate] = counts.get(candidate, 0) + 1
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [candidate for candidate, _ in ranked], [count for _, count in ranked]
+
+def _assert_matches(graph: ConnectionGraph, rows: Set[Tuple[int, int]], user_ids) -> None:
+    adjacency = _adjacency(rows, user_ids)
+    for user_id in user_ids:
+        assert graph.neighbours(user_id).tolist() == sorted(adjacency[user_id])
+        candidates, counts = graph.friends_of_friends(user_id, limit=5)
+        assert (candidates.tolist(), counts.tolist()) == _friends_of_friends(adjacency, user_id, 5)
+    for user_id, other_user_id in zip(user_ids, user_ids[1:]):
+        assert graph.is_connected(user_id, other_user_id) == (other_user_id in adjacency[user_id])
+        assert graph.mutual(user_id, other_user_id).tolist() == \
+            sorted(adjacency[user_id] & adjacency[other_user_id])
+
+def test_overlay_and_compaction_match_a_set_model():
+    rng = random.Random(0)
+    # Sparse IDs, so node indexes and user IDs differ
+    user_ids = [user_id * 7 + 3 for user_id in range(30)]
+    rows = {(rng.choice(user_ids), rng.choice(user_ids)) for _ in range(60)}
+
+    graph = ConnectionGraph(compact_threshold=40)
+    sources, targets = zip(*rows)
+    graph.build(np.array(sources), np.array(targets))
+    rows = {(user_id, connected_user_id) for user_id, connected_user_id in rows if user_id != connected_user_id}
+    _assert_matches(graph, rows, user_ids)
+
+    for step in range(400):
+        # New users appear only in the overlay until the next compaction
+        user_id = rng.choice(user_ids + [1000 + step % 5])
+        connected_user_id = rng.choice(user_ids + [1000 + step % 7])
+        is_active = rng.random() < 0.6
+        graph.apply_change(user_id, connected_user_id, is_active)
+        if user_id != connected_user_id:
+            if is_active:
+                rows.add((user_id, connected_user_id))
+            else:
+                rows.discard((user_id, connected_user_id))
+        if step % 50 == 49:
+            graph.compact()
+        if step % 10 == 9:
+            _assert_matches(graph, rows, sorted(set(user_ids) | {1000 + i for i in range(7)}))
+
+async def _connect(db: AsyncSession, user_id: int, connected_user_id: int) -> None:
+    await db.execute(
+        pg_insert(UserConnection)
+        .values(user_id=user_id, connected_user_id=connected_user_id, is_active=True)
+        .on_conflict_do_nothing()
+    )
+
+def test_window_held_back_too_long_triggers_a_reload():
+    async def test():
+        graph = ConnectionGraph(refresh_seconds=0, max_refresh_lag_seconds=300)
+        graph.build(EMPTY, EMPTY)
+        calls = []
+
+        async def load(db):
+            calls.append("load")
+
+        async def refresh(db):
+            calls.append("refresh")
+
+        graph.load, graph.refresh = load, refresh
+        graph._loaded_at = time.monotonic()
+
+        graph._watermark = datetime.now(timezone.utc) - timedelta(seconds=60)
+        await graph.ensure_fresh(None)
+        graph._watermark = datetime.now(timezone.utc) - timedelta(seconds=600)
+        await graph.ensure_fresh(None)
+        assert calls == ["refresh", "load"]
+
+    asyncio.run(test())
+
+@requires_database
+def test_refresh_sees_write_committed_after_a_later_one():
+    async def test():
+        engine = create_test_engine()
+        user_ids = []
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, UserConnection.__table__])
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for _ in range(3):
+                    suffix = unique_suffix()
+                    db_user = await user_service.create_user(db, UserCreate(
+                        name="Graph",
+                        username=f"graph_{suffix}",
+                        email=f"graph_{suffix}@example.com",
+                        mobile_number=random_mobile_number(),
+                        password="Password123"
+                    ))
+                    user_ids.append(db_user.id)
+            a, b, c = user_ids
+
+            graph = ConnectionGraph()
+            async with AsyncSession(engine) as db:
+                await graph.load(db)
+
+            async with AsyncSession(engine) as slow, AsyncSession(engine) as fast:
+                # The slow writer's row is stamped before the fast one's but commits after it
+                await _connect(slow, a, b)
+                await asyncio.sleep(0.1)
+                await _connect(fast, b, c)
+                await fast.commit()
+
+                async with AsyncSession(engine) as db:
+                    await graph.refresh(db)
+                assert graph.is_connected(b, c)
+                assert not graph.is_connected(a, b)
+
+                await slow.commit()
+
+            async with AsyncSession(engine) as db:
+                await graph.refresh(db)
+            assert graph.is_connected(a, b)
+            assert graph.neighbours(b).tolist() == sorted([a, c])
+        finally:
+            async with AsyncSession(engine) as db:
+                if user_ids:
+                    await db.execute(delete(UserConnection).where(or_(
+                        UserConnection.user_id.in_(user_ids),
+                        UserConnection.connected_user_id.in_(user_ids)
+                    )))
+                    await db.execute(delete(User).where(User.id.in_(user_ids)))
+                    await db.commit()
+            await engine.dispose()
+
+    asyncio.run(test())
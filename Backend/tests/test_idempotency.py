@@ -0,0 +1,148 @@
+# tests/test_idempotency.py
+"""
+An Idempotency-Key's response is committed in the same transaction as the
+write it describes: a retry replays it, and a write that fails (even after
+the handler committed) leaves neither the write nor the key behind.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import Base
+from app.db.post_commit import after_commit
+from app.models.idempotency_key import IdempotencyKey
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services import user as user_service
+from app.services.idempotency import IdempotencyStore, IdempotentResponse, request_fingerprint
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+def _user_create(prefix: str) -> UserCreate:
+    suffix = unique_suffix()
+    return UserCreate(
+        name="Idempotency",
+        username=f"{prefix}_{suffix}",
+        email=f"{prefix}_{suffix}@example.com",
+        mobile_number=random_mobile_number(),
+        password="Password123"
+    )
+
+def _fingerprint(body: bytes):
+    request_hash = request_fingerprint("POST", "/users", body)
+    async def fingerprint() -> bytes:
+        return request_hash
+    return fingerprint
+
+def _creates_user(prefix: str, delay: float = 0, fail: bool = False, published: list = None):
+    """A handler that commits a new user, then optionally waits or fails."""
+    async def handler(db: AsyncSession) -> IdempotentResponse:
+        db_user = await user_service.create_user(db, _user_create(prefix))
+        if published is not None:
+            after_commit(db, lambda: published.append(db_user.id))
+            # The handler's commit only released a savepoint
+            assert published == []
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("failed after the write committed")
+        return IdempotentResponse(201, str(db_user.id).encode())
+    return handler
+
+async def _with_engine(test):
+    engine = create_test_engine()
+    prefix = f"idem_{unique_suffix()}"
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, IdempotencyKey.__table__])
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            owner = await user_service.create_user(db, _user_create(prefix))
+
+        async def execute(store: IdempotencyStore, key: str, handler, body: bytes = b"{}"):
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                return await store.execute(db, owner.id, key, _fingerprint(body), handler)
+
+        async def created() -> int:
+            async with AsyncSession(engine) as db:
+                return await db.scalar(
+                    select(func.count()).select_from(User).where(User.username.like(f"{prefix}%"), User.id != owner.id)
+                )
+
+        try:
+            await test(execute, created, prefix)
+        finally:
+            async with AsyncSession(engine) as db:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == owner.id))
+                await db.execute(delete(User).where(User.username.like(f"{prefix}%")))
+                await db.commit()
+    finally:
+        await engine.dispose()
+
+@requires_database
+def test_retry_replays_stored_response_without_rerunning_the_write():
+    async def test(execute, created, prefix):
+        first, replayed = await execute(IdempotencyStore(), "key-1", _creates_user(prefix))
+        assert not replayed
+
+        # A fresh store has no local cache, so this replays from the database
+        second, replayed = await execute(IdempotencyStore(), "key-1", _creates_user(prefix))
+        assert replayed
+        assert second == first
+        assert await created() == 1
+
+        with pytest.raises(HTTPException) as excinfo:
+            await execute(IdempotencyStore(), "key-1", _creates_user(prefix), body=b'{"other": 1}')
+        assert excinfo.value.status_code == 422
+        assert await created() == 1
+
+    asyncio.run(_with_engine(test))
+
+@requires_database
+def test_failure_after_handler_commit_rolls_back_write_and_key():
+    async def test(execute, created, prefix):
+        with pytest.raises(RuntimeError):
+            await execute(IdempotencyStore(), "key-2", _creates_user(prefix, fail=True))
+        assert await created() == 0
+
+        # The key was not kept, so the retry performs the write
+        _, replayed = await execute(IdempotencyStore(), "key-2", _creates_user(prefix))
+        assert not replayed
+        assert await created() == 1
+
+    asyncio.run(_with_engine(test))
+
+@requires_database
+def test_post_commit_effects_wait_for_the_key_commit():
+    async def test(execute, created, prefix):
+        published = []
+        with pytest.raises(RuntimeError):
+            await execute(IdempotencyStore(), "key-5", _creates_user(prefix, fail=True, published=published))
+        assert published == []
+
+        (_, body), _ = await execute(IdempotencyStore(), "key-5", _creates_user(prefix, published=published))
+        assert published == [int(body)]
+
+    asyncio.run(_with_engine(test))
+
+@requires_database
+def test_duplicate_from_another_process_waits_for_the_original():
+    async def test(execute, created, prefix):
+        # Separate stores stand in for separate worker processes
+        original = asyncio.create_task(execute(IdempotencyStore(), "key-3", _creates_user(prefix, delay=0.5)))
+        await asyncio.sleep(0.1)
+        duplicate, replayed = await execute(IdempotencyStore(), "key-3", _creates_user(prefix))
+        assert replayed
+        assert duplicate == (await original)[0]
+        assert await created() == 1
+
+        original = asyncio.create_task(execute(IdempotencyStore(), "key-4", _creates_user(prefix, delay=2)))
+        await asyncio.sleep(0.1)
+        with pytest.raises(HTTPException) as excinfo:
+            await execute(IdempotencyStore(lock_timeout=1), "key-4", _creates_user(prefix))
+        assert excinfo.value.status_code == 409
+        await original
+        assert await created() == 2
+
+    asyncio.run(_with_engine(test))
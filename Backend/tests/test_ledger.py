@@ -0,0 +1,69 @@
+# tests/test_ledger.py
+"""
+Transaction versions are stamped in commit order, so the analytics sink keeps
+the state that committed last.
+"""
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ledger_event import LedgerEvent
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.user import UserCreate
+from app.services import ledger
+from app.services import user as user_service
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+@requires_database
+def test_update_committed_later_gets_the_later_version():
+    async def test():
+        engine = create_test_engine()
+        user_ids, transaction_id = [], None
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for _ in range(2):
+                    suffix = unique_suffix()
+                    db_user = await user_service.create_user(db, UserCreate(
+                        name="Versions",
+                        username=f"versions_{suffix}",
+                        email=f"versions_{suffix}@example.com",
+                        mobile_number=random_mobile_number(),
+                        password="Password123"
+                    ))
+                    user_ids.append(db_user.id)
+                # Settled, so creating it leaves both parties' balances alone
+                db_transaction = await ledger.create_transaction(db, TransactionCreate(
+                    payer_id=user_ids[0], payee_id=user_ids[1], transaction_amount=Decimal("10.00"),
+                    description="Versions", is_settled=True
+                ))
+                transaction_id = db_transaction.id
+
+            async with AsyncSession(engine, expire_on_commit=False) as early, \
+                       AsyncSession(engine, expire_on_commit=False) as late:
+                # The early writer's transaction starts first...
+                await early.execute(text("SELECT 1"))
+                await asyncio.sleep(0.1)
+                # ...but the late one takes the row lock and commits first
+                first = await ledger.update_transaction(late, transaction_id, TransactionUpdate(description="late"))
+                second = await ledger.update_transaction(early, transaction_id, TransactionUpdate(description="early"))
+
+            assert (first.description, second.description) == ("late", "early")
+            assert second.last_updated_at > first.last_updated_at
+            async with AsyncSession(engine) as db:
+                stored = await db.scalar(select(Transaction.description).where(Transaction.id == transaction_id))
+            assert stored == "early"
+        finally:
+            async with AsyncSession(engine) as db:
+                if transaction_id is not None:
+                    await db.execute(delete(LedgerEvent).where(LedgerEvent.transaction_id == transaction_id))
+                    await db.execute(delete(Transaction).where(Transaction.id == transaction_id))
+                if user_ids:
+                    await db.execute(delete(User).where(User.id.in_(user_ids)))
+                await db.commit()
+            await engine.dispose()
+
+    asyncio.run(test())
@@ -0,0 +1,91 @@
+# tests/test_ledger_events.py
+"""
+Ledger snapshots never move past an event that commits after a later one.
+"""
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import Base
+from app.models.ledger_event import LedgerEvent
+from app.models.ledger_snapshot import LedgerSnapshot
+from app.models.ledger_snapshot_state import LedgerSnapshotState
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services import ledger_events
+from app.services import user as user_service
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+async def _latest_snapshot(engine, user_id: int):
+    async with AsyncSession(engine) as db:
+        result = await db.execute(
+            select(LedgerSnapshot.total_receivables)
+            .where(LedgerSnapshot.user_id == user_id)
+            .order_by(LedgerSnapshot.last_event_id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+async def _take_snapshots(engine) -> int:
+    async with AsyncSession(engine) as db:
+        return await ledger_events.take_snapshots(db)
+
+@requires_database
+def test_snapshots_wait_for_event_committed_after_a_later_one():
+    async def test():
+        engine = create_test_engine()
+        user_ids = []
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all, tables=[
+                    User.__table__, LedgerEvent.__table__, LedgerSnapshot.__table__, LedgerSnapshotState.__table__
+                ])
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for _ in range(2):
+                    suffix = unique_suffix()
+                    db_user = await user_service.create_user(db, UserCreate(
+                        name="Ledger",
+                        username=f"ledger_{suffix}",
+                        email=f"ledger_{suffix}@example.com",
+                        mobile_number=random_mobile_number(),
+                        password="Password123"
+                    ))
+                    user_ids.append(db_user.id)
+            payer, payee = user_ids
+            # Leave a recorded horizon behind, whatever state earlier runs left
+            await _take_snapshots(engine)
+
+            async with AsyncSession(engine) as slow, AsyncSession(engine) as fast:
+                # The slow writer's event gets the lower ID but commits after the fast one's
+                await ledger_events.record_event(slow, 1, ledger_events.EVENT_CREATED, payer, payee, Decimal("5.00"))
+                await ledger_events.record_event(fast, 2, ledger_events.EVENT_CREATED, payer, payee, Decimal("7.00"))
+                await fast.commit()
+
+                # Records a horizon past both events, then cannot use it while the slow writer is open
+                await _take_snapshots(engine)
+                assert await _take_snapshots(engine) == 0
+                assert await _latest_snapshot(engine, payer) is None
+
+                await slow.commit()
+
+            await _take_snapshots(engine)
+            assert await _latest_snapshot(engine, payer) == Decimal("12.00")
+            async with AsyncSession(engine) as db:
+                _, receivables = await ledger_events.get_balance_at(db, payer, datetime.now(timezone.utc))
+            assert receivables == Decimal("12.00")
+        finally:
+            async with AsyncSession(engine) as db:
+                if user_ids:
+                    await db.execute(delete(LedgerSnapshot).where(LedgerSnapshot.user_id.in_(user_ids)))
+                    await db.execute(delete(LedgerEvent).where(or_(
+                        LedgerEvent.payer_id.in_(user_ids),
+                        LedgerEvent.payee_id.in_(user_ids)
+                    )))
+                    await db.execute(delete(User).where(User.id.in_(user_ids)))
+                    await db.commit()
+            await engine.dispose()
+
+    asyncio.run(test())
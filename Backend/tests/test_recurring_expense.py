@@ -0,0 +1,184 @@
+# tests/test_recurring_expense.py
+"""
+Occurrences fall on the same day of the month as the start (or the month's
+last day), and the recurring scheduler stamps each with its due time, folds
+occurrences on closed days into the spend rollups, and stops schedules
+whose parties are no longer active users or group members.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.group import Group
+from app.models.group_member import GroupMember
+from app.models.ledger_event import LedgerEvent
+from app.models.pair_balance import PairBalance
+from app.models.recurring_expense import RecurringExpense
+from app.models.spend_daily_rollup import SpendDailyRollup
+from app.models.spend_monthly_rollup import SpendMonthlyRollup
+from app.models.transaction import Transaction
+from app.models.transaction_summary import TransactionSummary
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services import recurring_expense as recurring_service
+from app.services import spend_rollup
+from app.services import user as user_service
+from conftest import create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+def _schedule(payer_id: int, payee_id: int, start_at: datetime, group_id: Optional[int] = None) -> RecurringExpense:
+    return RecurringExpense(
+        created_by=payer_id,
+        payer_id=payer_id,
+        payee_id=payee_id,
+        group_id=group_id,
+        amount=Decimal("12.50"),
+        description="Recurring test",
+        interval="daily",
+        interval_count=1,
+        start_at=start_at,
+        occurrences=0,
+        next_due_at=start_at,
+        is_active=True
+    )
+
+def _calendar_occurrences(start_at: datetime, step_months: int, count: int) -> List[datetime]:
+    """Brute force: walk the calendar a day at a time, taking the latest day in every
+    ``step_months``-th month that does not pass the start's day of the month."""
+    occurrences, months, latest = [], 0, None
+    day = start_at
+    while len(occurrences) < count:
+        following = day + timedelta(days=1)
+        if months % step_months == 0 and day.day <= start_at.day:
+            latest = day
+        if following.month != day.month:
+            if months % step_months == 0:
+                occurrences.append(latest)
+            months += 1
+        day = following
+    return occurrences
+
+def test_occurrences_match_the_calendar():
+    rng = random.Random(0)
+    for _ in range(40):
+        start_at = datetime(2023, 1, 1, 9, 30, tzinfo=timezone.utc) + timedelta(days=rng.randint(0, 1500))
+        if rng.random() < 0.5:
+            # Month ends are where clamping matters
+            start_at = start_at.replace(day=28) + timedelta(days=rng.randint(0, 3))
+        interval = rng.choice(["daily", "weekly", "monthly", "yearly"])
+        interval_count = rng.randint(1, 3)
+
+        if interval in ("daily", "weekly"):
+            step = timedelta(days=interval_count * (7 if interval == "weekly" else 1))
+            expected = [start_at + step * n for n in range(30)]
+        else:
+            step_months = interval_count * (12 if interval == "yearly" else 1)
+            expected = _calendar_occurrences(start_at, step_months, 30 if interval == "monthly" else 6)
+        actual = [
+            recurring_service.occurrence_at(start_at, interval, interval_count, n) for n in range(len(expected))
+        ]
+        assert actual == expected
+
+        for _ in range(10):
+            moment = rng.choice([
+                expected[rng.randrange(len(expected) - 1)],
+                start_at + (expected[-2] - start_at) * rng.random(),
+                start_at - timedelta(days=rng.randint(0, 10))
+            ])
+            # The first occurrence due at or after the moment, by linear scan
+            first = next(n for n, due_at in enumerate(expected) if due_at >= moment)
+            assert recurring_service.first_occurrence_from(start_at, interval, interval_count, moment) == first
+
+@requires_database
+def test_batch_backdates_occurrences_and_stops_unrunnable_schedules():
+    async def test():
+        engine = create_test_engine()
+        user_ids, group_id = [], None
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                for _ in range(4):
+                    suffix = unique_suffix()
+                    db_user = await user_service.create_user(db, UserCreate(
+                        name="Recurring",
+                        username=f"recurring_{suffix}",
+                        email=f"recurring_{suffix}@example.com",
+                        mobile_number=random_mobile_number(),
+                        password="Password123"
+                    ))
+                    user_ids.append(db_user.id)
+                a, b, inactive, outsider = user_ids
+
+                group = Group(admin_id=a, group_name="Recurring test")
+                db.add(group)
+                await db.flush()
+                group_id = group.id
+                db.add(GroupMember(group_id=group_id, user_id=b, is_active=True))
+
+                now = datetime.now(timezone.utc)
+                start_at = now - timedelta(days=3)
+                runs = _schedule(a, b, start_at)
+                in_group = _schedule(b, a, start_at, group_id=group_id)
+                with_inactive = _schedule(a, inactive, start_at)
+                with_outsider = _schedule(a, outsider, start_at, group_id=group_id)
+                db.add_all([runs, in_group, with_inactive, with_outsider])
+                await db.execute(update(User).where(User.id == inactive).values(is_active=False))
+                await db.commit()
+
+            async with AsyncSession(engine) as db:
+                claimed, created = await recurring_service.process_due_batch(db, now=now)
+            assert (claimed, created) == (4, 8)
+
+            async with AsyncSession(engine) as db:
+                schedules = {
+                    row.id: row for row in (await db.execute(
+                        select(RecurringExpense).where(RecurringExpense.id.in_(
+                            [runs.id, in_group.id, with_inactive.id, with_outsider.id]
+                        ))
+                    )).scalars()
+                }
+                assert schedules[runs.id].occurrences == 4
+                assert schedules[runs.id].next_due_at == start_at + timedelta(days=4)
+                for stopped in (with_inactive, with_outsider):
+                    assert not schedules[stopped.id].is_active
+                    assert schedules[stopped.id].next_due_at is None
+                    assert schedules[stopped.id].occurrences == 0
+
+                created_at = (await db.execute(
+                    select(Transaction.created_at)
+                    .where(Transaction.payer_id == a, Transaction.payee_id == b)
+                    .order_by(Transaction.created_at)
+                )).scalars().all()
+                assert created_at == [start_at + timedelta(days=n) for n in range(4)]
+
+                # Occurrences on days the rollups already closed are counted in them
+                watermark = await spend_rollup.lock_watermark(db)
+                closed = sum(1 for moment in created_at if watermark and spend_rollup.utc_day(moment) < watermark)
+                rolled_up = await db.scalar(
+                    select(func.coalesce(func.sum(SpendDailyRollup.paid_count), 0))
+                    .where(SpendDailyRollup.user_id == a, SpendDailyRollup.counterparty_id == b)
+                )
+                assert rolled_up == closed
+        finally:
+            async with AsyncSession(engine) as db:
+                if user_ids:
+                    parties = or_(Transaction.payer_id.in_(user_ids), Transaction.payee_id.in_(user_ids))
+                    transaction_ids = select(Transaction.id).where(parties).scalar_subquery()
+                    await db.execute(delete(LedgerEvent).where(LedgerEvent.transaction_id.in_(transaction_ids)))
+                    await db.execute(delete(Transaction).where(parties))
+                    await db.execute(delete(RecurringExpense).where(RecurringExpense.payer_id.in_(user_ids)))
+                    await db.execute(delete(TransactionSummary).where(TransactionSummary.user_id.in_(user_ids)))
+                    await db.execute(delete(PairBalance).where(PairBalance.min_user_id.in_(user_ids)))
+                    await db.execute(delete(SpendDailyRollup).where(SpendDailyRollup.user_id.in_(user_ids)))
+                    await db.execute(delete(SpendMonthlyRollup).where(SpendMonthlyRollup.user_id.in_(user_ids)))
+                    if group_id:
+                        await db.execute(delete(GroupMember).where(GroupMember.group_id == group_id))
+                        await db.execute(delete(Group).where(Group.id == group_id))
+                    await db.execute(delete(User).where(User.id.in_(user_ids)))
+                    await db.commit()
+            await engine.dispose()
+
+    asyncio.run(test())
@@ -0,0 +1,85 @@
+# tests/test_settlement.py
+"""
+Every settlement solver produces a plan that zeroes all balances, the exact
+solver's plan is as short as any, and the heuristics stay within ``n - 1``
+transfers.
+"""
+import random
+from functools import lru_cache
+from typing import Dict, List
+
+import pytest
+
+from app.services import settlement
+from app.services.settlement import Transfer
+
+def _balances(rng: random.Random, groups: int, group_size: int) -> Dict[int, int]:
+    """Zero-sum balances made of ``groups`` independent zero-sum groups, members shuffled."""
+    cents = []
+    for _ in range(groups):
+        members = [rng.randint(-5000, 5000) for _ in range(group_size - 1)]
+        cents.extend(members + [-sum(members)])
+    rng.shuffle(cents)
+    return {user_id: amount for user_id, amount in enumerate(cents, start=1)}
+
+def _assert_settles(balances: Dict[int, int], transfers: List[Transfer]) -> None:
+    remaining = dict(balances)
+    for transfer in transfers:
+        assert transfer.amount_cents > 0
+        assert remaining[transfer.from_user_id] < 0 < remaining[transfer.to_user_id]
+        remaining[transfer.from_user_id] += transfer.amount_cents
+        remaining[transfer.to_user_id] -= transfer.amount_cents
+    assert not any(remaining.values())
+
+def _minimum_transfers(balances: Dict[int, int]) -> int:
+    """Brute force: n minus the most blocks a partition into zero-sum blocks can have."""
+    cents = [amount for amount in balances.values() if amount]
+
+    @lru_cache(maxsize=None)
+    def most_blocks(members: frozenset) -> int:
+        if not members:
+            return 0
+        first, *rest = sorted(members)
+        best = 0
+        for mask in range(1 << len(rest)):
+            block = {first} | {rest[i] for i in range(len(rest)) if mask >> i & 1}
+            if sum(cents[i] for i in block) == 0:
+                best = max(best, 1 + most_blocks(members - block))
+        return best
+
+    return len(cents) - most_blocks(frozenset(range(len(cents))))
+
+def test_exact_plan_is_minimal():
+    rng = random.Random(0)
+    for _ in range(50):
+        balances = _balances(rng, groups=rng.randint(1, 3), group_size=rng.randint(2, 3))
+        transfers, is_optimal = settlement.simplify_debts(balances)
+
+        assert is_optimal
+        _assert_settles(balances, transfers)
+        assert len(transfers) == _minimum_transfers(balances)
+
+def test_heuristic_plans_settle_within_n_minus_one():
+    rng = random.Random(0)
+    for solver in (settlement._settle_greedy, settlement._settle_vectorized):
+        for _ in range(20):
+            balances = _balances(rng, groups=rng.randint(1, 20), group_size=rng.randint(2, 6))
+            members = [user_id for user_id, amount in sorted(balances.items()) if amount]
+            transfers = solver(members, [balances[user_id] for user_id in members])
+
+            _assert_settles(balances, transfers)
+            assert len(transfers) <= len(members) - 1
+
+def test_solver_is_picked_by_member_count():
+    rng = random.Random(0)
+    small = _balances(rng, groups=1, group_size=settlement.EXACT_SOLVER_LIMIT)
+    large = _balances(rng, groups=1, group_size=settlement.VECTORIZE_THRESHOLD + 1)
+
+    assert settlement.simplify_debts(small)[1]
+    transfers, is_optimal = settlement.simplify_debts(large)
+    assert not is_optimal
+    _assert_settles(large, transfers)
+
+def test_unbalanced_balances_are_rejected():
+    with pytest.raises(ValueError):
+        settlement.simplify_debts({1: 100, 2: -99})
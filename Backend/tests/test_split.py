@@ -0,0 +1,64 @@
+# tests/test_split.py
+"""
+Split shares are the largest-remainder allocation of the total, with ties
+going to the lower user ID.
+"""
+import itertools
+import random
+from decimal import Decimal
+from fractions import Fraction
+from typing import List, Sequence
+
+import pytest
+
+from app.schemas.split import SplitParticipant
+from app.services import split
+
+def _largest_remainder(total_cents: int, weights: Sequence[Fraction]) -> List[int]:
+    """
+    Brute force: of all roundings of the exact shares that sum to the total,
+    the one closest to them, giving the extra cents to earlier weights on ties.
+    """
+    exact = [Fraction(total_cents) * weight / sum(weights) for weight in weights]
+    floors = [share.numerator // share.denominator for share in exact]
+    best = None
+    for extra in itertools.product((0, 1), repeat=len(weights)):
+        cents = [floor + bit for floor, bit in zip(floors, extra)]
+        if sum(cents) != total_cents:
+            continue
+        key = (sum(abs(c - share) for c, share in zip(cents, exact)), [-bit for bit in extra])
+        if best is None or key < best[0]:
+            best = (key, cents)
+    return best[1]
+
+def test_allocation_matches_largest_remainder():
+    rng = random.Random(0)
+    for _ in range(300):
+        total_cents = rng.randint(1, 100000)
+        # Small weights make equal remainders, and so ties, common
+        weights = [Fraction(rng.randint(0, 4), rng.randint(1, 3)) for _ in range(rng.randint(1, 8))]
+        if not sum(weights):
+            continue
+        assert split.allocate_cents(total_cents, weights) == _largest_remainder(total_cents, weights)
+
+def test_equal_split_gives_leftover_cents_to_lower_user_ids():
+    participants = [SplitParticipant(user_id=user_id) for user_id in (30, 10, 20)]
+    assert split.compute_split(Decimal("1.00"), "equal", participants) == [(10, 34), (20, 33), (30, 33)]
+
+def test_percentage_split_sums_to_the_total():
+    participants = [
+        SplitParticipant(user_id=1, value=Decimal("33.33")),
+        SplitParticipant(user_id=2, value=Decimal("33.33")),
+        SplitParticipant(user_id=3, value=Decimal("33.34"))
+    ]
+    shares = split.compute_split(Decimal("10.01"), "percentage", participants)
+    assert sum(cents for _, cents in shares) == 1001
+
+def test_exact_split_must_add_up():
+    participants = [
+        SplitParticipant(user_id=1, value=Decimal("4.00")),
+        SplitParticipant(user_id=2, value=Decimal("5.00"))
+    ]
+    assert split.compute_split(Decimal("9.00"), "exact", participants) == [(1, 400), (2, 500)]
+    with pytest.raises(ValueError):
+        split.compute_split(Decimal("10.00"), "exact", participants)
@@ -0,0 +1,33 @@
+# tests/test_transaction_import.py
+"""
+Amounts that would not fit NUMERIC(12, 2) are reported per line instead of
+failing the COPY.
+"""
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import transaction_import
+from conftest import create_test_engine, requires_database
+
+async def _rows(*amounts: str):
+    for line_number, amount in enumerate(amounts, start=1):
+        yield line_number, {"payer_id": 1, "payee_id": 2, "transaction_amount": amount, "description": "Import"}
+
+@requires_database
+def test_amounts_outside_the_column_are_line_errors():
+    async def test():
+        engine = create_test_engine()
+        try:
+            async with AsyncSession(engine) as db:
+                result = await transaction_import.import_transactions(
+                    db, _rows("12.50", "10000000000.00", "1.005"), user_id=1
+                )
+            assert result.inserted == 0
+            assert [error["line"] for error in result.errors] == [2, 3]
+            assert "cannot exceed" in result.errors[0]["error"]
+            assert "decimal places" in result.errors[1]["error"]
+        finally:
+            await engine.dispose()
+
+    asyncio.run(test())
@@ -0,0 +1,40 @@
+# tests/test_user_cache.py
+"""
+A profile loaded before an invalidation is not cached after it.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from app.schemas.user import UserProfileRow
+from app.services.user_cache import UserProfileCache
+
+def _profile(user_id: int, is_active: bool = True) -> UserProfileRow:
+    now = datetime.now(timezone.utc)
+    return UserProfileRow(
+        name="Cached", other_name=None, username=f"cached_{user_id}", email=f"cached_{user_id}@example.com",
+        is_social_account=False, mobile_number="+15550000000", is_password_random=False, is_user_dummy=False,
+        is_user_verified=True, is_mobile_verified=True, is_private_user=False, auth_provider=None,
+        is_active=is_active, max_session=5, id=user_id, last_login=None, created_at=now, last_updated_at=now
+    )
+
+def test_load_racing_an_invalidation_is_not_cached():
+    async def test():
+        cache = UserProfileCache()
+
+        # Loaded, then the user is deactivated and invalidated before the reader stores it
+        token = await cache.token(1)
+        stale = _profile(1)
+        await cache.invalidate(1)
+        await cache.set(stale, token)
+        assert await cache.get_by_id(1) is None
+        assert await cache.get_by_username("cached_1") is None
+
+        # A load with no invalidation in between is cached, by ID and aliases
+        token = await cache.token()
+        fresh = _profile(1, is_active=False)
+        payload = await cache.set(fresh, token)
+        assert (await cache.get_by_id(1)).payload == payload
+        assert (await cache.get_by_username("cached_1")).payload == payload
+        assert (await cache.get_by_email("cached_1@example.com")).payload == payload
+
+    asyncio.run(test())
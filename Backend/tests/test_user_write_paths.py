@@ -0,0 +1,77 @@
+# tests/test_user_write_paths.py
+"""
+The user write paths build their response from a single INSERT/UPDATE ...
+RETURNING, with no refresh or fetch round-trips around the write.
+"""
+import asyncio
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import Base
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import user as user_service
+from conftest import StatementCounter, create_test_engine, random_mobile_number, requires_database, unique_suffix
+
+def _user_create() -> UserCreate:
+    suffix = unique_suffix()
+    return UserCreate(
+        name="Statement Count",
+        username=f"stmt_{suffix}",
+        email=f"stmt_{suffix}@example.com",
+        mobile_number=random_mobile_number(),
+        password="Password123"
+    )
+
+async def _with_session(test):
+    engine = create_test_engine()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await test(engine, db)
+    finally:
+        await engine.dispose()
+
+@requires_database
+def test_create_user_writes_with_one_insert_returning():
+    async def test(engine, db):
+        user_data = _user_create()
+        with StatementCounter(engine) as counter:
+            db_user = await user_service.create_user(db, user_data)
+        try:
+            # Email, username and mobile number uniqueness checks, then the INSERT
+            assert counter.count == 4
+            assert counter.statements[-1].lstrip().upper().startswith("INSERT INTO USERS")
+            assert "RETURNING" in counter.statements[-1].upper()
+            assert db_user.id is not None
+            assert db_user.created_at is not None
+            assert db_user.username == user_data.username
+        finally:
+            await db.execute(delete(User).where(User.id == db_user.id))
+            await db.commit()
+
+    asyncio.run(_with_session(test))
+
+@requires_database
+def test_update_user_writes_with_one_update_returning():
+    async def test(engine, db):
+        db_user = await user_service.create_user(db, _user_create())
+        try:
+            with StatementCounter(engine) as counter:
+                updated = await user_service.update_user(db, db_user.id, UserUpdate(name="Renamed", max_session=3))
+            assert counter.count == 1
+            assert counter.statements[0].lstrip().upper().startswith("UPDATE USERS")
+            assert "RETURNING" in counter.statements[0].upper()
+            assert (updated.id, updated.name, updated.max_session) == (db_user.id, "Renamed", 3)
+
+            # A new mobile number adds only the conflict check
+            with StatementCounter(engine) as counter:
+                await user_service.update_user(db, db_user.id, UserUpdate(mobile_number=random_mobile_number()))
+            assert counter.count == 2
+        finally:
+            await db.execute(delete(User).where(User.id == db_user.id))
+            await db.commit()
+
+    asyncio.run(_with_session(test))